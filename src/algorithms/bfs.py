@@ -1,139 +1,214 @@
-import time
 from rich.console import Console
-from rich.panel import Panel
 import questionary
 from collections import deque
 
-from helpers.result_helper import show_result, visualize_route
+from helpers.graph_helper import CompiledGraph, build_path
+from helpers.metrics_helper import SearchMetrics, measure_goal
+from helpers.result_helper import cached_search, show_result, visualize_route
+from helpers.trace_helper import SearchTrace, replay
 from store.states import GlobalState
 
 console = Console()
 
 class BreadthFirstSearch:
-    def __init__(self, graph: list):
+    def __init__(self, graph: CompiledGraph):
         """
-        Initialize the Breadth First Search with a graph.
+        Initialize the Breadth First Search with a compiled graph.
         """
         self.graph = graph
     
-    def search(self, start: str = None, goal: str = None) -> tuple[list[str], int, int]:
+    def search(self, start: str = None, goal: str = None, metrics: SearchMetrics = None,
+               trace: SearchTrace = None, max_cost: float = None) -> tuple[list[str], int, int]:
         """
         Search route from start to goal using Breadth First Search algorithm.
+        `metrics`, if given, receives the counters of the search and `trace` its steps.
+        With `max_cost` routes longer than it are pruned as soon as they exceed it.
+        Every node keeps the first route that reached it, so the goal may be missed
+        when that route was too expensive and a cheaper one with more hops fits.
         """
         start = start if start is not None else GlobalState.start_location
         goal = goal if goal is not None else GlobalState.destination_location
         
-        # Transform graph into an adjacency dict for easier processing
-        graph_dict = {}
-        for node_data in self.graph:
-            node_name = node_data["node"]
-            neighbors = []
-            for branch in node_data.get("branch", []):
-                neighbors.append((branch["node"], branch["distance"]))
-            graph_dict[node_name] = neighbors
-        
-        # Format: (location, path_so_far, cost_so_far)
-        queue = deque([(start, [start], 0)])
-        visited = {start}  # Set of visited nodes
+        graph = self.graph
+        start_id = graph.id_of(start)
+        goal_id = graph.id_of(goal)
+        
+        if start_id is None or goal_id is None:
+            return [], 0, 0
+        
+        # Format: (location id, cost_so_far), the route is kept in the predecessor map
+        queue = deque([(start_id, 0)])
+        parents = {start_id: None}  # Predecessor of every visited node
         visited_count = 0  # Count of steps for tracking
-        step = 1
+        generated = 0
+        peak_frontier = 0
         
-        if GlobalState.show_process:
-            console.print(Panel(f"[bold cyan]ILUSTRASI PROSES PENCARIAN BREADTH FIRST SEARCH[/bold cyan]"))
-            console.print(f"Mencari rute dari [green]{start}[/green] ke [green]{goal}[/green]...")
+        if trace is not None:
+            trace.emit("begin", start_id, goal_id)
         
         while queue:
+            if len(queue) > peak_frontier:
+                peak_frontier = len(queue)
+            
             # Get node from the queue (FIFO)
-            current, path, current_cost = queue.popleft()
+            current, current_cost = queue.popleft()
             visited_count += 1
             
-            if GlobalState.show_process:
-                console.print(f"\n[bold]Langkah {step}:[/bold]")
-                console.print(f"  Mengunjungi lokasi: [cyan]{current}[/cyan]")
-                console.print(f"  Biaya sejauh ini: [yellow]{current_cost} (meter)[/yellow]")
-                console.print(f"  Rute sejauh ini: [green]{' -> '.join(path)}[/green]")
-                step += 1
-                time.sleep(0.3)
+            if trace is not None:
+                trace.emit("expand", current, parents[current], current_cost)
             
             # If goal reached, return path and cost
-            if current == goal:
-                if GlobalState.show_process:
-                    console.print(Panel("[bold green]TUJUAN TERCAPAI![/bold green] Lokasi tujuan telah ditemukan."))
-                return path, current_cost, visited_count
+            if current == goal_id:
+                if trace is not None:
+                    trace.emit("goal", current, current_cost)
+                if metrics is not None:
+                    metrics.record(visited_count, generated, 0, peak_frontier)
+                return graph.to_names(build_path(parents, current)), current_cost, visited_count
             
             # Check all neighbors of current node
-            if current in graph_dict:
-                neighbors_info = []
-                
-                for neighbor, step_cost in graph_dict[current]:
-                    if neighbor not in visited:
-                        visited.add(neighbor)
-                        new_cost = current_cost + step_cost
-                        new_path = path + [neighbor]
-                        queue.append((neighbor, new_path, new_cost))
-                        neighbors_info.append((neighbor, step_cost, new_cost))
-                
-                if GlobalState.show_process and neighbors_info:
-                    console.print("  Memeriksa tetangga:")
-                    for neighbor, step_cost, new_cost in neighbors_info:
-                        console.print(f"     - [blue]{neighbor}[/blue]: Jarak = [yellow]{step_cost}[/yellow] meter, Total biaya = [yellow]{new_cost}[/yellow] meter")
-                    
-                if GlobalState.show_process and not neighbors_info:
-                    console.print(f"  [red]Tidak ada tetangga yang belum dikunjungi dari lokasi {current}.[/red]")
+            for neighbor, step_cost in graph.neighbors(current):
+                new_cost = current_cost + step_cost
+                if max_cost is not None and new_cost > max_cost:
+                    continue
+                if neighbor not in parents:
+                    parents[neighbor] = current
+                    queue.append((neighbor, new_cost))
+                    generated += 1
+                    if trace is not None:
+                        trace.emit("push", neighbor, step_cost, new_cost)
+        
+        if trace is not None:
+            trace.emit("fail")
         
-        if GlobalState.show_process:
-            console.print(Panel("[bold red]TIDAK ADA RUTE![/bold red] Tidak dapat menemukan rute ke tujuan."))
+        if metrics is not None:
+            metrics.record(visited_count, generated, 0, peak_frontier)
         
         # Return None if no path found (will be handled by the caller)
         return [], 0, visited_count
 
-    def search_multigoal(self) -> list[tuple[list[str], int, int]] | None:
+    def search_bidirectional(self, start: str = None, goal: str = None, metrics: SearchMetrics = None,
+                             max_cost: float = None) -> tuple[list[str], int, int]:
+        """
+        Search route from start to goal with Bidirectional Breadth First Search.
+        One frontier grows from the start and one from the goal over the reversed
+        graph, always expanding a full level of the smaller one. When a level
+        touches the other side, the meeting with the fewest hops is the route.
+        `metrics`, if given, receives the counters of the search.
+        With `max_cost` routes longer than it are pruned as soon as they exceed it,
+        like the one-sided search the route may be missed although one fits.
+        """
+        start = start if start is not None else GlobalState.start_location
+        goal = goal if goal is not None else GlobalState.destination_location
+        
+        graph = self.graph
+        start_id = graph.id_of(start)
+        goal_id = graph.id_of(goal)
+        
+        if start_id is None or goal_id is None:
+            return [], 0, 0
+        if start_id == goal_id:
+            return [start], 0, 0
+        
+        # Per side: predecessor map, hops and cost from its root, current level
+        forward = {"parents": {start_id: None}, "hops": {start_id: 0}, "cost": {start_id: 0}, "level": [start_id], "graph": graph}
+        backward = {"parents": {goal_id: None}, "hops": {goal_id: 0}, "cost": {goal_id: 0}, "level": [goal_id], "graph": graph.reverse()}
+        visited_count = 0
+        generated = 0
+        peak_frontier = 0
+        
+        while forward["level"] and backward["level"]:
+            peak_frontier = max(peak_frontier, len(forward["level"]) + len(backward["level"]))
+            side, other = (forward, backward) if len(forward["level"]) <= len(backward["level"]) else (backward, forward)
+            
+            best = None  # (hops, cost, node on this side, node on the other side)
+            next_level = []
+            for current in side["level"]:
+                visited_count += 1
+                for neighbor, step_cost in side["graph"].neighbors(current):
+                    if max_cost is not None and side["cost"][current] + step_cost > max_cost:
+                        continue
+                    if neighbor in other["parents"]:
+                        hops = side["hops"][current] + 1 + other["hops"][neighbor]
+                        cost = side["cost"][current] + step_cost + other["cost"][neighbor]
+                        if (best is None or (hops, cost) < best[:2]) and (max_cost is None or cost <= max_cost):
+                            best = (hops, cost, current, neighbor)
+                    if neighbor not in side["parents"]:
+                        side["parents"][neighbor] = current
+                        side["hops"][neighbor] = side["hops"][current] + 1
+                        side["cost"][neighbor] = side["cost"][current] + step_cost
+                        next_level.append(neighbor)
+                        generated += 1
+            side["level"] = next_level
+            
+            if best is not None:
+                _, cost, near, far = best
+                if side is forward:
+                    path = build_path(forward["parents"], near) + build_path(backward["parents"], far)[::-1]
+                else:
+                    path = build_path(forward["parents"], far) + build_path(backward["parents"], near)[::-1]
+                if metrics is not None:
+                    metrics.record(visited_count, generated, 0, peak_frontier)
+                return graph.to_names(path), cost, visited_count
+        
+        if metrics is not None:
+            metrics.record(visited_count, generated, 0, peak_frontier)
+        return [], 0, visited_count
+
+    def search_multigoal(self, bidirectional: bool = False, metrics: SearchMetrics = None,
+                         trace: SearchTrace = None, max_cost: float = None) -> list[tuple[list[str], int, int]] | None:
         """
         Run multigoal/destination search.
+        `metrics`, if given, receives the counters of every destination and their totals,
+        `trace` the steps of every destination (not recorded for the bidirectional search).
+        `max_cost` is the budget of the whole route, every leg gets what the previous legs left.
         """
         result = []
         start = GlobalState.start_location
-        iteration = 0
         
         # Create a copy of the destination_location list to avoid modifying the original
         destinations = GlobalState.destination_location.copy()
 
         while len(destinations) > 0:
-            iteration += 1
             destination = destinations.pop(0)
 
-            if GlobalState.show_process:
-                console.print(f"\n[bold cyan]Searching for destination number-{iteration}: {destination}[/bold cyan]")
-                console.print(f"From: [green]{start}[/green]")
-
-            search_result = self.search(start, destination)
+            with measure_goal(metrics, destination) as leg_metrics:
+                if bidirectional:
+                    search_result = self.search_bidirectional(start, destination, leg_metrics, max_cost)
+                else:
+                    search_result = self.search(start, destination, leg_metrics, trace, max_cost)
             if not search_result[0]:  # Check if path is empty
-                if GlobalState.show_process:
-                    console.print(Panel(f"[bold red]Gagal menemukan rute ke tujuan: {destination}[/bold red]"))
                 return None  # Stop if any destination cannot be reached
 
             result.append(search_result)
             start = destination  # Next start = previous goal
+            if max_cost is not None:
+                max_cost -= search_result[1]
 
         return result
 
-def run_bfs():
+def run_bfs(bidirectional: bool = False):
     """
-    Execute the Breadth First Search (BFS) algorithm.
+    Execute the Breadth First Search (BFS) algorithm, or its bidirectional variant.
     """
-    bfs = BreadthFirstSearch(GlobalState.malang_graph)
+    bfs = BreadthFirstSearch(GlobalState.compiled_graph)
+    metrics = SearchMetrics("BIBFS" if bidirectional else "BFS")
+    # The steps are recorded during the search and illustrated afterwards
+    trace = SearchTrace(GlobalState.compiled_graph.name_of, "BFS") if GlobalState.show_process and not bidirectional else None
         
-    start_time = time.time()
-    
-    if GlobalState.is_multi:
-        result = bfs.search_multigoal()
-    else:
-        result = bfs.search()
+    def compute():
+        if GlobalState.is_multi:
+            return bfs.search_multigoal(bidirectional, metrics, trace, GlobalState.cost_budget)
+        if bidirectional:
+            return bfs.search_bidirectional(metrics=metrics, max_cost=GlobalState.cost_budget)
+        return bfs.search(metrics=metrics, trace=trace, max_cost=GlobalState.cost_budget)
         
-    end_time = time.time()
-    time_computation = end_time - start_time
+    result = cached_search(metrics, compute)
+    time_computation = metrics.wall_time
+
+    if trace is not None:
+        replay(trace, GlobalState.replay_speed)
 
-    show_result("BFS", result, time_computation)
+    show_result("Bidirectional BFS" if bidirectional else "BFS", result, time_computation, metrics)
     
     if result:
         if GlobalState.is_multi:
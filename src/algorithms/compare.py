@@ -0,0 +1,137 @@
+"""
+Side-by-side comparison of the search algorithms on the same query.
+
+Every algorithm runs in its own process, forked after the graph is loaded so it
+is shared copy-on-write, and is stopped when its timed run and its memory run
+do not finish within the timeout. The results are shown in one table with the cheapest route highlighted.
+"""
+
+import multiprocessing
+import time
+
+from rich.console import Console
+import questionary
+
+from algorithms.runner import road_graph, search_multigoal_route, search_route
+from config.config import COMPARE_TIMEOUT
+from helpers.metrics_helper import SearchMetrics
+from helpers.result_helper import show_comparison
+from store.states import GlobalState
+
+console = Console()
+
+COMPARED_ALGORITHMS = ("BFS", "DFS", "UCS", "DLS")
+
+
+def compare_one(algorithm: str, start: str, destinations: list[str], depth_limit: int = None,
+                max_cost: float = None, road: bool = False) -> dict:
+    """
+    Search the query with one algorithm and collect its result and metrics.
+    The times are measured without tracemalloc, the peak memory is traced in a
+    second run like in the benchmark, so its overhead does not end up in the times.
+    """
+    metrics = SearchMetrics(algorithm)
+    legs = _search_query(algorithm, start, destinations, depth_limit, max_cost, road, metrics)
+
+    memory_metrics = SearchMetrics(algorithm)
+    _search_query(algorithm, start, destinations, depth_limit, max_cost, road, memory_metrics, trace_memory=True)
+    metrics.peak_memory = memory_metrics.peak_memory
+    for goal, memory_goal in zip(metrics.goals, memory_metrics.goals):
+        goal.peak_memory = memory_goal.peak_memory
+
+    return {
+        "algorithm": algorithm,
+        "status": "found" if legs else "no route",
+        "routes": [leg[0] for leg in legs] if legs else [],
+        "distance": sum(leg[1] for leg in legs) if legs else None,
+        "metrics": metrics.to_dict(),
+    }
+
+
+def _search_query(algorithm: str, start: str, destinations: list[str], depth_limit: int, max_cost: float,
+                  road: bool, metrics: SearchMetrics, trace_memory: bool = False) -> list[tuple[list, float, int]] | None:
+    if len(destinations) == 1:
+        legs = [search_route(algorithm, start, destinations[0], depth_limit, metrics, trace_memory, road=road, max_cost=max_cost)]
+        return legs if legs[0][0] else None
+    return search_multigoal_route(algorithm, start, destinations, depth_limit, metrics, None, road, max_cost, trace_memory)
+
+
+def _compare_worker(connection, *args) -> None:
+    try:
+        connection.send(compare_one(*args))
+    except Exception as e:
+        connection.send({"algorithm": args[0], "status": "error", "error": str(e)})
+    finally:
+        connection.close()
+
+
+def compare_algorithms(start: str, destinations: list[str], algorithms: tuple[str, ...] = COMPARED_ALGORITHMS,
+                       depth_limit: int = None, max_cost: float = None, road: bool = False,
+                       timeout: float = COMPARE_TIMEOUT) -> list[dict]:
+    """
+    Run every algorithm on the same query at the same time. Returns one record
+    per algorithm in the given order with its status ("found", "no route",
+    "timeout" or "error"), routes, total distance and search metrics.
+    DLS searches without an effective limit when `depth_limit` is not given.
+    Where processes can not be forked the algorithms run one after another without timeout.
+    """
+    if depth_limit is None:
+        graph = road_graph() if road else GlobalState.compiled_graph
+        depth_limit = graph.num_nodes
+
+    jobs = [(algorithm, start, destinations, depth_limit, max_cost, road) for algorithm in algorithms]
+    if "fork" not in multiprocessing.get_all_start_methods():
+        results = []
+        for job in jobs:
+            try:
+                results.append(compare_one(*job))
+            except Exception as e:
+                results.append({"algorithm": job[0], "status": "error", "error": str(e)})
+        return results
+
+    context = multiprocessing.get_context("fork")
+    running = []
+    for job in jobs:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_compare_worker, args=(sender, *job), daemon=True)
+        process.start()
+        sender.close()
+        running.append((job[0], process, receiver))
+
+    # Every algorithm gets `timeout` seconds from the start, they all run at the same time
+    deadline = time.perf_counter() + timeout
+    results = []
+    for algorithm, process, receiver in running:
+        try:
+            if receiver.poll(max(deadline - time.perf_counter(), 0)):
+                results.append(receiver.recv())
+            else:
+                results.append({"algorithm": algorithm, "status": "timeout", "error": f"No result within {timeout:g} seconds"})
+        except EOFError:
+            results.append({"algorithm": algorithm, "status": "error", "error": "Search process stopped unexpectedly"})
+        finally:
+            receiver.close()
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    return results
+
+
+def run_compare() -> None:
+    """
+    Compare BFS, DFS, UCS and DLS on the selected query.
+    """
+    max_depth = questionary.text(
+        "How many max depth do you want to search with DLS?",
+        validate=lambda text: text.isdigit() and int(text) > 1,
+    ).ask()
+
+    destinations = GlobalState.destination_location if GlobalState.is_multi else [GlobalState.destination_location]
+
+    with console.status("[cyan]Running BFS, DFS, UCS and DLS...[/cyan]"):
+        start_time = time.perf_counter()
+        results = compare_algorithms(GlobalState.start_location, destinations, depth_limit=int(max_depth),
+                                     max_cost=GlobalState.cost_budget)
+        time_computation = time.perf_counter() - start_time
+
+    show_comparison(results, time_computation)
@@ -1,63 +1,105 @@
-import time
 from rich.console import Console
-from rich.panel import Panel
 import questionary
 
-from helpers.result_helper import show_result, visualize_route
+from helpers.graph_helper import CompiledGraph, build_path
+from helpers.metrics_helper import SearchMetrics, measure_goal
+from helpers.result_helper import cached_search, show_result, visualize_route
+from helpers.trace_helper import SearchTrace, replay
 from store.states import GlobalState
 
 console = Console()
 
-def search(start: str = None, goal: str = None) -> tuple[list[str], int, int]:
+def search(start: str = None, goal: str = None, metrics: SearchMetrics = None, trace: SearchTrace = None,
+           graph: CompiledGraph = None, max_cost: float = None) -> tuple[list[str], int, int]:
     """
     Run single destination search
+    `metrics`, if given, receives the counters of the search and `trace` its steps.
+    `graph` defaults to the location graph. With `max_cost` routes longer than it
+    are pruned as soon as they exceed it. Every node is only expanded for the first
+    route that reached it, so the goal may be missed although a route fits the budget.
     """
     start = start if start is not None else GlobalState.start_location
     goal = goal if goal is not None else GlobalState.destination_location
 
-    if GlobalState.show_process:
-        console.print(Panel(f"[bold cyan]ILLUSTRATION OF SEARCH PROCESS DEPTH-FIRST SEARCH[/bold cyan]"))
-        console.print(f"Mencari rute dari [green]{start}[/green] ke [green]{goal}[/green]...")
-
-    # Initialize the variables
-    tumpukan = [(start, [start], 0)]  # (current_node, path, current_cost)
-    dikunjungi = set()
-    semua_jalur = []
-
     # Ensure the graph data exists
-    if not GlobalState.malang_graph:
+    graph = graph if graph is not None else GlobalState.compiled_graph
+    if not graph:
         console.print("[red]Data graf tidak ditemukan di GlobalState![/red]")
         return [], 0, len([])
 
+    start_id = graph.id_of(start)
+    goal_id = graph.id_of(goal)
+    if start_id is None or goal_id is None:
+        return [], 0, 0
+
+    if trace is not None:
+        trace.emit("begin", start_id, goal_id)
+
+    # Initialize the variables
+    tumpukan = [(start_id, None, 0)]  # (current_node, parent_node, current_cost)
+    induk = {}  # Predecessor of every expanded node
+    didorong = {start_id}  # Nodes that were pushed on the stack
+    jumlah_ekspansi = 0
+    jumlah_dibangkitkan = 0
+    jumlah_duplikat = 0
+    puncak_tumpukan = 0
+
     # Perform DFS search
     while tumpukan:
-        simpul_saat_ini, jalur, biaya = tumpukan.pop()  # DFS with stack (LIFO)
-        semua_jalur.append(jalur.copy())
-
-        if simpul_saat_ini == goal:
-            return jalur, biaya, len(semua_jalur)
-
-        if simpul_saat_ini not in dikunjungi:
-            dikunjungi.add(simpul_saat_ini)
-
-            # Get neighbors from graph
-            for item in GlobalState.malang_graph:
-                if item["node"] == simpul_saat_ini:
-                    for tetangga in item["branch"]:
-                        if tetangga["node"] not in dikunjungi:
-                            biaya_tepi = tetangga["distance"]
-                            tumpukan.append((tetangga["node"], jalur + [tetangga["node"]], biaya + biaya_tepi))
+        if len(tumpukan) > puncak_tumpukan:
+            puncak_tumpukan = len(tumpukan)
+
+        simpul_saat_ini, simpul_induk, biaya = tumpukan.pop()  # DFS with stack (LIFO)
+
+        # Already expanded through another path
+        if simpul_saat_ini in induk:
+            continue
+
+        induk[simpul_saat_ini] = simpul_induk
+        jumlah_ekspansi += 1
+
+        if trace is not None:
+            trace.emit("expand", simpul_saat_ini, simpul_induk, biaya)
+
+        if simpul_saat_ini == goal_id:
+            if trace is not None:
+                trace.emit("goal", simpul_saat_ini, biaya)
+            if metrics is not None:
+                metrics.record(jumlah_ekspansi, jumlah_dibangkitkan, jumlah_duplikat, puncak_tumpukan)
+            return graph.to_names(build_path(induk, simpul_saat_ini)), biaya, jumlah_ekspansi
+
+        # Get neighbors from graph
+        for tetangga, biaya_tepi in graph.neighbors(simpul_saat_ini):
+            if max_cost is not None and biaya + biaya_tepi > max_cost:
+                continue
+            if tetangga not in induk:
+                if tetangga in didorong:
+                    jumlah_duplikat += 1
+                didorong.add(tetangga)
+                jumlah_dibangkitkan += 1
+                tumpukan.append((tetangga, simpul_saat_ini, biaya + biaya_tepi))
+                if trace is not None:
+                    trace.emit("push", tetangga, biaya_tepi, biaya + biaya_tepi)
     
-    return [], 0, len(semua_jalur)
-
-def search_multigoal() -> list[tuple[list[str], float, int]]:
+    if trace is not None:
+        trace.emit("fail")
+    if metrics is not None:
+        metrics.record(jumlah_ekspansi, jumlah_dibangkitkan, jumlah_duplikat, puncak_tumpukan)
+    return [], 0, jumlah_ekspansi
+
+def search_multigoal(metrics: SearchMetrics = None, trace: SearchTrace = None,
+                     max_cost: float = None) -> list[tuple[list[str], float, int]]:
     """
     Run multi-destination search using depth-first search.
+    `metrics`, if given, receives the counters of every destination and their totals,
+    `trace` the steps of every destination. `max_cost` is the budget of the whole
+    route, every leg gets what the previous legs left and the search stops at the
+    first leg that does not fit.
     """
     results = []  # List to store results for each goal
     total_expanded_nodes = 0
 
-    if not GlobalState.malang_graph:
+    if not GlobalState.compiled_graph:
         console.print("[red]Data graf tidak ditemukan di GlobalState![/red]")
         return results
 
@@ -66,18 +108,20 @@ def search_multigoal() -> list[tuple[list[str], float, int]]:
     current_start = start
 
     for goal in GlobalState.destination_location:
-        if GlobalState.show_process:
-            console.print(f"\n[bold cyan]Searching for goal: {goal}[/bold cyan] from [green]{current_start}[/green]")
-
-        jalur, biaya, expanded_nodes = search(current_start, goal)
+        with measure_goal(metrics, goal) as leg_metrics:
+            jalur, biaya, expanded_nodes = search(current_start, goal, leg_metrics, trace, max_cost=max_cost)
         
         if jalur:
             results.append((jalur, biaya, expanded_nodes))
             total_expanded_nodes += expanded_nodes
             current_start = goal  # Set current goal as new start
+            if max_cost is not None:
+                max_cost -= biaya
         else:
             console.print(f"[red]Tidak ada jalur dari {current_start} ke {goal}![/red]")
             results.append(([], 0, expanded_nodes))
+            if max_cost is not None:
+                break  # The remaining budget is unknown without this leg
 
     return results
 
@@ -86,19 +130,23 @@ def run_dfs() -> None:
     """
     Execute the Depth First Search (DFS) algorithm.
     """
-    start_time = time.time()
+    metrics = SearchMetrics("DFS")
+    # The steps are recorded during the search and illustrated afterwards
+    trace = SearchTrace(GlobalState.compiled_graph.name_of, "DFS") if GlobalState.show_process else None
 
     # Determine if it's a single goal or multi-goal search
     if GlobalState.is_multi:
-        result = search_multigoal()
+        result = cached_search(metrics, lambda: search_multigoal(metrics, trace, GlobalState.cost_budget))
     else:
-        result = search()
+        result = cached_search(metrics, lambda: search(metrics=metrics, trace=trace, max_cost=GlobalState.cost_budget))
+
+    time_computation = metrics.wall_time
 
-    end_time = time.time()
-    time_computation = end_time - start_time
+    if trace is not None:
+        replay(trace, GlobalState.replay_speed)
 
     # Show results and calculate time
-    show_result("DFS", result, time_computation)
+    show_result("DFS", result, time_computation, metrics)
 
     if GlobalState.is_multi:
         sum_distance = sum(r[1] for r in result)
@@ -1,61 +1,194 @@
-import time
 from rich.console import Console
-from rich.panel import Panel
 import questionary
 
-from helpers.result_helper import show_result, visualize_route
+from helpers.graph_helper import CompiledGraph, build_path
+from helpers.metrics_helper import SearchMetrics, measure_goal
+from helpers.result_helper import cached_search, show_result, visualize_route
+from helpers.trace_helper import SearchTrace, replay
 from store.states import GlobalState
 
 console = Console()
 
-def search(start: str = None, goal: str = None, limit: int = None) -> tuple[list[str], int, int]:
+def depth_limited(graph: CompiledGraph, start_id: int, goal_id: int, limit: int | None, min_depth: dict,
+                  metrics: SearchMetrics = None, trace: SearchTrace = None,
+                  max_cost: float = None) -> tuple[list[int] | None, float, int, bool]:
+    """
+    Depth-limited search over node ids. Returns the path (None if there is no
+    route within the limit), its cost, the number of expanded nodes and whether
+    some route was cut off by the limit.
+
+    A node is expanded again when it is reached with a smaller depth (more
+    remaining depth) than before, so a node first found through a deep path is
+    not lost for a shallower one. `min_depth` holds the smallest depth every node
+    was reached with and can be shared between the iterations of iterative deepening.
+    With `max_cost` routes longer than it are pruned as soon as they exceed it,
+    such routes do not count as cut off. A node is not expanded again for a
+    cheaper route of the same or a larger depth, so the goal may be missed
+    although a route within the limit fits the budget.
+    """
+    # Depth counts edges here, the route has at most `limit` nodes
+    max_depth = limit - 1 if limit else graph.num_nodes
+    min_depth[start_id] = 0
+
+    # Initialize the variables
+    tumpukan = [(start_id, None, 0, 0)]  # (current_node, parent_state, current_cost, depth)
+    kedalaman_ekspansi = {}  # Depth every node was last expanded with
+    induk = {}  # (node, depth) -> (parent, depth - 1) of every expansion
+    didorong = {start_id}  # Nodes that were pushed on the stack
+    jumlah_ekspansi = 0
+    jumlah_dibangkitkan = 0
+    jumlah_duplikat = 0
+    puncak_tumpukan = 0
+    terpotong = False
+    jalur = None
+
+    while tumpukan:
+        if len(tumpukan) > puncak_tumpukan:
+            puncak_tumpukan = len(tumpukan)
+
+        simpul_saat_ini, simpul_induk, biaya, kedalaman = tumpukan.pop()
+
+        if simpul_saat_ini == goal_id:
+            induk[(simpul_saat_ini, kedalaman)] = simpul_induk
+            jumlah_ekspansi += 1
+            jalur = [simpul for simpul, _ in build_path(induk, (simpul_saat_ini, kedalaman))]
+            if trace is not None:
+                trace.emit("expand", simpul_saat_ini, jalur[-2] if len(jalur) > 1 else None, biaya)
+                trace.emit("goal", simpul_saat_ini, biaya)
+            break
+
+        # Already expanded with at least as much remaining depth, or a shallower
+        # path to this node is known
+        if kedalaman >= kedalaman_ekspansi.get(simpul_saat_ini, max_depth + 1) or kedalaman > min_depth[simpul_saat_ini]:
+            continue
+
+        kedalaman_ekspansi[simpul_saat_ini] = kedalaman
+        induk[(simpul_saat_ini, kedalaman)] = simpul_induk
+        jumlah_ekspansi += 1
+
+        if trace is not None:
+            trace.emit("expand", simpul_saat_ini, simpul_induk[0] if simpul_induk else None, biaya)
+
+        if kedalaman == max_depth:
+            terpotong = terpotong or graph.degree(simpul_saat_ini) > 0
+            continue
+
+        state = (simpul_saat_ini, kedalaman)
+        for tetangga, biaya_tepi in graph.neighbors(simpul_saat_ini):
+            if max_cost is not None and biaya + biaya_tepi > max_cost:
+                continue
+            if kedalaman + 1 <= min_depth.get(tetangga, max_depth):
+                min_depth[tetangga] = kedalaman + 1
+                if tetangga in didorong:
+                    jumlah_duplikat += 1
+                didorong.add(tetangga)
+                jumlah_dibangkitkan += 1
+                tumpukan.append((tetangga, state, biaya + biaya_tepi, kedalaman + 1))
+                if trace is not None:
+                    trace.emit("push", tetangga, biaya_tepi, biaya + biaya_tepi)
+
+    if metrics is not None:
+        metrics.record(jumlah_ekspansi, jumlah_dibangkitkan, jumlah_duplikat, puncak_tumpukan)
+    return jalur, biaya if jalur else 0, jumlah_ekspansi, terpotong
+
+
+def search(start: str = None, goal: str = None, limit: int = None, metrics: SearchMetrics = None,
+           trace: SearchTrace = None, graph: CompiledGraph = None, max_cost: float = None) -> tuple[list[str], int, int]:
     """
     Run single destination search (DFS or Depth-Limited Search).
+    `limit` is the maximum number of nodes on the route.
+    `metrics`, if given, receives the counters of the search and `trace` its steps.
+    `graph` defaults to the location graph. With `max_cost` routes longer than it
+    are pruned as soon as they exceed it, see depth_limited for the routes it can miss.
     """
     start = start if start is not None else GlobalState.start_location
     goal = goal if goal is not None else GlobalState.destination_location
 
-    if GlobalState.show_process:
-        console.print(Panel(f"[bold cyan]ILLUSTRATION OF SEARCH PROCESS[/bold cyan]"))
-        console.print(f"Mencari rute dari [green]{start}[/green] ke [green]{goal}[/green]...")
+    graph = graph if graph is not None else GlobalState.compiled_graph
+    start_id = graph.id_of(start)
+    goal_id = graph.id_of(goal)
+    if start_id is None or goal_id is None:
+        return [], 0, 0
 
-    # Initialize the variables
-    tumpukan = [(start, [start], 0)]  # (current_node, path, current_cost)
-    dikunjungi = set()
-    semua_jalur = []
+    if trace is not None:
+        trace.emit("begin", start_id, goal_id)
 
-    while tumpukan:
-        simpul_saat_ini, jalur, biaya = tumpukan.pop()
-        
-        if limit and len(jalur) > limit: 
-            continue
-        
-        semua_jalur.append(jalur.copy())
+    jalur, biaya, jumlah_ekspansi, _ = depth_limited(graph, start_id, goal_id, limit, {}, metrics, trace, max_cost)
+    if jalur is None:
+        if trace is not None:
+            trace.emit("fail")
+        return [], 0, jumlah_ekspansi
+    return graph.to_names(jalur), biaya, jumlah_ekspansi
+
+
+def search_iterative(start: str = None, goal: str = None, max_limit: int = None, metrics: SearchMetrics = None,
+                     trace: SearchTrace = None, graph: CompiledGraph = None, max_cost: float = None) -> tuple[list[str], int, int]:
+    """
+    Iterative Deepening DFS: run depth-limited search with limit 1, 2, ... and stop
+    at the first limit that reaches the goal, so the route has the fewest hops.
+    The smallest depth of every node is kept between the iterations. Stops early
+    when an iteration was not cut off by its limit, the goal is unreachable then.
+    `metrics`, if given, receives the counters of the search and of every iteration,
+    `trace` the steps of every iteration. `graph` defaults to the location graph.
+    With `max_cost` routes longer than it are pruned in every iteration, like
+    depth_limited it can miss a route that fits the budget.
+    """
+    start = start if start is not None else GlobalState.start_location
+    goal = goal if goal is not None else GlobalState.destination_location
+
+    graph = graph if graph is not None else GlobalState.compiled_graph
+    start_id = graph.id_of(start)
+    goal_id = graph.id_of(goal)
+    if start_id is None or goal_id is None:
+        return [], 0, 0
 
-        if simpul_saat_ini == goal:
-            return jalur, biaya, len(semua_jalur)
+    max_limit = max_limit or graph.num_nodes
+    min_depth = {}
+    total_expanded = 0
 
-        if simpul_saat_ini not in dikunjungi:
-            dikunjungi.add(simpul_saat_ini)
+    if trace is not None:
+        trace.emit("begin", start_id, goal_id)
 
-            for item in GlobalState.malang_graph:
-                if item["node"] == simpul_saat_ini:
-                    for tetangga in item["branch"]:
-                        if tetangga["node"] not in dikunjungi:
-                            biaya_tepi = tetangga["distance"]
-                            tumpukan.append((tetangga["node"], jalur + [tetangga["node"]], biaya + biaya_tepi))
+    for limit in range(1, max_limit + 1):
+        if trace is not None:
+            trace.emit("limit", limit)
+        iteration_metrics = SearchMetrics()
+        jalur, biaya, _, terpotong = depth_limited(graph, start_id, goal_id, limit, min_depth, iteration_metrics, trace, max_cost)
+        total_expanded += iteration_metrics.expanded
+        if metrics is not None:
+            metrics.record(iteration_metrics.expanded, iteration_metrics.generated,
+                           iteration_metrics.duplicates, iteration_metrics.peak_frontier)
+            metrics.iterations.append({
+                "limit": limit,
+                "expanded": iteration_metrics.expanded,
+                "generated": iteration_metrics.generated,
+                "peak_frontier": iteration_metrics.peak_frontier,
+                "found": jalur is not None,
+            })
 
-    return [], 0, len(semua_jalur)
+        if jalur is not None:
+            return graph.to_names(jalur), biaya, total_expanded
+        if not terpotong:
+            break
 
+    if trace is not None:
+        trace.emit("fail")
+    return [], 0, total_expanded
 
-def search_multigoal(limit: int) -> list[tuple[list[str], float, int]]:
+
+def search_multigoal(limit: int = None, iterative: bool = False, metrics: SearchMetrics = None,
+                     trace: SearchTrace = None, max_cost: float = None) -> list[tuple[list[str], float, int]]:
     """
-    Run multi-destination search using depth-first search or depth-limited search.
+    Run multi-destination search using depth-limited search, or iterative deepening.
+    `metrics`, if given, receives the counters of every destination and their totals,
+    `trace` the steps of every destination. `max_cost` is the budget of the whole
+    route, every leg gets what the previous legs left and the search stops at the
+    first leg that does not fit.
     """
     results = []  # List to store results for each goal
     total_expanded_nodes = 0
 
-    if not GlobalState.malang_graph:
+    if not GlobalState.compiled_graph:
         console.print("[red]Data graf tidak ditemukan di GlobalState![/red]")
         return results
 
@@ -64,19 +197,24 @@ def search_multigoal(limit: int) -> list[tuple[list[str], float, int]]:
     current_start = start
 
     for goal in GlobalState.destination_location:
-        if GlobalState.show_process:
-            console.print(f"\n[bold cyan]Searching for goal: {goal}[/bold cyan] from [green]{current_start}[/green]")
-
-        # If depth limit is set, use it in search
-        jalur, biaya, expanded_nodes = search(current_start, goal, limit)
+        # If depth limit is set, use it in search, iterative deepening finds it by itself
+        with measure_goal(metrics, goal) as leg_metrics:
+            if iterative:
+                jalur, biaya, expanded_nodes = search_iterative(current_start, goal, metrics=leg_metrics, trace=trace, max_cost=max_cost)
+            else:
+                jalur, biaya, expanded_nodes = search(current_start, goal, limit, leg_metrics, trace, max_cost=max_cost)
         
         if jalur:
             results.append((jalur, biaya, expanded_nodes))
             total_expanded_nodes += expanded_nodes
             current_start = goal  # Set current goal as new start
+            if max_cost is not None:
+                max_cost -= biaya
         else:
             console.print(f"[red]Tidak ada jalur dari {current_start} ke {goal}![/red]")
             results.append(([], 0, expanded_nodes))
+            if max_cost is not None:
+                break  # The remaining budget is unknown without this leg
 
     return results
 
@@ -91,20 +229,26 @@ def run_dls() -> None:
     ).ask()
     max_depth = int(max_depth)
     
-    start_time = time.time()
+    metrics = SearchMetrics("DLS")
+    # The steps are recorded during the search and illustrated afterwards
+    trace = SearchTrace(GlobalState.compiled_graph.name_of, "DLS") if GlobalState.show_process else None
 
     # Determine if it's a single goal or multi-goal search
     if GlobalState.is_multi:
-        result = search_multigoal(limit=max_depth)
+        result = cached_search(metrics, lambda: search_multigoal(limit=max_depth, metrics=metrics, trace=trace,
+                                                                 max_cost=GlobalState.cost_budget), max_depth)
     else:
         # Use depth-limited search if depth limit is set
-        result = search(limit=max_depth)
+        result = cached_search(metrics, lambda: search(limit=max_depth, metrics=metrics, trace=trace,
+                                                       max_cost=GlobalState.cost_budget), max_depth)
 
-    end_time = time.time()
-    time_computation = end_time - start_time
+    time_computation = metrics.wall_time
+
+    if trace is not None:
+        replay(trace, GlobalState.replay_speed)
 
     # Show results and calculate time
-    show_result("DLS", result, time_computation)
+    show_result("DLS", result, time_computation, metrics)
 
     if GlobalState.is_multi:
         sum_distance = sum(r[1] for r in result)
@@ -119,3 +263,43 @@ def run_dls() -> None:
 
     if questionary.confirm("Apakah Anda ingin melihat visualisasi rute pada peta?").ask():
         visualize_route(result[0])
+
+
+def run_iddfs() -> None:
+    """
+    Execute the Iterative Deepening DFS (IDDFS) algorithm.
+    """
+    metrics = SearchMetrics("IDDFS")
+    # The steps are recorded during the search and illustrated afterwards
+    trace = SearchTrace(GlobalState.compiled_graph.name_of, "IDDFS") if GlobalState.show_process else None
+
+    if GlobalState.is_multi:
+        result = cached_search(metrics, lambda: search_multigoal(iterative=True, metrics=metrics, trace=trace,
+                                                                 max_cost=GlobalState.cost_budget))
+    else:
+        result = cached_search(metrics, lambda: search_iterative(metrics=metrics, trace=trace, max_cost=GlobalState.cost_budget))
+
+    time_computation = metrics.wall_time
+
+    if trace is not None:
+        replay(trace, GlobalState.replay_speed)
+
+    # Nothing to show when the result came from the cache
+    for iteration in metrics.iterations:
+        console.print(f"[cyan]Depth limit {iteration['limit']}: {iteration['expanded']} nodes expanded[/cyan]")
+
+    show_result("IDDFS", result, time_computation, metrics)
+
+    if GlobalState.is_multi:
+        sum_distance = sum(r[1] for r in result)
+    else:
+        _, sum_distance, _ = result
+
+    estimated_time = sum_distance / GlobalState.avg_speed
+
+    if estimated_time > GlobalState.max_operating_time:
+        console.print(f"[bold red]WARNING!: This route takes {estimated_time:.2f} minutes, "
+                      f"melebihi batas waktu operasional {GlobalState.max_operating_time} menit![/bold red]")
+
+    if questionary.confirm("Apakah Anda ingin melihat visualisasi rute pada peta?").ask():
+        visualize_route(result[0])
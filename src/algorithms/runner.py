@@ -0,0 +1,137 @@
+"""
+Non-interactive entry point to the search algorithms.
+
+Runs a search for an explicit start and destination(s) without any prompt,
+illustration or map, so it can be used by the batch runner and other tools.
+
+In road mode the searches run on the OSM road network instead of the location
+graph. The locations are snapped to their road node (`node_id` in
+malang_locations.json) and the routes are lists of OSM node ids.
+"""
+
+from algorithms import dfs, dls
+from algorithms.bfs import BreadthFirstSearch
+from algorithms.ucs import UniformCostSearch
+from helpers.graph_helper import CompiledGraph
+from helpers.metrics_helper import SearchMetrics, measure
+from helpers.road_tile_helper import TiledGraph
+from helpers.trace_helper import SearchTrace
+from store.states import GlobalState
+
+ALGORITHMS = ("BFS", "DFS", "UCS", "DLS", "BIBFS", "BIUCS", "IDDFS")
+
+
+def road_node_of(location: str) -> int | None:
+    """OSM node id of a location name, None if the location is unknown or not on the road network."""
+    for loc in GlobalState.location_nodes or []:
+        if loc["name"] == location:
+            return loc["node_id"]
+    return None
+
+
+def road_graph() -> CompiledGraph | TiledGraph:
+    """
+    The road network compiled for the search engines, built once and reused.
+    With road tiles the engines read the tiles their search reaches.
+    """
+    if GlobalState.road_tiles is not None:
+        return GlobalState.road_tiles.to_compiled()
+    if GlobalState.road is None:
+        raise ValueError("Road mode needs the road network cache")
+    return GlobalState.road.to_compiled()
+
+
+def search_route(algorithm: str, start: str, goal: str, depth_limit: int = None, metrics: SearchMetrics = None,
+                 trace_memory: bool = False, trace: SearchTrace = None, road: bool = False,
+                 max_cost: float = None) -> tuple[list, float, int]:
+    """
+    Search a single route from start to goal with the given algorithm.
+    Always returns a (path, cost, visited) tuple, the path is empty if no route was found.
+    `metrics`, if given, receives the counters and timings of the search (and its
+    peak memory with `trace_memory`), `trace` the steps of the search (not
+    recorded by the bidirectional searches). Without them the result is served
+    from the result cache when one is loaded, UCS answers from the all-pairs
+    table are not cached.
+    With `road` the route is searched on the road network, the path is then a
+    list of OSM node ids. With `max_cost` routes longer than it are pruned during
+    the search, no route is found if every route is longer. BFS, DFS and DLS keep
+    the first (DLS: shallowest) route to every node, so they can miss a route
+    within the budget that UCS finds. Road routes and pruned searches are not cached.
+    """
+    algorithm = algorithm.upper()
+    graph = GlobalState.compiled_graph
+    if road:
+        graph = road_graph()
+        start, goal = road_node_of(start), road_node_of(goal)
+
+    cache = GlobalState.result_cache
+    # UCS answers from the all-pairs table are no search, they are not cached
+    table_lookup = algorithm == "UCS" and GlobalState.all_pairs is not None and GlobalState.all_pairs.covers(graph)
+    if metrics is not None:
+        with measure(metrics, trace_memory):
+            result = _search(algorithm, start, goal, depth_limit, metrics, trace, graph, max_cost)
+    elif cache is not None and trace is None and not road and max_cost is None and not table_lookup:
+        result = cache.fetch(algorithm, start, goal, depth_limit, lambda: _search(algorithm, start, goal, depth_limit, None, None, graph))
+    else:
+        result = _search(algorithm, start, goal, depth_limit, None, trace, graph, max_cost)
+
+    # UCS returns None when there is no route
+    if result is None:
+        return [], 0, 0
+    return result
+
+
+def _search(algorithm: str, start: str, goal: str, depth_limit: int, metrics: SearchMetrics,
+            trace: SearchTrace, graph: CompiledGraph, max_cost: float = None) -> tuple[list, float, int] | None:
+    if start is None or goal is None:
+        return None
+    if algorithm == "BFS":
+        result = BreadthFirstSearch(graph).search(start, goal, metrics, trace, max_cost)
+    elif algorithm == "DFS":
+        result = dfs.search(start, goal, metrics, trace, graph, max_cost)
+    elif algorithm == "UCS":
+        # The all-pairs table only covers the location graph
+        all_pairs = GlobalState.all_pairs if graph is GlobalState.compiled_graph else None
+        result = UniformCostSearch(graph, all_pairs).search(start, goal, metrics, trace, max_cost)
+    elif algorithm == "BIBFS":
+        result = BreadthFirstSearch(graph).search_bidirectional(start, goal, metrics, max_cost)
+    elif algorithm == "BIUCS":
+        result = UniformCostSearch(graph).search_bidirectional(start, goal, metrics, max_cost)
+    elif algorithm == "DLS":
+        if not depth_limit:
+            raise ValueError("DLS needs a depth limit")
+        result = dls.search(start, goal, depth_limit, metrics, trace, graph, max_cost)
+    elif algorithm == "IDDFS":
+        result = dls.search_iterative(start, goal, depth_limit, metrics, trace, graph, max_cost)
+    else:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    return result
+
+
+def search_multigoal_route(algorithm: str, start: str, destinations: list[str], depth_limit: int = None,
+                           metrics: SearchMetrics = None, trace: SearchTrace = None,
+                           road: bool = False, max_cost: float = None,
+                           trace_memory: bool = False) -> list[tuple[list, float, int]] | None:
+    """
+    Visit every destination in order, the goal of each leg is the start of the next one.
+    Returns None if one of the destinations can not be reached.
+    `metrics`, if given, receives the metrics of every leg and their totals (with
+    the peak memory with `trace_memory`), `trace` the steps of every leg.
+    With `road` every leg is searched on the road network. `max_cost` is the
+    budget of the whole route, every leg gets what the previous legs left.
+    """
+    result = []
+    for destination in destinations:
+        leg_metrics = SearchMetrics(algorithm.upper(), destination) if metrics is not None else None
+        leg = search_route(algorithm, start, destination, depth_limit, leg_metrics, trace_memory, trace, road, max_cost)
+        if metrics is not None:
+            metrics.add_goal(leg_metrics)
+            metrics.wall_time += leg_metrics.wall_time
+            metrics.cpu_time += leg_metrics.cpu_time
+        if not leg[0]:
+            return None
+        result.append(leg)
+        start = destination
+        if max_cost is not None:
+            max_cost -= leg[1]
+    return result
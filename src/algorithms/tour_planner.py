@@ -0,0 +1,177 @@
+"""
+Planner for the visiting order of multi-goal routes.
+
+The route always starts at the start location and ends at the last destination
+(no return trip). Up to HELD_KARP_MAX_STOPS destinations the order is solved
+exactly with Held-Karp dynamic programming, beyond that a nearest-neighbor tour
+is improved with 2-opt and Or-opt moves.
+"""
+
+import numpy as np
+
+from helpers.distance_helper import dijkstra_to_targets
+from helpers.graph_helper import CompiledGraph
+from store.states import GlobalState
+
+HELD_KARP_MAX_STOPS = 15
+
+
+def pairwise_distances(graph: CompiledGraph, stops: list[int]) -> np.ndarray:
+    """
+    Shortest distance between every pair of stops on the location graph,
+    np.inf where there is no route.
+    """
+    distances = np.full((len(stops), len(stops)), np.inf)
+    position = {stop: i for i, stop in enumerate(stops)}
+
+    for i, stop in enumerate(stops):
+        for target, distance in dijkstra_to_targets(graph, stop, set(stops)).items():
+            distances[i, position[target]] = distance
+    return distances
+
+
+def path_cost(order: list[int], distances: np.ndarray) -> float:
+    """Length of an open path that starts at stop 0 and visits `order`."""
+    cost = 0.0
+    previous = 0
+    for stop in order:
+        cost += distances[previous, stop]
+        previous = stop
+    return cost
+
+
+def held_karp(distances: np.ndarray) -> list[int]:
+    """
+    Exact shortest open path from stop 0 through all other stops.
+
+    dp[mask, j] is the shortest path from stop 0 that visits the destinations in
+    `mask` and ends at destination j. Masks are processed per number of set bits,
+    every layer is computed with NumPy over all its masks at once. The input
+    order is returned when no path reaches all destinations.
+    """
+    n = len(distances) - 1
+    if n <= 1:
+        return list(range(1, n + 1))
+
+    # Distances between the destinations only, destination j is stop j + 1
+    between = distances[1:, 1:]
+    size = 1 << n
+    dp = np.full((size, n), np.inf)
+    parent = np.full((size, n), -1, dtype=np.int8)
+    for j in range(n):
+        dp[1 << j, j] = distances[0, j + 1]
+
+    masks = np.arange(size)
+    popcount = np.zeros(size, dtype=np.int64)
+    for bit in range(n):
+        popcount += (masks >> bit) & 1
+
+    for layer in range(2, n + 1):
+        layer_masks = masks[popcount == layer]
+        for j in range(n):
+            with_j = layer_masks[(layer_masks >> j) & 1 == 1]
+            previous = with_j ^ (1 << j)
+            # candidates[m, k] = dp[previous[m], k] + between[k, j], inf when k is not in previous[m]
+            candidates = dp[previous] + between[:, j]
+            best = np.argmin(candidates, axis=1)
+            dp[with_j, j] = candidates[np.arange(len(with_j)), best]
+            parent[with_j, j] = best
+
+    # Without a finite path the parents of the full mask are meaningless
+    mask = size - 1
+    if not np.isfinite(dp[mask].min()):
+        return list(range(1, n + 1))
+
+    # Walk back from the best last destination
+    last = int(np.argmin(dp[mask]))
+    order = []
+    for _ in range(n):
+        order.append(last + 1)
+        previous_last = int(parent[mask, last])
+        mask ^= 1 << last
+        last = previous_last
+    order.reverse()
+    return order
+
+
+def nearest_neighbor(distances: np.ndarray) -> list[int]:
+    """Greedy open path: always go to the closest destination not visited yet."""
+    remaining = set(range(1, len(distances)))
+    order = []
+    current = 0
+    while remaining:
+        current = min(remaining, key=lambda stop: distances[current, stop])
+        order.append(current)
+        remaining.discard(current)
+    return order
+
+
+def two_opt(order: list[int], distances: np.ndarray) -> list[int]:
+    """
+    Reverse segments of the path while that makes it shorter. The whole path is
+    re-evaluated since distances on a directed graph are not symmetric.
+    """
+    best_cost = path_cost(order, distances)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            for k in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:k + 1][::-1] + order[k + 1:]
+                cost = path_cost(candidate, distances)
+                if cost < best_cost - 1e-9:
+                    order, best_cost, improved = candidate, cost, True
+    return order
+
+
+def or_opt(order: list[int], distances: np.ndarray) -> list[int]:
+    """
+    Move segments of 1 to 3 consecutive destinations to another place in the
+    path while that makes it shorter.
+    """
+    best_cost = path_cost(order, distances)
+    improved = True
+    while improved:
+        improved = False
+        for length in (1, 2, 3):
+            for i in range(len(order) - length + 1):
+                segment = order[i:i + length]
+                rest = order[:i] + order[i + length:]
+                for position in range(len(rest) + 1):
+                    if position == i:
+                        continue
+                    candidate = rest[:position] + segment + rest[position:]
+                    cost = path_cost(candidate, distances)
+                    if cost < best_cost - 1e-9:
+                        order, best_cost, improved = candidate, cost, True
+                        break
+                if improved:
+                    break
+            if improved:
+                break
+    return order
+
+
+def plan_visit_order(start: str, destinations: list[str], graph: CompiledGraph = None) -> tuple[list[str], float]:
+    """
+    Order the destinations so the total distance from start through all of them is
+    as short as possible. Returns the new order and its total distance, the input
+    order is kept when some destinations can not be reached from each other.
+    """
+    graph = graph or GlobalState.compiled_graph
+    stops = [graph.id_of(start)] + [graph.id_of(destination) for destination in destinations]
+    if None in stops:
+        return list(destinations), float("inf")
+
+    distances = pairwise_distances(graph, stops)
+
+    if len(destinations) <= HELD_KARP_MAX_STOPS:
+        order = held_karp(distances)
+    else:
+        order = or_opt(two_opt(nearest_neighbor(distances), distances), distances)
+
+    cost = path_cost(order, distances)
+    if not np.isfinite(cost):
+        return list(destinations), float("inf")
+
+    return [destinations[stop - 1] for stop in order], float(cost)
@@ -1,142 +1,241 @@
-import time
 import heapq
 from rich.console import Console
-from rich.panel import Panel
 import questionary
 
-from helpers.result_helper import show_result, visualize_route
+from helpers.all_pairs_helper import AllPairs
+from helpers.graph_helper import CompiledGraph, build_path
+from helpers.metrics_helper import SearchMetrics, measure_goal
+from helpers.result_helper import cached_search, show_result, visualize_route
+from helpers.trace_helper import SearchTrace, replay
 from store.states import GlobalState
 
 console = Console()
 
 class UniformCostSearch:
-    def __init__(self, graph: dict):
+    def __init__(self, graph: CompiledGraph, all_pairs: AllPairs = None):
         """
-        Initialize the Uniform Cost Search with a graph.
+        Initialize the Uniform Cost Search with a compiled graph. When a precomputed
+        all-pairs table of the same graph is given, routes are looked up instead of searched.
         """
         self.graph = graph
+        self.all_pairs = all_pairs
     
-    def search(self, start: str = None, goal: str = None) -> tuple[list[str], int, list]:
+    def search(self, start: str = None, goal: str = None, metrics: SearchMetrics = None,
+               trace: SearchTrace = None, max_cost: float = None) -> tuple[list[str], int, list]:
         """
         Search route from start to goal using Uniform Cost Search algorithm.
+        `metrics`, if given, receives the counters of the search and `trace` its steps.
+        With `max_cost` nothing more expensive is pushed, so the search gives up as
+        soon as every route within the budget is explored.
         """
         start = start if start is not None else GlobalState.start_location
         goal = goal if goal is not None else GlobalState.destination_location
         
-        # Transform graph into an adjacency dict for easier processing
-        graph_dict = {}
-        for node_data in self.graph:
-            node_name = node_data["node"]
-            neighbors = []
-            for branch in node_data.get("branch", []):
-                neighbors.append((branch["node"], branch["distance"]))
-            graph_dict[node_name] = neighbors
-        
-        # Format: (cost_so_far, location, path_so_far)
-        open_list = [(0, start, [start])]
+        graph = self.graph
+        start_id = graph.id_of(start)
+        goal_id = graph.id_of(goal)
+        
+        if start_id is None or goal_id is None:
+            return None
+        
+        # Table lookup, nothing is expanded
+        if self.all_pairs is not None and self.all_pairs.covers(graph) and trace is None:
+            found = self.all_pairs.lookup(start_id, goal_id)
+            if found is None or (max_cost is not None and found[1] > max_cost):
+                return None
+            path, cost = found
+            return graph.to_names(path), cost, 0
+        
+        # Format: (cost_so_far, location id), the route is kept in the predecessor map
+        open_list = [(0, start_id)]
         heapq.heapify(open_list)
         
-        best_cost = {start: 0}
+        best_cost = {start_id: 0}
+        parents = {start_id: None}
         visited = 0
-        step = 1
+        generated = 0
+        duplicates = 0
+        peak_frontier = 0
         
-        if GlobalState.show_process:
-            console.print(Panel(f"[bold cyan]ILUSTRASI PROSES PENCARIAN UNIFORM COST SEARCH[/bold cyan]"))
-            console.print(f"Mencari rute dari [green]{start}[/green] ke [green]{goal}[/green]...")
+        if trace is not None:
+            trace.emit("begin", start_id, goal_id)
         
         while open_list:
+            if len(open_list) > peak_frontier:
+                peak_frontier = len(open_list)
+            
             # Get node with lowest cost
-            current_cost, current, path = heapq.heappop(open_list)
+            current_cost, current = heapq.heappop(open_list)
             
-            # Add to visited list (for tracking)
-            # if current not in visited:
+            # Stale entry, the node was pushed again with a lower cost
+            if current_cost > best_cost[current]:
+                continue
             visited += 1
             
-            if GlobalState.show_process:
-                console.print(f"\n[bold]Langkah {step}:[/bold]")
-                console.print(f"  Mengunjungi lokasi: [cyan]{current}[/cyan]")
-                console.print(f"  Biaya sejauh ini: [yellow]{current_cost} (meter)[/yellow]")
-                console.print(f"  Rute sejauh ini: [green]{' -> '.join(path)}[/green]")
-                step += 1
-                time.sleep(0.3)
+            if trace is not None:
+                trace.emit("expand", current, parents[current], current_cost)
             
             # If goal reached, return path and cost
-            if current == goal:
-                if GlobalState.show_process:
-                    console.print(Panel("[bold green]TUJUAN TERCAPAI![/bold green] Lokasi tujuan telah ditemukan."))
-                return path, current_cost, visited
+            if current == goal_id:
+                if trace is not None:
+                    trace.emit("goal", current, current_cost)
+                if metrics is not None:
+                    metrics.record(visited, generated, duplicates, peak_frontier)
+                return graph.to_names(build_path(parents, current)), current_cost, visited
             
             # Check all neighbors of current node
-            if current in graph_dict:
-                neighbors_info = []
+            for neighbor, step_cost in graph.neighbors(current):
+                new_cost = current_cost + step_cost
+                if max_cost is not None and new_cost > max_cost:
+                    continue
                 
-                for neighbor, step_cost in graph_dict[current]:
-                    new_cost = current_cost + step_cost
-                    
-                    if neighbor not in best_cost or new_cost < best_cost[neighbor]:
-                        best_cost[neighbor] = new_cost
-                        new_path = path + [neighbor]
-                        heapq.heappush(open_list, (new_cost, neighbor, new_path))
-                        neighbors_info.append((neighbor, step_cost, new_cost))
+                if neighbor not in best_cost or new_cost < best_cost[neighbor]:
+                    if neighbor in best_cost:
+                        duplicates += 1
+                    best_cost[neighbor] = new_cost
+                    parents[neighbor] = current
+                    heapq.heappush(open_list, (new_cost, neighbor))
+                    generated += 1
+                    if trace is not None:
+                        trace.emit("push", neighbor, step_cost, new_cost)
+        
+        if trace is not None:
+            trace.emit("fail")
+        if metrics is not None:
+            metrics.record(visited, generated, duplicates, peak_frontier)
+        return None
+
+    def search_bidirectional(self, start: str = None, goal: str = None, metrics: SearchMetrics = None,
+                             max_cost: float = None) -> tuple[list[str], int, int] | None:
+        """
+        Search route from start to goal with Bidirectional Uniform Cost Search.
+        One frontier grows from the start and one from the goal over the reversed
+        graph, the side with the cheaper top entry is expanded. Every edge that
+        reaches the other side is a candidate route, the search stops once the two
+        top costs together can no longer beat the best candidate.
+        `metrics`, if given, receives the counters of the search.
+        With `max_cost` only candidates within it are kept.
+        """
+        start = start if start is not None else GlobalState.start_location
+        goal = goal if goal is not None else GlobalState.destination_location
+        
+        graph = self.graph
+        start_id = graph.id_of(start)
+        goal_id = graph.id_of(goal)
+        
+        if start_id is None or goal_id is None:
+            return None
+        
+        # Per side: best cost, predecessor map, settled nodes and open list
+        forward = {"cost": {start_id: 0}, "parents": {start_id: None}, "settled": set(), "open": [(0, start_id)], "graph": graph}
+        backward = {"cost": {goal_id: 0}, "parents": {goal_id: None}, "settled": set(), "open": [(0, goal_id)], "graph": graph.reverse()}
+        
+        best_cost = 0 if start_id == goal_id else float("inf")
+        if max_cost is not None and start_id != goal_id:
+            # Only routes within the budget can become the best candidate, the
+            # slack absorbs rounding of the two halves of a route that exactly uses it
+            best_cost = max_cost + 1e-9
+        meeting = None  # (last node from the start side, first node of the goal side)
+        visited = 0
+        generated = 0
+        duplicates = 0
+        peak_frontier = 0
+        
+        while forward["open"] and backward["open"]:
+            peak_frontier = max(peak_frontier, len(forward["open"]) + len(backward["open"]))
+            if forward["open"][0][0] + backward["open"][0][0] >= best_cost:
+                break
+            
+            side, other = (forward, backward) if forward["open"][0][0] <= backward["open"][0][0] else (backward, forward)
+            current_cost, current = heapq.heappop(side["open"])
+            if current in side["settled"]:
+                continue  # Stale entry
+            side["settled"].add(current)
+            visited += 1
+            
+            for neighbor, step_cost in side["graph"].neighbors(current):
+                new_cost = current_cost + step_cost
                 
-                if GlobalState.show_process and neighbors_info:
-                    console.print("  Memeriksa tetangga:")
-                    neighbors_info.sort(key=lambda x: x[2])
-                    for neighbor, step_cost, new_cost in neighbors_info:
-                        console.print(f"     - [blue]{neighbor}[/blue]: Jarak = [yellow]{step_cost}[/yellow] meter, Total biaya = [yellow]{new_cost}[/yellow] meter")
-                    
-                    if neighbors_info:
-                        next_location = neighbors_info[0][0]
-                        console.print(f"  Tetangga dengan biaya terendah: [bold cyan]{next_location}[/bold cyan] ([yellow]{neighbors_info[0][2]}[/yellow] meter)")
+                if neighbor not in side["cost"] or new_cost < side["cost"][neighbor]:
+                    if neighbor in side["cost"]:
+                        duplicates += 1
+                    generated += 1
+                    side["cost"][neighbor] = new_cost
+                    side["parents"][neighbor] = current
+                    heapq.heappush(side["open"], (new_cost, neighbor))
                 
-                if GlobalState.show_process and not neighbors_info:
-                    console.print(f"  [red]Tidak ada tetangga yang belum dikunjungi dari lokasi {current}.[/red]")
+                if neighbor in other["cost"] and new_cost + other["cost"][neighbor] < best_cost:
+                    best_cost = new_cost + other["cost"][neighbor]
+                    meeting = (current, neighbor) if side is forward else (neighbor, current)
         
-        if GlobalState.show_process:
-            console.print(Panel("[bold red]TIDAK ADA RUTE![/bold red] Tidak dapat menemukan rute ke tujuan."))
-        return None
+        if metrics is not None:
+            metrics.record(visited, generated, duplicates, peak_frontier)
+        
+        if start_id != goal_id and meeting is None:
+            return None  # No candidate within the budget
+        
+        if start_id == goal_id:
+            path = [start_id]
+        else:
+            near, far = meeting
+            path = build_path(forward["parents"], near) + build_path(backward["parents"], far)[::-1]
+        return graph.to_names(path), best_cost, visited
 
-    def search_multigoal(self) -> list[tuple[list[str], float, int]] | None:
+    def search_multigoal(self, bidirectional: bool = False, metrics: SearchMetrics = None,
+                         trace: SearchTrace = None, max_cost: float = None) -> list[tuple[list[str], float, int]] | None:
             """
             Run multigoal/destination search.
+            `metrics`, if given, receives the counters of every destination and their totals,
+            `trace` the steps of every destination (not recorded for the bidirectional search).
+            `max_cost` is the budget of the whole route, every leg gets what the previous legs left.
             """
             result = []
             start = GlobalState.start_location
-            iteration = 0
 
             while len(GlobalState.destination_location) > 0:
-                iteration += 1
                 destination = GlobalState.destination_location.pop(0)
 
-                if GlobalState.show_process:
-                    console.print(f"\n[bold cyan]Searching for destination number-{iteration}: {destination}[/bold cyan]")
-                    console.print(f"From: [green]{start}[/green]")
-
-                search_result = self.search(start, destination)
+                with measure_goal(metrics, destination) as leg_metrics:
+                    if bidirectional:
+                        search_result = self.search_bidirectional(start, destination, leg_metrics, max_cost)
+                    else:
+                        search_result = self.search(start, destination, leg_metrics, trace, max_cost)
                 if search_result is None:
-                    if GlobalState.show_process:
-                        console.print(Panel(f"[bold red]Gagal menemukan rute ke tujuan: {destination}[/bold red]"))
                     return None  # Langsung hentikan jika ada yang tidak bisa ditemukan
 
                 result.append(search_result)
                 start = destination  # Next start = previous goal
+                if max_cost is not None:
+                    max_cost -= search_result[1]
 
             return result
 
-def run_ucs():
-    ucs = UniformCostSearch(GlobalState.malang_graph)
+def run_ucs(bidirectional: bool = False):
+    """
+    Execute the Uniform Cost Search (UCS) algorithm, or its bidirectional variant.
+    """
+    ucs = UniformCostSearch(GlobalState.compiled_graph, GlobalState.all_pairs)
+    metrics = SearchMetrics("BIUCS" if bidirectional else "UCS")
+    # The steps are recorded during the search and illustrated afterwards
+    trace = SearchTrace(GlobalState.compiled_graph.name_of, "UCS") if GlobalState.show_process and not bidirectional else None
         
-    start_time = time.time()
-    
-    if GlobalState.is_multi:
-        result = ucs.search_multigoal()
-    else:
-        result = ucs.search()
+    def compute():
+        if GlobalState.is_multi:
+            return ucs.search_multigoal(bidirectional, metrics, trace, GlobalState.cost_budget)
+        if bidirectional:
+            return ucs.search_bidirectional(metrics=metrics, max_cost=GlobalState.cost_budget)
+        return ucs.search(metrics=metrics, trace=trace, max_cost=GlobalState.cost_budget)
         
-    end_time = time.time()
-    time_computation = end_time - start_time
+    result = cached_search(metrics, compute)
+    time_computation = metrics.wall_time
+
+    if trace is not None:
+        replay(trace, GlobalState.replay_speed)
 
-    show_result("UCS", result, time_computation)
+    show_result("Bidirectional UCS" if bidirectional else "UCS", result, time_computation, metrics)
+    
+    if not result:
+        return
     
     if GlobalState.is_multi:
         sum_distance = 0
@@ -0,0 +1,227 @@
+"""
+Headless batch runner for routing jobs.
+
+Reads jobs from a CSV or JSONL file, loads the graph once, runs every job and
+streams one JSON result per line. Each job has the fields:
+start, destinations, algorithm, depth_limit, avg_speed (km/h), max_operating_time (minutes)
+and optionally optimize_order to reorder the destinations for the shortest total distance
+and road to search on the OSM road network instead of the location graph
+and prune to prune routes that can not be driven within max_operating_time during the search.
+
+In CSV files multiple destinations are separated with "|".
+
+Usage:
+    python src/batch.py jobs.csv -o results.jsonl --map routes.geojson
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+from pathlib import Path
+import sys
+import time
+
+from algorithms.runner import ALGORITHMS, road_graph, search_multigoal_route, search_route
+from algorithms.tour_planner import plan_visit_order
+from config.config import MAP_SIMPLIFY_ZOOM
+from helpers.all_pairs_helper import load_all_pairs
+from helpers.dataset_helper import load_malang_osm_data
+from helpers.map_helper import MAP_FORMATS, write_routes
+from helpers.metrics_helper import SearchMetrics
+from helpers.trace_helper import SearchTrace
+from store.states import GlobalState
+
+
+def read_jobs(filepath: Path):
+    """
+    Yield the jobs of a CSV or JSONL file as dicts.
+    """
+    with open(filepath, "r", newline="") as f:
+        if filepath.suffix.lower() == ".csv":
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def parse_flag(value) -> bool:
+    """Boolean job field, CSV files give it as text."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+def parse_job(job: dict) -> dict:
+    """
+    Normalize a raw job into typed fields.
+    """
+    destinations = job["destinations"]
+    if isinstance(destinations, str):
+        destinations = [d.strip() for d in destinations.split("|") if d.strip()]
+
+    algorithm = str(job.get("algorithm") or "UCS").upper()
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+
+    depth_limit = job.get("depth_limit")
+    return {
+        "start": job["start"],
+        "destinations": destinations,
+        "algorithm": algorithm,
+        "depth_limit": int(depth_limit) if depth_limit not in (None, "") else None,
+        "avg_speed": float(job.get("avg_speed") or 40),
+        "max_operating_time": float(job.get("max_operating_time") or 120),
+        "optimize_order": parse_flag(job.get("optimize_order")),
+        "road": parse_flag(job.get("road")),
+        "prune": parse_flag(job.get("prune")),
+    }
+
+
+def run_job(job: dict, metrics: SearchMetrics = None, trace: SearchTrace = None) -> dict:
+    """
+    Run a single job and build its result record. `metrics`, if given, receives
+    the search metrics, they are also added to the record, and `trace` records
+    the search steps, the result cache is not used then.
+    """
+    # avg_speed is given in km/h, convert to m/minute like the interactive menu
+    speed = job["avg_speed"] * 1000 / 60
+    max_cost = job["max_operating_time"] * speed if job["prune"] else None
+    start_time = time.perf_counter()
+    if job["optimize_order"] and len(job["destinations"]) > 1:
+        job["destinations"], _ = plan_visit_order(job["start"], job["destinations"])
+    
+    if len(job["destinations"]) == 1:
+        legs = [search_route(job["algorithm"], job["start"], job["destinations"][0], job["depth_limit"], metrics,
+                             trace=trace, road=job["road"], max_cost=max_cost)]
+        if not legs[0][0]:
+            legs = None
+    else:
+        legs = search_multigoal_route(job["algorithm"], job["start"], job["destinations"], job["depth_limit"], metrics,
+                                      trace, job["road"], max_cost)
+    time_computation = time.perf_counter() - start_time
+
+    record = {
+        "start": job["start"],
+        "destinations": job["destinations"],
+        "algorithm": job["algorithm"],
+        "road": job["road"],
+        "found": legs is not None,
+        "time_computation": time_computation,
+    }
+    if metrics is not None:
+        record["metrics"] = metrics.to_dict()
+
+    if legs is None:
+        if max_cost is not None:
+            record["infeasible"] = True
+        return record
+
+    distance = sum(leg[1] for leg in legs)
+    estimated_time = distance / speed
+
+    record.update({
+        "routes": [leg[0] for leg in legs],
+        "distance": distance,
+        "estimated_time": estimated_time,
+        "exceeds_operating_time": estimated_time > job["max_operating_time"],
+        "visited": sum(leg[2] for leg in legs),
+    })
+    return record
+
+
+def map_format_of(filepath: Path, map_format: str = None) -> str:
+    """Map format given on the command line, otherwise by the file extension."""
+    if map_format:
+        return map_format
+    suffix = filepath.suffix.lower()
+    if suffix in (".html", ".htm"):
+        return "html"
+    if suffix in (".geojson", ".json"):
+        return "geojson"
+    return "polyline"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run routing jobs from a CSV/JSONL file without a terminal.")
+    parser.add_argument("jobs", type=Path, help="CSV or JSONL file with the routing jobs")
+    parser.add_argument("-o", "--output", type=Path, help="JSONL output file (default: stdout)")
+    parser.add_argument("--all-pairs", action="store_true", help="Answer UCS jobs from the precomputed all-pairs table")
+    parser.add_argument("--no-cache", action="store_true", help="Always search, do not use the result cache")
+    parser.add_argument("--metrics", action="store_true", help="Add the search metrics to every result (always searches)")
+    parser.add_argument("--metrics-dir", type=Path, help="Also save the search metrics of every job to this directory, per goal and total")
+    parser.add_argument("--metrics-format", choices=("csv", "json"), default="csv", help="File format of --metrics-dir")
+    parser.add_argument("--road", action="store_true", help="Search every job on the OSM road network")
+    parser.add_argument("--prune", action="store_true", help="Prune routes longer than the operating time allows in every job")
+    parser.add_argument("--trace-dir", type=Path, help="Save the search steps of every job to this directory, see replay.py")
+    parser.add_argument("--map", type=Path, help="Write the found routes to one map file (.geojson, .html or encoded polylines)")
+    parser.add_argument("--map-format", choices=MAP_FORMATS, help="Format of --map (default: by file extension)")
+    parser.add_argument("--map-zoom", type=float, default=MAP_SIMPLIFY_ZOOM, help="Zoom level the route lines are simplified for")
+    args = parser.parse_args()
+
+    # Keep stdout clean for the JSONL stream
+    with contextlib.redirect_stdout(sys.stderr):
+        load_malang_osm_data()
+
+    if GlobalState.compiled_graph is None:
+        sys.exit("Location graph could not be loaded")
+
+    if args.no_cache:
+        GlobalState.result_cache = None
+
+    if args.all_pairs:
+        with contextlib.redirect_stdout(sys.stderr):
+            GlobalState.all_pairs = load_all_pairs(GlobalState.compiled_graph)
+
+    for directory in (args.trace_dir, args.metrics_dir):
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    records = []
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for line_number, raw_job in enumerate(read_jobs(args.jobs), start=1):
+            try:
+                job = parse_job(raw_job)
+                job["road"] = job["road"] or args.road
+                job["prune"] = job["prune"] or args.prune
+                graph = road_graph() if job["road"] else GlobalState.compiled_graph
+                trace = SearchTrace(graph.name_of, job["algorithm"]) if args.trace_dir else None
+                metrics = SearchMetrics(job["algorithm"]) if args.metrics or args.metrics_dir else None
+                record = run_job(job, metrics, trace)
+                if trace is not None:
+                    trace.save(args.trace_dir / f"job_{line_number}.json")
+                if args.metrics_dir:
+                    metrics_file = args.metrics_dir / f"job_{line_number}.{args.metrics_format}"
+                    if args.metrics_format == "json":
+                        metrics.save_json(metrics_file)
+                    else:
+                        metrics.save_csv(metrics_file)
+            except Exception as e:
+                record = {"found": False, "error": str(e)}
+            record["job"] = line_number
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            if args.map and record["found"]:
+                records.append(record)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if args.map:
+        with contextlib.redirect_stdout(sys.stderr):
+            written = write_routes(records, args.map, map_format_of(args.map, args.map_format), args.map_zoom)
+        print(f"Map: {written} routes written to {args.map}", file=sys.stderr)
+
+    if GlobalState.result_cache is not None:
+        GlobalState.result_cache.save()
+        stats = GlobalState.result_cache.stats()
+        print(f"Result cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
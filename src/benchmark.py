@@ -0,0 +1,201 @@
+"""
+Scaling benchmark of BFS, DFS, UCS and DLS on synthetic graphs.
+
+Generates grid city, random geometric and scale-free graphs of growing size,
+runs every algorithm over the same seeded set of queries and reports wall and
+CPU time, expanded and generated nodes, duplicate pushes, peak frontier size and
+peak memory as CSV and plots.
+
+Usage:
+    python src/benchmark.py --sizes 100,1000,10000 --queries 20
+"""
+
+import argparse
+import csv
+import os
+from pathlib import Path
+import random
+
+from rich.console import Console
+from rich.progress import track
+
+from algorithms.runner import ALGORITHMS, search_route
+from config.config import BENCHMARK_DIR
+from helpers.graph_helper import compile_graph
+from helpers.metrics_helper import SearchMetrics
+from helpers.synthetic_graph_helper import GENERATORS, node_name
+from store.states import GlobalState
+
+console = Console()
+
+FIELDS = [
+    "family", "nodes", "edges", "algorithm", "query", "start", "goal", "depth_limit",
+    "found", "cost", "hops", "wall_time", "cpu_time", "expansions", "generated", "duplicates",
+    "peak_frontier", "peak_memory",
+]
+
+
+def make_queries(num_nodes: int, count: int, seed: int) -> list[tuple[str, str]]:
+    """
+    Seeded list of distinct (start, goal) pairs.
+    """
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        start, goal = rng.randrange(num_nodes), rng.randrange(num_nodes)
+        if start != goal:
+            queries.append((node_name(start), node_name(goal)))
+    return queries
+
+
+def measure(algorithm: str, start: str, goal: str, depth_limit: int | None, with_memory: bool) -> dict:
+    """
+    Run one query and collect its measurements. Memory is traced in a second run
+    so tracemalloc overhead does not end up in the wall time.
+    """
+    metrics = SearchMetrics(algorithm)
+    path, cost, _ = search_route(algorithm, start, goal, depth_limit, metrics)
+
+    peak_memory = None
+    if with_memory:
+        memory_metrics = SearchMetrics(algorithm)
+        search_route(algorithm, start, goal, depth_limit, memory_metrics, trace_memory=True)
+        peak_memory = memory_metrics.peak_memory
+
+    return {
+        "found": bool(path),
+        "cost": cost,
+        "hops": max(len(path) - 1, 0),
+        "wall_time": metrics.wall_time,
+        "cpu_time": metrics.cpu_time,
+        "expansions": metrics.expanded,
+        "generated": metrics.generated,
+        "duplicates": metrics.duplicates,
+        "peak_frontier": metrics.peak_frontier,
+        "peak_memory": peak_memory,
+    }
+
+
+def run_benchmark(families: list[str], sizes: list[int], num_queries: int, seed: int,
+                  depth_limit: int | None, with_memory: bool) -> list[dict]:
+    """
+    Run every algorithm over every generated graph and return one row per query.
+    When no depth limit is given DLS gets the hop count of the BFS route, the
+    smallest limit that can still reach the goal.
+    """
+    rows = []
+    for family in families:
+        for size in sizes:
+            console.print(f"[cyan]Generating {family} graph with {size} nodes...[/cyan]")
+            graph = compile_graph(GENERATORS[family](size, seed=seed))
+            GlobalState.compiled_graph = graph
+
+            queries = make_queries(graph.num_nodes, num_queries, seed)
+            for i, (start, goal) in enumerate(track(queries, description=f"{family} {graph.num_nodes}")):
+                bfs_hops = None
+                for algorithm in ALGORITHMS:
+                    limit = depth_limit
+                    if algorithm == "DLS" and limit is None:
+                        if not bfs_hops:
+                            continue
+                        limit = bfs_hops + 1  # DLS counts the depth in nodes, not edges
+
+                    row = {
+                        "family": family,
+                        "nodes": graph.num_nodes,
+                        "edges": graph.num_edges,
+                        "algorithm": algorithm,
+                        "query": i,
+                        "start": start,
+                        "goal": goal,
+                        "depth_limit": limit if algorithm == "DLS" else None,
+                    }
+                    row.update(measure(algorithm, start, goal, limit, with_memory))
+                    rows.append(row)
+
+                    if algorithm == "BFS" and row["found"]:
+                        bfs_hops = row["hops"]
+    return rows
+
+
+def save_csv(rows: list[dict], filepath: Path) -> None:
+    with open(filepath, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def save_plots(rows: list[dict], output_dir: Path) -> list[Path]:
+    """
+    Plot the median of every metric against the graph size, one figure per graph family.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from statistics import median
+
+    metrics = [("wall_time", "Wall time (s)"), ("expansions", "Expansions"),
+               ("peak_frontier", "Peak frontier"), ("peak_memory", "Peak memory (bytes)")]
+    filepaths = []
+
+    for family in sorted({row["family"] for row in rows}):
+        fig, axes = plt.subplots(2, 2, figsize=(12, 9))
+        for ax, (metric, label) in zip(axes.flat, metrics):
+            for algorithm in ALGORITHMS:
+                points = {}
+                for row in rows:
+                    if row["family"] == family and row["algorithm"] == algorithm and row[metric] is not None:
+                        points.setdefault(row["nodes"], []).append(row[metric])
+                if not points:
+                    continue
+                sizes = sorted(points)
+                ax.plot(sizes, [median(points[size]) for size in sizes], marker="o", label=algorithm)
+            ax.set_xscale("log")
+            ax.set_yscale("symlog")
+            ax.set_xlabel("Nodes")
+            ax.set_ylabel(label)
+            ax.grid(True)
+            ax.legend()
+
+        fig.suptitle(f"Uninformed search scaling on {family} graphs (median per query)")
+        filepath = output_dir / f"benchmark_{family}.png"
+        fig.savefig(filepath, dpi=150, bbox_inches="tight")
+        plt.close(fig)
+        filepaths.append(filepath)
+    return filepaths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the search algorithms on synthetic graphs.")
+    parser.add_argument("--families", default=",".join(GENERATORS), help="Comma separated graph families")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="Comma separated node counts (up to 1000000)")
+    parser.add_argument("--queries", type=int, default=20, help="Number of queries per graph")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--depth-limit", type=int, default=None, help="DLS depth limit (default: BFS hop count)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak memory run")
+    parser.add_argument("--no-plot", action="store_true")
+    parser.add_argument("-o", "--output-dir", type=Path, default=BENCHMARK_DIR)
+    args = parser.parse_args()
+
+    families = [family.strip() for family in args.families.split(",") if family.strip()]
+    unknown = [family for family in families if family not in GENERATORS]
+    if unknown:
+        parser.error(f"Unknown graph family: {', '.join(unknown)}")
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    rows = run_benchmark(families, sizes, args.queries, args.seed, args.depth_limit, not args.no_memory)
+
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    csv_path = args.output_dir / "benchmark_results.csv"
+    save_csv(rows, csv_path)
+    console.print(f"[green]Benchmark results saved to [bold]{csv_path}[/bold][/green]")
+
+    if not args.no_plot:
+        for filepath in save_plots(rows, args.output_dir):
+            console.print(f"[green]Plot saved to [bold]{filepath}[/bold][/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,5 +4,34 @@ from pathlib import Path
 DATA_DIR = Path(__file__).parent.parent.parent / "data"
 IMG_DIR = Path(__file__).parent.parent.parent / "img"
 MAPS_DIR = Path(__file__).parent.parent.parent / "maps"
+BENCHMARK_DIR = Path(__file__).parent.parent.parent / "benchmarks"
+
+# Answer UCS queries from a precomputed all-pairs distance table
+PRECOMPUTE_ALL_PAIRS = False
+
+# Keep the search result cache on disk between runs
+PERSIST_RESULT_CACHE = True
+
+# Trace the peak memory of every search with tracemalloc (slows the search down)
+TRACE_SEARCH_MEMORY = False
+
+# Answer road-level routes (map segments, location graph distances) from a
+# contraction hierarchy, built once per road network (slow) and saved with it
+USE_CONTRACTION_HIERARCHY = False
+
+# Load the road network in square tiles of ROAD_TILE_SIZE degrees, only where a
+# search or map needs them, keeping at most ROAD_TILE_MEMORY_CAP bytes of tiles
+USE_ROAD_TILES = False
+ROAD_TILE_SIZE = 0.02
+ROAD_TILE_MEMORY_CAP = 64 * 1024 * 1024
+
+# Zoom level the route lines on maps are simplified for, at most one pixel off at this zoom
+MAP_SIMPLIFY_ZOOM = 16
+
+# Seconds every algorithm gets in the comparison mode before it is stopped
+COMPARE_TIMEOUT = 30
+
+# Local gazetteer (CSV or JSON with name, latitude, longitude) used instead of Nominatim, e.g. for offline use
+GAZETTEER_FILE = None
 
 JINJA_ENV = Environment(loader=FileSystemLoader(Path(__file__).parent.parent / "templates"))
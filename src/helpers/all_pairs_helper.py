@@ -0,0 +1,143 @@
+"""
+Helper functions for the all-pairs shortest distance table of the location graph.
+
+The table holds the shortest distance and the next hop between every pair of
+locations, so a shortest route query is a lookup plus unrolling the next hops.
+Small graphs use vectorized Floyd-Warshall, large ones one Dijkstra per node.
+The table is stored next to malang_graph.json and rebuilt when that file changes.
+"""
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+from rich.console import Console
+
+from config.config import DATA_DIR
+from helpers.distance_helper import dijkstra_to_targets
+from helpers.graph_helper import CompiledGraph
+
+console = Console()
+
+ALL_PAIRS_FILE = Path(DATA_DIR) / "malang_graph_all_pairs.npz"
+FLOYD_WARSHALL_MAX_NODES = 500
+
+
+class AllPairs:
+    """
+    distances[i, j] is the shortest distance from node i to node j (inf if there is
+    no route) and next_hop[i, j] the node after i on that route (-1 if there is none).
+    """
+
+    def __init__(self, graph: CompiledGraph, distances: np.ndarray, next_hop: np.ndarray):
+        self.graph = graph
+        self.distances = distances
+        self.next_hop = next_hop
+
+    def covers(self, graph: CompiledGraph) -> bool:
+        """Whether the table was built for this graph."""
+        return graph is self.graph
+
+    def lookup(self, start: int, goal: int) -> tuple[list[int], float] | None:
+        """
+        Shortest path and distance between two node ids, None if there is no route.
+        """
+        if self.next_hop[start, goal] < 0 and start != goal:
+            return None
+
+        path = [start]
+        node = start
+        while node != goal:
+            node = int(self.next_hop[node, goal])
+            path.append(node)
+        return path, float(self.distances[start, goal])
+
+
+def adjacency_matrix(graph: CompiledGraph) -> np.ndarray:
+    """Dense matrix of the direct edge distances, inf where there is no edge."""
+    n = graph.num_nodes
+    matrix = np.full((n, n), np.inf)
+    sources = np.repeat(np.arange(n), np.diff(graph.offsets))
+    # Parallel edges keep the shortest distance
+    np.minimum.at(matrix, (sources, graph.targets), graph.weights)
+    np.fill_diagonal(matrix, 0.0)
+    return matrix
+
+
+def floyd_warshall(graph: CompiledGraph) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Floyd-Warshall where every intermediate node k relaxes the whole matrix at once.
+    """
+    distances = adjacency_matrix(graph)
+    n = len(distances)
+    next_hop = np.where(np.isfinite(distances), np.arange(n)[None, :], -1).astype(np.int32)
+    np.fill_diagonal(next_hop, np.arange(n))
+
+    for k in range(n):
+        via_k = distances[:, k, None] + distances[None, k, :]
+        better = via_k < distances
+        distances = np.where(better, via_k, distances)
+        next_hop = np.where(better, next_hop[:, k, None], next_hop)
+
+    return distances, next_hop
+
+
+def repeated_dijkstra(graph: CompiledGraph) -> tuple[np.ndarray, np.ndarray]:
+    """
+    One full Dijkstra per node. The next hop of every node is derived from the
+    shortest path tree in the order the nodes were settled.
+    """
+    n = graph.num_nodes
+    distances = np.full((n, n), np.inf)
+    next_hop = np.full((n, n), -1, dtype=np.int32)
+    everything = set(range(n))
+
+    for source in range(n):
+        parents = {}
+        settled = dijkstra_to_targets(graph, source, everything, parents)
+        first_hop = {source: source}
+        # Dicts keep insertion order, so every parent is seen before its children
+        for node, distance in settled.items():
+            distances[source, node] = distance
+            if node != source:
+                parent = parents[node]
+                first_hop[node] = node if parent == source else first_hop[parent]
+            next_hop[source, node] = first_hop[node]
+
+    return distances, next_hop
+
+
+def graph_file_digest(filepath: Path = Path(DATA_DIR) / "malang_graph.json") -> str:
+    with open(filepath, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def build_all_pairs(graph: CompiledGraph) -> AllPairs:
+    if graph.num_nodes <= FLOYD_WARSHALL_MAX_NODES:
+        distances, next_hop = floyd_warshall(graph)
+    else:
+        distances, next_hop = repeated_dijkstra(graph)
+    return AllPairs(graph, distances, next_hop)
+
+
+def load_all_pairs(graph: CompiledGraph, filepath: Path = ALL_PAIRS_FILE) -> AllPairs:
+    """
+    Load the table from disk, or build and store it when malang_graph.json or the
+    location names changed since it was saved.
+    """
+    digest = graph_file_digest()
+    try:
+        with np.load(filepath) as data:
+            if str(data["digest"]) == digest and data["names"].tolist() == graph.names:
+                return AllPairs(graph, data["distances"], data["next_hop"])
+    except (OSError, KeyError, ValueError):
+        pass
+
+    console.print("[yellow]Precomputing all-pairs shortest distances...[/yellow]")
+    all_pairs = build_all_pairs(graph)
+    try:
+        np.savez(filepath, digest=digest, names=np.array(graph.names),
+                 distances=all_pairs.distances, next_hop=all_pairs.next_hop)
+    except OSError as e:
+        console.print(f"[yellow]Gagal menyimpan tabel jarak: {str(e)}[/yellow]")
+    return all_pairs
@@ -0,0 +1,312 @@
+"""
+Helper functions for the contraction hierarchy of the road network.
+
+Preprocessing contracts the road nodes one by one, least important first
+(ordered by edge difference: shortcuts added minus edges removed, plus the
+number of contracted neighbors and the hierarchy depth below the node to
+spread the contraction over the map). When a
+node is contracted, a shortcut replaces every path through it that has no
+equally short witness path around it, and the shortcut remembers the node so a
+route can be unpacked to road nodes again.
+
+A query is a bidirectional Dijkstra that only follows edges upward in the
+contraction order, from the start over the upward edges and from the goal over
+the reversed downward edges, and skips nodes that a higher node reaches cheaper
+(stall on demand). Both searches only settle a small part of the network.
+The hierarchy is saved next to the road network cache.
+"""
+
+import heapq
+from pathlib import Path
+
+import numpy as np
+from rich.console import Console
+from rich.progress import Progress
+
+from helpers.graph_helper import CompiledGraph, csr_from_edges
+from helpers.road_cache_helper import ROAD_CACHE_DIR, RoadNetwork
+
+console = Console()
+
+CONTRACTION_HIERARCHY_VERSION = 1
+WITNESS_SETTLE_LIMIT = 50  # Nodes settled per witness search, a missed witness only adds a shortcut
+
+# Hierarchies already loaded: (road digest, undirected) -> ContractionHierarchy
+_loaded = {}
+
+
+def _witness_distances(out_edges: list[dict], source: int, targets: set[int], excluded: int, max_cost: float) -> dict[int, float]:
+    """
+    Bounded Dijkstra from `source` that does not pass `excluded`, stops once all
+    targets are settled, the cost exceeds `max_cost` or WITNESS_SETTLE_LIMIT
+    nodes are settled.
+    """
+    best = {source: 0.0}
+    heap = [(0.0, source)]
+    remaining = set(targets)
+    settled = 0
+
+    while heap and remaining and settled < WITNESS_SETTLE_LIMIT:
+        cost, node = heapq.heappop(heap)
+        if cost > best[node]:
+            continue
+        if cost > max_cost:
+            break
+        settled += 1
+        remaining.discard(node)
+
+        for neighbor, length in out_edges[node].items():
+            if neighbor == excluded:
+                continue
+            new_cost = cost + length
+            if new_cost < best.get(neighbor, float("inf")):
+                best[neighbor] = new_cost
+                heapq.heappush(heap, (new_cost, neighbor))
+    return best
+
+
+def _shortcuts(out_edges: list[dict], in_edges: list[dict], node: int) -> list[tuple[int, int, float]]:
+    """Shortcuts (u, w, length) needed to contract `node`."""
+    shortcuts = []
+    outgoing = out_edges[node]
+    if not outgoing:
+        return shortcuts
+
+    for u, length_in in in_edges[node].items():
+        targets = {w for w in outgoing if w != u}
+        if not targets:
+            continue
+        max_cost = length_in + max(outgoing[w] for w in targets)
+        witness = _witness_distances(out_edges, u, targets, node, max_cost)
+        for w in targets:
+            via = length_in + outgoing[w]
+            if witness.get(w, float("inf")) > via:
+                shortcuts.append((u, w, via))
+    return shortcuts
+
+
+class ContractionHierarchy:
+    """
+    Upward graph (`up_*`, edges to higher ranked nodes) and reversed downward
+    graph (`down_*`, edges from higher ranked nodes, stored at their lower ranked
+    end) in CSR form over the node ids of the compiled road graph. `middles`
+    maps a shortcut (u, w) to the contracted node it skips.
+    """
+
+    def __init__(self, rank: np.ndarray, up: tuple[np.ndarray, np.ndarray, np.ndarray],
+                 down: tuple[np.ndarray, np.ndarray, np.ndarray], shortcuts: np.ndarray, digest: str = None):
+        self.rank = rank
+        self.up = CompiledGraph(list(range(len(rank))), *up)
+        self.down = CompiledGraph(self.up.names, *down)
+        self.shortcuts = shortcuts
+        self.middles = {(u, w): middle for u, w, middle in shortcuts.tolist()}
+        self.digest = digest
+
+    @property
+    def num_shortcuts(self) -> int:
+        return len(self.shortcuts)
+
+    @classmethod
+    def build(cls, graph: CompiledGraph, digest: str = None) -> "ContractionHierarchy":
+        n = graph.num_nodes
+        out_edges = [dict() for _ in range(n)]
+        in_edges = [dict() for _ in range(n)]
+        for u in range(n):
+            for w, length in graph.neighbors(u):
+                if u != w and length < out_edges[u].get(w, float("inf")):
+                    out_edges[u][w] = length
+                    in_edges[w][u] = length
+
+        middles = {}
+        contracted_neighbors = [0] * n
+        level = [0] * n  # Depth of the hierarchy below every node
+        rank = np.zeros(n, dtype=np.int64)
+        sources, targets, lengths, upward = [], [], [], []
+
+        def priority(node: int) -> int:
+            shortcuts = _shortcuts(out_edges, in_edges, node)
+            return len(shortcuts) - len(in_edges[node]) - len(out_edges[node]) + contracted_neighbors[node] + level[node]
+
+        with Progress() as progress:
+            task = progress.add_task("Building contraction hierarchy...", total=n)
+            heap = [(priority(node), node) for node in range(n)]
+            heapq.heapify(heap)
+            progress.update(task, description="Contracting road nodes...")
+
+            next_rank = 0
+            while heap:
+                _, node = heapq.heappop(heap)
+                # Lazy update, the priority may have grown since it was pushed
+                current = priority(node)
+                if heap and current > heap[0][0]:
+                    heapq.heappush(heap, (current, node))
+                    continue
+
+                for u, w, length in _shortcuts(out_edges, in_edges, node):
+                    if length < out_edges[u].get(w, float("inf")):
+                        out_edges[u][w] = length
+                        in_edges[w][u] = length
+                        middles[(u, w)] = node
+
+                # Every remaining neighbor ranks higher, the edges of the node are final
+                for w, length in out_edges[node].items():
+                    sources.append(node)
+                    targets.append(w)
+                    lengths.append(length)
+                    upward.append(True)
+                    del in_edges[w][node]
+                    contracted_neighbors[w] += 1
+                    level[w] = max(level[w], level[node] + 1)
+                for u, length in in_edges[node].items():
+                    sources.append(u)
+                    targets.append(node)
+                    lengths.append(length)
+                    upward.append(False)
+                    del out_edges[u][node]
+                    contracted_neighbors[u] += 1
+                    level[u] = max(level[u], level[node] + 1)
+                out_edges[node] = {}
+                in_edges[node] = {}
+
+                rank[node] = next_rank
+                next_rank += 1
+                progress.advance(task)
+
+        sources = np.array(sources, dtype=np.int64)
+        targets = np.array(targets, dtype=np.int64)
+        lengths = np.array(lengths, dtype=np.float64)
+        upward = np.array(upward, dtype=bool)
+
+        # Downward edges u -> node are searched backwards from their lower end
+        up = csr_from_edges(n, sources[upward], targets[upward], lengths[upward])
+        down = csr_from_edges(n, targets[~upward], sources[~upward], lengths[~upward])
+
+        kept = [(u, w, middle) for (u, w), middle in middles.items()]
+        shortcuts = np.array(kept, dtype=np.int64).reshape(-1, 3)
+        return cls(rank, up, down, shortcuts, digest)
+
+    def query(self, source: int, target: int) -> tuple[float, list[int]] | None:
+        """
+        Shortest distance and road path (compiled graph node ids) from source to
+        target, None if there is no route.
+        """
+        if source == target:
+            return 0.0, [source]
+
+        # Per side: distances, parents, open list, graph to search and graph to stall with
+        forward = ({source: 0.0}, {source: None}, [(0.0, source)], self.up, self.down)
+        backward = ({target: 0.0}, {target: None}, [(0.0, target)], self.down, self.up)
+        best = float("inf")
+        meeting = None
+
+        while forward[2] or backward[2]:
+            # Expand the side with the cheaper top, a side is done once its top can not improve
+            candidates = [side for side in (forward, backward) if side[2] and side[2][0][0] < best]
+            if not candidates:
+                break
+            side = min(candidates, key=lambda s: s[2][0][0])
+            other = backward if side is forward else forward
+            distances, parents, heap, graph, stall_graph = side
+
+            cost, node = heapq.heappop(heap)
+            if cost > distances[node]:
+                continue
+            # Stall on demand: a higher node already reaches this one cheaper, so
+            # no shortest route goes up through it
+            if any(distances.get(higher, float("inf")) + length < cost for higher, length in stall_graph.neighbors(node)):
+                continue
+            if node in other[0] and cost + other[0][node] < best:
+                best = cost + other[0][node]
+                meeting = node
+
+            for neighbor, length in graph.neighbors(node):
+                new_cost = cost + length
+                if new_cost < distances.get(neighbor, float("inf")):
+                    distances[neighbor] = new_cost
+                    parents[neighbor] = node
+                    heapq.heappush(heap, (new_cost, neighbor))
+
+        if meeting is None:
+            return None
+
+        up_path = []
+        node = meeting
+        while node is not None:
+            up_path.append(node)
+            node = forward[1][node]
+        up_path.reverse()
+
+        down_path = []
+        node = backward[1][meeting]
+        while node is not None:
+            down_path.append(node)
+            node = backward[1][node]
+
+        return best, self.unpack(up_path + down_path)
+
+    def unpack(self, path: list[int]) -> list[int]:
+        """Replace every shortcut on a path by the road nodes it skips."""
+        result = [path[0]]
+        stack = list(zip(path[1:], path[:-1]))[::-1]
+        while stack:
+            w, u = stack.pop()
+            middle = self.middles.get((u, w))
+            if middle is None:
+                result.append(w)
+            else:
+                stack.append((w, middle))
+                stack.append((middle, u))
+        return result
+
+    def save(self, filepath: Path) -> None:
+        np.savez(
+            filepath,
+            version=CONTRACTION_HIERARCHY_VERSION,
+            digest=np.array(self.digest or ""),
+            rank=self.rank,
+            up_offsets=self.up.offsets, up_targets=self.up.targets, up_weights=self.up.weights,
+            down_offsets=self.down.offsets, down_targets=self.down.targets, down_weights=self.down.weights,
+            shortcuts=self.shortcuts,
+        )
+
+    @classmethod
+    def load(cls, filepath: Path) -> "ContractionHierarchy | None":
+        try:
+            with np.load(filepath) as data:
+                if int(data["version"]) != CONTRACTION_HIERARCHY_VERSION:
+                    return None
+                return cls(
+                    data["rank"],
+                    (data["up_offsets"], data["up_targets"], data["up_weights"]),
+                    (data["down_offsets"], data["down_targets"], data["down_weights"]),
+                    data["shortcuts"],
+                    str(data["digest"]),
+                )
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def load_contraction_hierarchy(road: RoadNetwork, undirected: bool = False,
+                               directory: Path = ROAD_CACHE_DIR) -> ContractionHierarchy:
+    """
+    Contraction hierarchy of the compiled road graph (`road.to_compiled(undirected)`),
+    loaded from the road network cache or built and saved when there is none
+    for this road data yet. Kept in memory after the first call.
+    """
+    key = (road.digest, undirected)
+    if key in _loaded:
+        return _loaded[key]
+
+    filepath = Path(directory) / f"contraction_hierarchy{'_undirected' if undirected else ''}.npz"
+    hierarchy = ContractionHierarchy.load(filepath)
+    if hierarchy is None or hierarchy.digest != road.digest:
+        hierarchy = ContractionHierarchy.build(road.to_compiled(undirected), road.digest)
+        try:
+            hierarchy.save(filepath)
+            console.print(f"[green]Contraction hierarchy saved to [bold]{filepath}[/bold] "
+                          f"({hierarchy.num_shortcuts} shortcuts)[/green]")
+        except OSError as e:
+            console.print(f"[yellow]Gagal menyimpan contraction hierarchy: {str(e)}[/yellow]")
+
+    _loaded[key] = hierarchy
+    return hierarchy
@@ -1,3 +1,5 @@
+import atexit
+import hashlib
 import json
 import networkx as nx
 import os
@@ -6,43 +8,73 @@ from pathlib import Path
 import pickle
 from rich.console import Console
 
-from config.config import DATA_DIR
+from config.config import DATA_DIR, GAZETTEER_FILE, PERSIST_RESULT_CACHE, USE_CONTRACTION_HIERARCHY, USE_ROAD_TILES
+from helpers.contraction_helper import load_contraction_hierarchy
+from helpers.distance_helper import compute_branch_distances
+from helpers.geocode_helper import create_geocoder
+from helpers.graph_helper import compile_graph
+from helpers.result_cache_helper import ResultCache, graph_fingerprint
+from helpers.road_cache_helper import RoadNetwork, load_road_network, road_network_digest, save_road_network
+from helpers.road_tile_helper import TiledRoadNetwork, load_road_tiles, save_road_tiles
+from helpers.segment_cache_helper import SegmentCache, warm_segment_cache
+from helpers.spatial_index_helper import SpatialIndex, load_spatial_index
 from store.states import GlobalState
 
 console = Console()
 
-def save_osm_data(G: nx.MultiDiGraph) -> None:
+GRAPH_CACHE_FILE = "malang_graph_cache.json"
+GRAPH_CACHE_VERSION = 2
+
+# Locations geocoded into malang_locations.json when the OSM data is downloaded
+LOCATION_NAMES = [
+    "Alun-Alun Malang, Malang, Indonesia",
+    "Stasiun Malang Kota Baru, Malang, Indonesia",
+    "Mall Olympic Garden, Malang, Indonesia",
+    "Universitas Brawijaya, Malang, Indonesia",
+    "Universitas Negeri Malang, Malang, Indonesia",
+    "RSUD Saiful Anwar, Malang, Indonesia",
+    "Balai Kota Malang, Malang, Indonesia",
+    "Terminal Arjosari, Malang, Indonesia",
+    "Stadion Kanjuruhan, Malang, Indonesia",
+    "Jawa Timur Park 1, Batu, Indonesia",
+    "Jawa Timur Park 2, Batu, Indonesia",
+    "Museum Angkut, Batu, Indonesia",
+    "Alun-Alun Batu, Batu, Indonesia",
+    "Taman Rekreasi Selecta, Batu, Indonesia",
+    "Kampung Warna-Warni Jodipan, Malang, Indonesia",
+    "Taman Rekreasi Sengkaling, Malang, Indonesia",
+    "Pasar Besar Malang, Malang, Indonesia",
+    "Paralayang, Batu, Indonesia",
+    "Coban Rondo, Batu, Indonesia",
+    "Kampus UMM, Malang, Indonesia"
+]
+
+def get_location_coordinates(index: SpatialIndex, locations: list) -> dict | None:
     """
-    Save OpenStreetMap (OSM) data to a local file using pickle
+    Get the coordinates of a location using the geocoder (OSM Nominatim API by
+    default) and its cache, all locations are snapped to their nearest road node
+    of `index` at once
     """
     try:
-        if not Path(DATA_DIR).exists():
-            os.makedirs(DATA_DIR)
+        geocoder = create_geocoder(GAZETTEER_FILE)
+        geocoded = geocoder.geocode_many(locations)
+        stats = geocoder.stats()
+        console.print(f"[dim]Geocode cache: {stats['hits']} hit, {stats['misses']} miss ({stats['hit_rate']:.0%} hit rate)[/dim]")
         
-        filepath = Path(DATA_DIR) / "malang_osm_data.pkl"
+        found = [point for point in geocoded if point]
+        node_ids = {}
+        if found:
+            snapped, _ = index.snap([point[0] for point in found], [point[1] for point in found])
+            node_ids = dict(zip(found, snapped.tolist()))
         
-        with open(filepath, 'wb') as f:
-            pickle.dump(G, f)
-        
-        console.print(f"[green]Data OSM berhasil disimpan ke [bold]{filepath}[/bold][/green]")
-    except Exception as e:
-        console.print(f"[red]Error saat menyimpan data OSM: {str(e)}[/red]")
-
-def get_location_coordinates(G: nx.MultiDiGraph, locations: list) -> dict | None:
-    """
-    Get the coordinates of a location using OSM Nominatim API
-    """
-    try:
         location_coordinates = []
-        for loc in locations:
-            geolocator = ox.geocoder.geocode(loc)
+        for loc, geolocator in zip(locations, geocoded):
             if geolocator:
-                node_id = ox.distance.nearest_nodes(G, X=geolocator[1], Y=geolocator[0])
                 location_coordinates.append({
                     "name": loc,
                     "latitude": geolocator[0],
                     "longitude": geolocator[1],
-                    "node_id": node_id,
+                    "node_id": node_ids[geolocator],
                 })
             else:
                 location_coordinates.append({
@@ -58,7 +90,8 @@ def get_location_coordinates(G: nx.MultiDiGraph, locations: list) -> dict | None
 
 def load_osm_data_from_file(filename="malang_osm_data.pkl") -> nx.MultiDiGraph | None:
     """
-    Load OpenStreetMap (OSM) data from a local file using pickle
+    Load OpenStreetMap (OSM) data from a legacy pickle file, only used to convert
+    it into the road network cache
     """
     try:
         filepath = os.path.join(DATA_DIR, filename)
@@ -75,99 +108,246 @@ def load_osm_data_from_file(filename="malang_osm_data.pkl") -> nx.MultiDiGraph |
         console.print(f"[red]Error saat memuat data OSM dari file: {str(e)}[/red]")
         return None
 
+def load_graph_cache() -> dict:
+    """
+    Load the cached location graph, returns an empty cache if there is none.
+    """
+    try:
+        with open(Path(DATA_DIR) / GRAPH_CACHE_FILE, 'r') as f:
+            cache = json.load(f)
+        if cache.get("version") == GRAPH_CACHE_VERSION:
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {"version": GRAPH_CACHE_VERSION, "fingerprint": None, "edges": {}, "graph": None}
+
+def save_graph_cache(cache: dict) -> None:
+    try:
+        with open(Path(DATA_DIR) / GRAPH_CACHE_FILE, 'w') as f:
+            json.dump(cache, f)
+    except OSError as e:
+        console.print(f"[yellow]Gagal menyimpan cache graf lokasi: {str(e)}[/yellow]")
+
+def location_graph_fingerprint(osm_digest: str | None, malang_locations: list[dict], malang_graph: list[dict]) -> str:
+    """
+    Fingerprint of every input of the location graph: the OSM data, the locations
+    and the branch topology. Branch distances are left out since they are the output.
+    """
+    topology = sorted((node["node"], branch["node"]) for node in malang_graph for branch in node["branch"])
+    payload = json.dumps([osm_digest, malang_locations, topology], sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+def compute_missing_distances(road: RoadNetwork | TiledRoadNetwork, missing: dict[int, set[int]]) -> dict[int, dict[int, float]]:
+    """
+    Compute the road distance from each OSM source node to its target nodes with one
+    bounded Dijkstra per source, or contraction hierarchy queries. Returns
+    source -> target -> distance in OSM node ids, targets without a route are left out.
+    On road tiles only the tiles the searches reach are loaded.
+    """
+    road_graph = road.to_compiled(undirected=True)
+    
+    jobs = {}
+    for source, targets in missing.items():
+        if road_graph.id_of(source) is None:
+            continue
+        jobs[road_graph.id_of(source)] = {road_graph.id_of(t) for t in targets if road_graph.id_of(t) is not None}
+    
+    if USE_CONTRACTION_HIERARCHY:
+        hierarchy = load_contraction_hierarchy(road, undirected=True)
+        results = {}
+        for source, targets in jobs.items():
+            results[source] = {}
+            for target in targets:
+                found = hierarchy.query(source, target)
+                if found is not None:
+                    results[source][target] = found[0]
+    else:
+        results = compute_branch_distances(road_graph, jobs)
+    return {
+        road_graph.name_of(source): {road_graph.name_of(target): distance for target, distance in distances.items()}
+        for source, distances in results.items()
+    }
+
 def load_malang_osm_data() -> None:
     """
     Loads OSM data for Malang Raya region.
     Attempts to load from cache first, if not available then fetch from OSM.
+    The location graph is reused from its cache when the fingerprint of its inputs
+    did not change, otherwise only the edges with changed endpoints are recomputed.
     """
-    G = load_osm_data_from_file()
+    road = None
+    road_tiles = None
+    G = None
+    
+    if USE_ROAD_TILES:
+        # Only the node index of the tiles is opened as long as they belong to
+        # the road network cache, the full network stays closed
+        road_digest = road_network_digest()
+        if road_digest is not None:
+            road_tiles = load_road_tiles(digest=road_digest)
+    
+    if road_tiles is None:
+        road = load_road_network()
+    
+    if road is None and road_tiles is None:
+        # Convert the legacy pickle if there is one, otherwise fetch from OSM
+        G = load_osm_data_from_file()
+        downloaded = G is None
+        
+        if downloaded:
+            G = load_osm_data_online()
+        
+        if G is not None:
+            road = save_road_network(G)
+        
+        if road is not None and downloaded:
+            # Snapped with the spatial index that is saved with the new road network cache
+            GlobalState.road = road
+            save_location_coordinates(LOCATION_NAMES)
     
-    if G is None:
-        G = load_osm_data_online()
-
     try:
+        if road is not None and USE_ROAD_TILES:
+            # Split once per road network, afterwards only the node index is opened
+            save_road_tiles(road)
+            road_tiles = load_road_tiles(digest=road.digest)
+        
+        # Road data the location graph and its segments are computed on
+        network = road_tiles or road
+        
         with open(Path(DATA_DIR) / "malang_locations.json", 'r') as f:
             malang_locations = json.load(f)
         
         with open(Path(DATA_DIR) / "malang_graph.json", 'r') as f:
             malang_graph = json.load(f)
         
-        # Buat graph khusus dengan bobot jarak
-        G_undirected = nx.Graph(G)
-        new_graph = []
-        for index, loc in enumerate(malang_locations):
-            new_graph.append({
-                "node": loc["name"],
-                "branch": []
-            })
-
-            branch = next((node["branch"] for node in malang_graph if node["node"] == loc["name"]), None)
+        cache = load_graph_cache()
+        osm_digest = network.digest if network is not None else None
+        fingerprint = location_graph_fingerprint(osm_digest, malang_locations, malang_graph)
+        
+        if cache["fingerprint"] == fingerprint and cache["graph"] is not None:
+            new_graph = cache["graph"]
+        else:
+            # Edge distances only stay valid for the same OSM data
+            cached_edges = cache["edges"] if cache.get("edges_osm_digest") == osm_digest else {}
+            edges = {}
+            node_ids = {loc["name"]: loc["node_id"] for loc in malang_locations}
+            branches = {node["node"]: node["branch"] for node in malang_graph}
             
-            if not branch:
-                continue
+            # Collect the edges that are not cached yet, grouped by their source location
+            missing = {}
+            for loc in malang_locations:
+                for node in branches.get(loc["name"]) or []:
+                    edge_key = f"{loc['node_id']}-{node_ids.get(node['node'])}"
+                    if edge_key not in cached_edges:
+                        missing.setdefault(loc["node_id"], set()).add(node_ids.get(node["node"]))
             
-            for node in branch:
-                try:
-                    branch_node_id = next((n["node_id"] for n in malang_locations if n["name"] == node["node"]), None)
-                    route = nx.shortest_path(G_undirected, loc["node_id"], branch_node_id, weight='length')
-                    distance = sum(G_undirected[u][v]['length'] for u, v in zip(route[:-1], route[1:]))
+            if missing:
+                computed = compute_missing_distances(network, missing) if network is not None else {}
+                for source, distances in computed.items():
+                    for target, distance in distances.items():
+                        cached_edges[f"{source}-{target}"] = distance
+            
+            # Buat graph khusus dengan bobot jarak
+            new_graph = []
+            for index, loc in enumerate(malang_locations):
+                new_graph.append({
+                    "node": loc["name"],
+                    "branch": []
+                })
+
+                branch = branches.get(loc["name"])
+                
+                if not branch:
+                    continue
+                
+                for node in branch:
+                    edge_key = f"{loc['node_id']}-{node_ids.get(node['node'])}"
+                    if edge_key not in cached_edges:
+                        console.print(f"[yellow]Tidak ada jalur dari {loc['name']} ke {node['node']}[/yellow]")
+                        continue
+                    
+                    edges[edge_key] = cached_edges[edge_key]
                     new_graph[index]["branch"].append({
                         "node": node["node"], 
-                        "distance": distance
+                        "distance": cached_edges[edge_key]
                     })
-                except nx.NetworkXNoPath:
-                    console.print(f"[yellow]Tidak ada jalur dari {loc["name"]} ke {node["node"]}[/yellow]")
-                except Exception as e:
-                    console.print(f"[yellow]Error mencari jalur dari {loc["name"]} ke {node["node"]}: {str(e)}[/yellow]")
+            
+            cache.update({
+                "fingerprint": fingerprint,
+                "edges_osm_digest": osm_digest,
+                "edges": edges,
+                "graph": new_graph,
+            })
+            save_graph_cache(cache)
+        
+        if new_graph != malang_graph:
+            with open(Path(DATA_DIR) / "malang_graph.json", 'w') as f:
+                json.dump(new_graph, f, indent=4)
         
-        with open(Path(DATA_DIR) / "malang_graph.json", 'w') as f:
-            json.dump(new_graph, f, indent=4)
+        if network is not None:
+            # Road segments of every edge, so drawing a route does not run any Dijkstra
+            GlobalState.segment_cache = SegmentCache.load(network.digest)
+            node_ids = {loc["name"]: loc["node_id"] for loc in malang_locations}
+            pairs = {}
+            for node in new_graph:
+                for branch in node["branch"]:
+                    pairs.setdefault(node_ids[node["node"]], set()).add(node_ids[branch["node"]])
+            warm_segment_cache(network, GlobalState.segment_cache, pairs)
         
         GlobalState.G = G
+        GlobalState.road = road
+        GlobalState.road_tiles = road_tiles
         GlobalState.malang_graph = new_graph
+        GlobalState.compiled_graph = compile_graph(new_graph)
         GlobalState.location_nodes = malang_locations
+        
+        # Cached results of another location graph are dropped
+        result_version = graph_fingerprint(new_graph)
+        if GlobalState.result_cache is None or GlobalState.result_cache.graph_version != result_version:
+            if GlobalState.result_cache is not None:
+                GlobalState.result_cache.save()
+            GlobalState.result_cache = ResultCache.load(result_version) if PERSIST_RESULT_CACHE else ResultCache(result_version)
     except Exception as e:
         console.print(f"[yellow]Error saat memproses data OSM dari cache: {str(e)}. Mencoba memuat ulang dari OSM...[/yellow]")
 
+@atexit.register
+def save_result_cache() -> None:
+    """
+    Save the new results of the persisted result cache on exit, it is only saved
+    every RESULT_CACHE_SAVE_INTERVAL results while running.
+    """
+    if GlobalState.result_cache is not None:
+        GlobalState.result_cache.save()
+
+def get_spatial_index() -> SpatialIndex | None:
+    """
+    Get the spatial index of the road nodes, loaded from the road network cache on first use.
+    """
+    if GlobalState.road is None and GlobalState.road_tiles is not None:
+        # Not opened at startup when the road tiles are used
+        GlobalState.road = load_road_network()
+    if GlobalState.spatial_index is None and GlobalState.road is not None:
+        GlobalState.spatial_index = load_spatial_index(GlobalState.road)
+    return GlobalState.spatial_index
+
+def save_location_coordinates(locations: list) -> None:
+    """
+    Geocode the locations and save them with their road node in malang_locations.json.
+    """
+    locations_coordinate = get_location_coordinates(get_spatial_index(), locations)
+    if locations_coordinate is not None:
+        with open(Path(DATA_DIR) / "malang_locations.json", 'w') as f:
+            json.dump(locations_coordinate, f, indent=4)
+
 def load_osm_data_online() -> nx.MultiDiGraph | None:
     try:
         console.print("[yellow]Load OSM data from the internet...[/yellow]")
         
         G = ox.graph_from_place("Malang, East Java, Indonesia", network_type="drive", simplify=True)
         
-        locations = [
-            "Alun-Alun Malang, Malang, Indonesia",
-            "Stasiun Malang Kota Baru, Malang, Indonesia",
-            "Mall Olympic Garden, Malang, Indonesia",
-            "Universitas Brawijaya, Malang, Indonesia",
-            "Universitas Negeri Malang, Malang, Indonesia",
-            "RSUD Saiful Anwar, Malang, Indonesia",
-            "Balai Kota Malang, Malang, Indonesia",
-            "Terminal Arjosari, Malang, Indonesia",
-            "Stadion Kanjuruhan, Malang, Indonesia",
-            "Jawa Timur Park 1, Batu, Indonesia",
-            "Jawa Timur Park 2, Batu, Indonesia",
-            "Museum Angkut, Batu, Indonesia",
-            "Alun-Alun Batu, Batu, Indonesia",
-            "Taman Rekreasi Selecta, Batu, Indonesia",
-            "Kampung Warna-Warni Jodipan, Malang, Indonesia",
-            "Taman Rekreasi Sengkaling, Malang, Indonesia",
-            "Pasar Besar Malang, Malang, Indonesia",
-            "Paralayang, Batu, Indonesia",
-            "Coban Rondo, Batu, Indonesia",
-            "Kampus UMM, Malang, Indonesia"
-        ]
-        
-        locations_coordinate = get_location_coordinates(G, locations)
-        
-        with open(Path(DATA_DIR) / "malang_locations.json", 'w') as f:
-            json.dump(locations_coordinate, f, indent=4)
-
         if not 'length' in list(G.edges(data=True))[0][2]:
             G = ox.add_edge_lengths(G)
         
-        save_osm_data(G)
-        
         console.print("[green]OSM data loaded successfully from the internet![/green]")
         return G
     except Exception as e:
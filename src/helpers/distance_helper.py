@@ -0,0 +1,94 @@
+"""
+Helper functions to compute road distances between locations.
+
+Runs a single-source Dijkstra per location over the compiled road graph that
+stops as soon as all of its branch targets are settled. The runs of different
+locations are independent and are spread over a process pool.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import heapq
+import multiprocessing
+import os
+
+from rich.progress import Progress
+
+from helpers.graph_helper import CompiledGraph
+
+# Road graph of the pool workers, set once per worker by _init_worker
+_worker_graph: CompiledGraph = None
+
+
+def dijkstra_to_targets(graph: CompiledGraph, source: int, targets: set[int], parents: dict[int, int | None] = None) -> dict[int, float]:
+    """
+    Single-source Dijkstra from `source` that stops once every target is settled.
+    Returns the distance of every reachable target, unreachable targets are left out.
+    `parents`, if given, is filled with the predecessor of every reached node.
+    """
+    remaining = set(targets)
+    distances = {}
+    best = {source: 0.0}
+    heap = [(0.0, source)]
+    if parents is not None:
+        parents[source] = None
+
+    while heap and remaining:
+        cost, node = heapq.heappop(heap)
+        if cost > best[node]:
+            continue  # Stale entry, the node was already settled with a lower cost
+
+        if node in remaining:
+            remaining.discard(node)
+            distances[node] = cost
+
+        for neighbor, length in graph.neighbors(node):
+            new_cost = cost + length
+            if neighbor not in best or new_cost < best[neighbor]:
+                best[neighbor] = new_cost
+                if parents is not None:
+                    parents[neighbor] = node
+                heapq.heappush(heap, (new_cost, neighbor))
+
+    return distances
+
+
+def _init_worker(graph: CompiledGraph) -> None:
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _run_source(source: int, targets: set[int]) -> tuple[int, dict[int, float]]:
+    return source, dijkstra_to_targets(_worker_graph, source, targets)
+
+
+def compute_branch_distances(graph: CompiledGraph, jobs: dict[int, set[int]], workers: int = None) -> dict[int, dict[int, float]]:
+    """
+    Compute the road distance from every source in `jobs` to each of its targets.
+    `jobs` maps a graph index to the set of target indexes, the result maps
+    source -> target -> distance. With more than one worker the sources are
+    spread over a process pool, forked where possible so the graph is shared.
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    results = {}
+
+    with Progress() as progress:
+        task = progress.add_task("Computing road distances...", total=len(jobs))
+
+        if workers <= 1:
+            for source, targets in jobs.items():
+                results[source] = dijkstra_to_targets(graph, source, targets)
+                progress.advance(task)
+            return results
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(graph,)) as executor:
+            futures = [executor.submit(_run_source, source, targets) for source, targets in jobs.items()]
+            for future in as_completed(futures):
+                source, distances = future.result()
+                results[source] = distances
+                progress.advance(task)
+
+    return results
@@ -0,0 +1,189 @@
+"""
+Helper functions for geocoding location names with a persistent cache.
+
+Every answer of the geocoder, also "not found", is stored in a SQLite database
+keyed by the backend and the normalized query, so a name is only looked up once
+per backend. The geocoder backend is pluggable: Nominatim through osmnx by
+default, or a local gazetteer file for offline use and tests.
+"""
+
+from abc import ABC, abstractmethod
+import csv
+import json
+from pathlib import Path
+import sqlite3
+import time
+
+import osmnx as ox
+import requests
+from rich.console import Console
+
+from config.config import DATA_DIR
+
+console = Console()
+
+GEOCODE_CACHE_FILE = Path(DATA_DIR) / "geocode_cache.sqlite"
+GEOCODE_CACHE_VERSION = 2
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a query: case-folded with the whitespace collapsed."""
+    return " ".join(query.casefold().split())
+
+
+class GeocoderBackend(ABC):
+    """
+    Interface of a geocoder: returns the (latitude, longitude) of a query, or
+    None when the place is not known.
+    """
+
+    name = "backend"
+
+    @abstractmethod
+    def geocode(self, query: str) -> tuple[float, float] | None:
+        ...
+
+
+class NominatimBackend(GeocoderBackend):
+    """
+    OSM Nominatim through osmnx, needs network access.
+    """
+
+    name = "nominatim"
+
+    def geocode(self, query: str) -> tuple[float, float] | None:
+        try:
+            return ox.geocoder.geocode(query)
+        except requests.RequestException:
+            raise  # Network trouble is no answer, it must not be cached as "not found"
+        except Exception:
+            # osmnx only exports its "no result" error from a private module
+            return None
+
+
+class GazetteerBackend(GeocoderBackend):
+    """
+    Local gazetteer, a CSV file with name, latitude, longitude columns or a JSON
+    list of objects with these keys (like malang_locations.json).
+    """
+
+    name = "gazetteer"
+
+    def __init__(self, filepath: Path):
+        self.places = {}
+        filepath = Path(filepath)
+        # Every gazetteer file knows other places, their answers are cached apart
+        self.name = f"gazetteer:{filepath.resolve()}"
+        with open(filepath, "r", newline="") as f:
+            rows = csv.DictReader(f) if filepath.suffix.lower() == ".csv" else json.load(f)
+            for row in rows:
+                if row.get("latitude") in (None, "") or row.get("longitude") in (None, ""):
+                    continue
+                self.places[normalize_query(row["name"])] = (float(row["latitude"]), float(row["longitude"]))
+
+    def geocode(self, query: str) -> tuple[float, float] | None:
+        return self.places.get(normalize_query(query))
+
+
+class GeocodeCache:
+    """
+    SQLite cache of geocoder answers: (backend, normalized query) -> (latitude,
+    longitude), or None for places the backend did not find. A place one backend
+    does not know may still be found by another one.
+    """
+
+    def __init__(self, filepath: Path = GEOCODE_CACHE_FILE):
+        self.connection = sqlite3.connect(filepath)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != GEOCODE_CACHE_VERSION:
+            # Written by another format version, the answers are looked up again
+            with self.connection:
+                self.connection.execute("DROP TABLE IF EXISTS geocode")
+                self.connection.execute(f"PRAGMA user_version = {GEOCODE_CACHE_VERSION}")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "backend TEXT, query TEXT, latitude REAL, longitude REAL, created REAL, PRIMARY KEY (backend, query))"
+        )
+
+    def get_many(self, queries: list[str], backend: str) -> dict[str, tuple[float, float] | None]:
+        """Cached answers of `backend` to the normalized queries, queries it never looked up are left out."""
+        found = {}
+        # Stay below the SQLite limit of bound parameters
+        for i in range(0, len(queries), 500):
+            chunk = queries[i:i + 500]
+            rows = self.connection.execute(
+                f"SELECT query, latitude, longitude FROM geocode WHERE backend = ? AND query IN ({','.join('?' * len(chunk))})",
+                [backend, *chunk],
+            )
+            for query, latitude, longitude in rows:
+                found[query] = (latitude, longitude) if latitude is not None else None
+        return found
+
+    def put_many(self, answers: dict[str, tuple[float, float] | None], backend: str) -> None:
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?)",
+                [(backend, query, *(point if point else (None, None)), now) for query, point in answers.items()],
+            )
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class Geocoder:
+    """
+    Geocoder backend behind the persistent cache.
+    """
+
+    def __init__(self, backend: GeocoderBackend = None, cache: GeocodeCache = None):
+        self.backend = backend if backend is not None else NominatimBackend()
+        # An empty cache is falsy (__len__), it must not be swapped for the default file
+        self.cache = cache if cache is not None else GeocodeCache()
+        self.hits = 0
+        self.misses = 0
+
+    def geocode(self, query: str) -> tuple[float, float] | None:
+        return self.geocode_many([query])[0]
+
+    def geocode_many(self, queries: list[str]) -> list[tuple[float, float] | None]:
+        """
+        (latitude, longitude) of every query in order, None for places that were
+        not found. Every distinct query is looked up at most once, and only when
+        it is not cached yet.
+        """
+        keys = [normalize_query(query) for query in queries]
+        unique = list(dict.fromkeys(keys))
+        answers = self.cache.get_many(unique, self.backend.name)
+        self.hits += len(answers)
+
+        looked_up = {}
+        for query, key in zip(queries, keys):
+            if key in answers or key in looked_up:
+                continue
+            looked_up[key] = self.backend.geocode(query)
+            self.misses += 1
+
+        if looked_up:
+            self.cache.put_many(looked_up, self.backend.name)
+            answers.update(looked_up)
+        return [answers[key] for key in keys]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.cache),
+        }
+
+
+def create_geocoder(gazetteer_file: Path = None) -> Geocoder:
+    """
+    Geocoder with the local gazetteer when a file is given, otherwise Nominatim.
+    """
+    backend = GazetteerBackend(gazetteer_file) if gazetteer_file else NominatimBackend()
+    return Geocoder(backend)
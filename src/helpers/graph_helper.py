@@ -0,0 +1,214 @@
+"""
+Helper functions for the compiled (integer indexed) location graph.
+"""
+
+import numpy as np
+
+
+class CompiledGraph:
+    """
+    Location graph compiled into compressed sparse row (CSR) arrays.
+
+    Every location name is interned to an integer id. The neighbors of node `u`
+    are `targets[offsets[u]:offsets[u + 1]]` with the matching distances in
+    `weights`. Search engines only work with the integer ids, names are
+    translated back when the result is returned.
+    """
+
+    def __init__(self, names: list[str], offsets: np.ndarray, targets: np.ndarray, weights: np.ndarray):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+        # Plain list copies, indexing numpy arrays from python loops is slow
+        self._offsets = offsets.tolist()
+        self._targets = targets.tolist()
+        self._weights = weights.tolist()
+        self._reverse = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._targets)
+
+    def id_of(self, name: str) -> int | None:
+        """Get the integer id of a location name."""
+        return self.index.get(name)
+
+    def name_of(self, node: int) -> str:
+        """Get the location name of an integer id."""
+        return self.names[node]
+
+    def to_names(self, nodes: list[int]) -> list[str]:
+        """Translate a list of integer ids back to location names."""
+        return [self.names[node] for node in nodes]
+
+    def neighbors(self, node: int) -> zip:
+        """Get (neighbor id, distance) pairs of a node."""
+        begin = self._offsets[node]
+        end = self._offsets[node + 1]
+        return zip(self._targets[begin:end], self._weights[begin:end])
+
+    def degree(self, node: int) -> int:
+        """Get the number of outgoing edges of a node."""
+        return self._offsets[node + 1] - self._offsets[node]
+
+    def reverse(self) -> "CompiledGraph":
+        """
+        Graph with every edge reversed and the same ids, built once on first use.
+        Used by searches that grow a frontier backwards from the goal.
+        """
+        if self._reverse is None:
+            sources = np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.offsets))
+            self._reverse = CompiledGraph(self.names, *csr_from_edges(
+                self.num_nodes, self.targets.astype(np.int64), sources, self.weights
+            ))
+        return self._reverse
+
+
+class MappedGraph(CompiledGraph):
+    """
+    CompiledGraph over sorted integer names (the OSM node ids of the road network)
+    that reads its CSR arrays directly instead of copying them into lists. The
+    arrays of the memory-mapped road network cache are never written, so forked
+    processes keep sharing their pages, at the cost of slower neighbor lookups.
+    """
+
+    def __init__(self, node_ids: np.ndarray, offsets: np.ndarray, targets: np.ndarray, weights: np.ndarray):
+        self.node_ids = node_ids
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self._reverse = None
+
+    @property
+    def names(self) -> list[int]:
+        """Name of every node, reads the whole node id array."""
+        return self.node_ids.tolist()
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def id_of(self, name: int) -> int | None:
+        i = int(np.searchsorted(self.node_ids, name))
+        if i < len(self.node_ids) and self.node_ids[i] == name:
+            return i
+        return None
+
+    def name_of(self, node: int) -> int:
+        return int(self.node_ids[node])
+
+    def to_names(self, nodes: list[int]) -> list[int]:
+        return self.node_ids[nodes].tolist()
+
+    def neighbors(self, node: int) -> zip:
+        begin, end = int(self.offsets[node]), int(self.offsets[node + 1])
+        return zip(self.targets[begin:end].tolist(), self.weights[begin:end].tolist())
+
+    def degree(self, node: int) -> int:
+        return int(self.offsets[node + 1] - self.offsets[node])
+
+    def reverse(self) -> "MappedGraph":
+        if self._reverse is None:
+            sources = np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.offsets))
+            self._reverse = MappedGraph(self.node_ids, *csr_from_edges(
+                self.num_nodes, self.targets.astype(np.int64), sources, self.weights
+            ))
+        return self._reverse
+
+
+def compile_graph(malang_graph: list[dict]) -> CompiledGraph:
+    """
+    Compile the location graph (list of {"node", "branch"} dicts) into a CompiledGraph.
+    Ids follow the sorted names, so the searches break cost ties between
+    locations by name like they did on the names; branches keep their order.
+    """
+    names = sorted({node_data["node"] for node_data in malang_graph}
+                   | {branch["node"] for node_data in malang_graph for branch in node_data.get("branch", [])})
+    index = {name: i for i, name in enumerate(names)}
+
+    adjacency = {}
+    for node_data in malang_graph:
+        edges = adjacency.setdefault(index[node_data["node"]], [])
+        for branch in node_data.get("branch", []):
+            edges.append((index[branch["node"]], branch["distance"]))
+
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    targets = []
+    weights = []
+    for u in range(len(names)):
+        for v, distance in adjacency.get(u, []):
+            targets.append(v)
+            weights.append(distance)
+        offsets[u + 1] = len(targets)
+
+    return CompiledGraph(
+        names,
+        offsets,
+        np.array(targets, dtype=np.int32),
+        np.array(weights, dtype=np.float64),
+    )
+
+
+def csr_from_edges(num_nodes: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build CSR (offsets, targets, weights) arrays from edge arrays. Parallel edges
+    are merged into the shortest one and the neighbors of a node are sorted by id.
+    """
+    order = np.lexsort((weights, targets, sources))
+    sources, targets, weights = sources[order], targets[order], weights[order]
+
+    # After sorting, the first edge of every (source, target) group is the shortest
+    keep = np.ones(len(sources), dtype=bool)
+    keep[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+    sources, targets, weights = sources[keep], targets[keep], weights[keep]
+
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=offsets[1:])
+    return offsets, targets.astype(np.int32), weights.astype(np.float64)
+
+
+def compile_road_graph(G, undirected: bool = False) -> CompiledGraph:
+    """
+    Compile an OSM road graph (networkx MultiDiGraph with `length` on the edges)
+    into a CompiledGraph. The names are the OSM node ids and parallel edges are
+    merged into the shortest one. With `undirected` every edge is usable both ways.
+    """
+    names = list(G.nodes)
+    index = {node: i for i, node in enumerate(names)}
+
+    edges = list(G.edges(data="length"))
+    sources = np.fromiter((index[u] for u, _, _ in edges), dtype=np.int64, count=len(edges))
+    targets = np.fromiter((index[v] for _, v, _ in edges), dtype=np.int64, count=len(edges))
+    weights = np.fromiter((length for _, _, length in edges), dtype=np.float64, count=len(edges))
+
+    if undirected:
+        sources, targets = np.concatenate((sources, targets)), np.concatenate((targets, sources))
+        weights = np.concatenate((weights, weights))
+
+    return CompiledGraph(names, *csr_from_edges(len(names), sources, targets, weights))
+
+
+def build_path(parents: dict[int, int | None], goal: int) -> list[int]:
+    """
+    Rebuild the path to `goal` by following the predecessor map back to the start.
+    The start node is the one whose predecessor is None.
+    """
+    path = [goal]
+    node = parents[goal]
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return path
+
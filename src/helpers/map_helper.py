@@ -0,0 +1,231 @@
+"""
+Helper functions for lightweight route maps.
+
+Road routes have a vertex every few meters, far more than a map can show. The
+lines are simplified with Douglas-Peucker, with a tolerance of MAP_SIMPLIFY_PIXELS
+pixels at the zoom level the map is made for, and written as encoded polylines,
+GeoJSON or one HTML map with a layer per route.
+"""
+
+import json
+import math
+import os
+from pathlib import Path
+
+import folium
+import numpy as np
+
+from config.config import JINJA_ENV, MAP_SIMPLIFY_ZOOM
+from helpers.segment_cache_helper import get_segment
+from store.states import GlobalState
+
+MAP_SIMPLIFY_PIXELS = 1.0  # Largest deviation of a simplified line, in screen pixels
+MAP_FORMATS = ("geojson", "polyline", "html")
+ROUTE_COLORS = ("red", "blue", "green", "purple", "orange", "darkred", "cadetblue", "darkgreen", "black", "pink")
+
+
+def zoom_tolerance(zoom: float, latitude: float, pixels: float = MAP_SIMPLIFY_PIXELS) -> float:
+    """Meters covered by `pixels` screen pixels at a web map zoom level and latitude."""
+    return pixels * 156543.03392 * math.cos(math.radians(latitude)) / 2 ** zoom
+
+
+def simplify(coordinates: list[tuple[float, float]], tolerance: float) -> list[tuple[float, float]]:
+    """
+    Douglas-Peucker simplification of a line of (lat, lon) points, no point is
+    moved more than `tolerance` meters away from the simplified line.
+    """
+    if len(coordinates) < 3 or tolerance <= 0:
+        return list(coordinates)
+
+    # Local equirectangular projection in meters, exact enough for a city
+    points = np.asarray(coordinates, dtype=np.float64)
+    scale = 111320.0 * math.cos(math.radians(points[:, 0].mean()))
+    xy = np.column_stack((points[:, 1] * scale, points[:, 0] * 110540.0))
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        start, end = xy[first], xy[last]
+        between = xy[first + 1:last]
+        direction = end - start
+        length = direction @ direction
+        if length == 0:
+            distances = np.hypot(*(between - start).T)
+        else:
+            t = np.clip((between - start) @ direction / length, 0, 1)
+            distances = np.hypot(*(between - (start + t[:, None] * direction)).T)
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            middle = first + 1 + farthest
+            keep[middle] = True
+            stack.append((first, middle))
+            stack.append((middle, last))
+
+    return [coordinates[i] for i in np.flatnonzero(keep)]
+
+
+def encode_polyline(coordinates: list[tuple[float, float]], precision: int = 5) -> str:
+    """Encoded polyline (Google polyline algorithm) of (lat, lon) points."""
+    factor = 10 ** precision
+    result = []
+    previous = (0, 0)
+    for lat, lon in coordinates:
+        current = (round(lat * factor), round(lon * factor))
+        for delta in (current[0] - previous[0], current[1] - previous[1]):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                result.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            result.append(chr(value + 63))
+        previous = current
+    return "".join(result)
+
+
+def decode_polyline(polyline: str, precision: int = 5) -> list[tuple[float, float]]:
+    """(lat, lon) points of an encoded polyline."""
+    factor = 10 ** precision
+    coordinates = []
+    values = [0, 0]
+    index = 0
+    while index < len(polyline):
+        for axis in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(polyline[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            values[axis] += ~(result >> 1) if result & 1 else result >> 1
+        coordinates.append((values[0] / factor, values[1] / factor))
+    return coordinates
+
+
+def route_coordinates(routes: list[list], road_route: bool = False) -> tuple[list[tuple[float, float]], list[tuple[float, float]]]:
+    """
+    Road geometry of a route given as legs of location names, or of OSM node ids
+    with `road_route`, and the (lat, lon) of its stops.
+    """
+    road = GlobalState.road_tiles or GlobalState.road
+    if road is None or GlobalState.location_nodes is None:
+        raise ValueError("Route maps need the road network cache")
+
+    if road_route:
+        nodes = [node for i, leg in enumerate(routes) for node in (leg if i == 0 else leg[1:])]
+        stops = [leg[0] for leg in routes] + [routes[-1][-1]] if routes else []
+        return [road.coordinates(node) for node in nodes], [road.coordinates(node) for node in stops]
+
+    location_dict = {loc["name"]: loc for loc in GlobalState.location_nodes}
+    names = [name for i, leg in enumerate(routes) for name in (leg if i == 0 else leg[1:])]
+    stops = [(location_dict[name]["latitude"], location_dict[name]["longitude"]) for name in names if name in location_dict]
+    node_ids = [location_dict[name]["node_id"] for name in names if name in location_dict]
+
+    coordinates = []
+    for u, v in zip(node_ids, node_ids[1:]):
+        segment = get_segment(road, GlobalState.segment_cache, u, v)
+        if segment is not None:
+            # Consecutive segments share their junction point
+            coordinates.extend(segment[1][1:] if coordinates else segment[1])
+    return coordinates, stops
+
+
+def route_geometries(records: list[dict], zoom: float = MAP_SIMPLIFY_ZOOM) -> list[dict]:
+    """
+    Simplified geometry of every found route of batch result records:
+    {"job", "algorithm", "distance", "coordinates", "stops"}.
+    """
+    geometries = []
+    for record in records:
+        if not record.get("found"):
+            continue
+        coordinates, stops = route_coordinates(record["routes"], record.get("road", False))
+        if coordinates:
+            coordinates = simplify(coordinates, zoom_tolerance(zoom, coordinates[0][0]))
+        geometries.append({
+            "job": record.get("job"),
+            "algorithm": record.get("algorithm"),
+            "distance": record.get("distance"),
+            "coordinates": coordinates,
+            "stops": stops,
+        })
+    if GlobalState.segment_cache is not None:
+        GlobalState.segment_cache.save()
+    return geometries
+
+
+def write_geojson(geometries: list[dict], filepath: Path) -> None:
+    """FeatureCollection with a LineString feature per route and a MultiPoint feature of its stops."""
+    features = []
+    for geometry in geometries:
+        properties = {"job": geometry["job"], "algorithm": geometry["algorithm"], "distance": geometry["distance"]}
+        for kind, geometry_type, points in (("route", "LineString", geometry["coordinates"]),
+                                            ("stops", "MultiPoint", geometry["stops"])):
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": geometry_type, "coordinates": [[round(lon, 6), round(lat, 6)] for lat, lon in points]},
+                "properties": {**properties, "kind": kind},
+            })
+    with open(filepath, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f, separators=(",", ":"))
+
+
+def write_polylines(geometries: list[dict], filepath: Path) -> None:
+    """One JSON line per route with the route and its stops as encoded polylines."""
+    with open(filepath, "w") as f:
+        for geometry in geometries:
+            f.write(json.dumps({
+                "job": geometry["job"],
+                "algorithm": geometry["algorithm"],
+                "distance": geometry["distance"],
+                "polyline": encode_polyline(geometry["coordinates"]),
+                "stops": encode_polyline(geometry["stops"]),
+            }) + "\n")
+
+
+def write_route_map(geometries: list[dict], filepath: Path) -> None:
+    """One HTML map with a layer per route that can be switched on and off."""
+    points = [point for geometry in geometries for point in geometry["coordinates"] or geometry["stops"]]
+    center = np.asarray(points).mean(axis=0).tolist() if points else [-7.98, 112.63]
+    route_map = folium.Map(location=center, zoom_start=13, prefer_canvas=True)
+
+    for i, geometry in enumerate(geometries):
+        color = ROUTE_COLORS[i % len(ROUTE_COLORS)]
+        name = f"Job {geometry['job']} ({geometry['algorithm']}, {geometry['distance'] or 0:.0f} m)"
+        layer = folium.FeatureGroup(name=name)
+        if geometry["coordinates"]:
+            folium.PolyLine([(round(lat, 6), round(lon, 6)) for lat, lon in geometry["coordinates"]],
+                            color=color, weight=4, opacity=0.8).add_to(layer)
+        for lat, lon in geometry["stops"]:
+            folium.CircleMarker([lat, lon], radius=4, color=color, fill=True).add_to(layer)
+        layer.add_to(route_map)
+
+    folium.LayerControl(collapsed=False).add_to(route_map)
+    with open(filepath, "w") as f:
+        f.write(JINJA_ENV.get_template("map.html").render(map=route_map._repr_html_()))
+
+
+def write_routes(records: list[dict], filepath: Path, map_format: str = "geojson", zoom: float = MAP_SIMPLIFY_ZOOM) -> int:
+    """
+    Write the found routes of batch result records in `map_format` ("geojson",
+    "polyline" or "html"), simplified for `zoom`. Returns the number of routes written.
+    """
+    if map_format not in MAP_FORMATS:
+        raise ValueError(f"Unknown map format: {map_format}")
+    if not os.path.exists(Path(filepath).parent):
+        os.makedirs(Path(filepath).parent)
+
+    geometries = route_geometries(records, zoom)
+    if map_format == "geojson":
+        write_geojson(geometries, filepath)
+    elif map_format == "polyline":
+        write_polylines(geometries, filepath)
+    else:
+        write_route_map(geometries, filepath)
+    return len(geometries)
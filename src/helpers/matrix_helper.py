@@ -0,0 +1,163 @@
+"""
+Helper functions for many-to-many road distance matrices.
+
+One single-source Dijkstra per origin settles every target in the same pass, it
+runs in C on a sparse matrix view of the CSR arrays of the compiled graph
+(scipy.sparse.csgraph). A distance bound stops every search early. The origins
+are split into chunks that run in a process pool, forked where possible so the
+graph is shared.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from helpers.graph_helper import CompiledGraph
+from helpers.road_cache_helper import load_road_network
+from store.states import GlobalState
+
+MATRIX_CHUNK_SIZE = 64  # Origins per Dijkstra call, it holds a row of all node distances per origin
+NO_PREDECESSOR = -9999  # Marker of scipy.sparse.csgraph for nodes without predecessor
+
+# Sparse matrix of the pool workers, set once per worker by _init_worker
+_worker_matrix: csr_matrix = None
+
+
+def to_sparse(graph: CompiledGraph) -> csr_matrix:
+    """
+    Sparse adjacency matrix sharing the CSR arrays of the graph. Zero length
+    edges stay edges since they are stored explicitly.
+    """
+    n = graph.num_nodes
+    return csr_matrix((graph.weights, graph.targets, graph.offsets), shape=(n, n))
+
+
+class DistanceMatrix:
+    """
+    distances[i, j] is the shortest distance from origins[i] to targets[j], inf
+    when there is no route within the bound. predecessors[i] is the shortest
+    path tree of origins[i] over all nodes (-1 for nodes it did not reach), only
+    kept when it was asked for. Origins and targets are graph node ids.
+    """
+
+    def __init__(self, origins: np.ndarray, targets: np.ndarray, distances: np.ndarray,
+                 predecessors: np.ndarray | None = None):
+        self.origins = origins
+        self.targets = targets
+        self.distances = distances
+        self.predecessors = predecessors
+
+    def times(self, avg_speed: float) -> np.ndarray:
+        """Travel time matrix in minutes for an average speed in meters per minute."""
+        return self.distances / avg_speed
+
+    def reachable(self) -> np.ndarray:
+        """Boolean matrix of the pairs that have a route."""
+        return np.isfinite(self.distances)
+
+    def path(self, i: int, j: int) -> list[int] | None:
+        """Node ids of the shortest path from origin i to target j, None if there is no route."""
+        if self.predecessors is None:
+            raise ValueError("The matrix was built without predecessors")
+        if not np.isfinite(self.distances[i, j]):
+            return None
+        tree = self.predecessors[i]
+        path = [int(self.targets[j])]
+        while path[-1] != self.origins[i]:
+            path.append(int(tree[path[-1]]))
+        path.reverse()
+        return path
+
+
+def _init_worker(matrix: csr_matrix) -> None:
+    global _worker_matrix
+    _worker_matrix = matrix
+
+
+def _run_chunk(origins: np.ndarray, targets: np.ndarray, max_distance: float,
+               predecessors: bool) -> tuple[np.ndarray, np.ndarray | None]:
+    return _settle(_worker_matrix, origins, targets, max_distance, predecessors)
+
+
+def _settle(matrix: csr_matrix, origins: np.ndarray, targets: np.ndarray, max_distance: float,
+            predecessors: bool) -> tuple[np.ndarray, np.ndarray | None]:
+    limit = max_distance if max_distance is not None else np.inf
+    if predecessors:
+        distances, tree = dijkstra(matrix, indices=origins, limit=limit, return_predecessors=True)
+        tree = tree.astype(np.int32)
+        tree[tree == NO_PREDECESSOR] = -1
+        return distances[:, targets], tree
+    distances = dijkstra(matrix, indices=origins, limit=limit)
+    return distances[:, targets], None
+
+
+def distance_matrix(graph: CompiledGraph, origins, targets, max_distance: float = None,
+                    predecessors: bool = False, workers: int = None) -> DistanceMatrix:
+    """
+    Shortest distance from every origin to every target (graph node ids). With
+    `max_distance` every search stops at that distance and farther pairs are inf.
+    `predecessors` keeps the shortest path tree of every origin (one row of
+    num_nodes ids per origin). The origins are searched in chunks that are
+    spread over `workers` processes.
+    """
+    origins = np.asarray(origins, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    matrix = to_sparse(graph)
+
+    num_chunks = max(1, -(-len(origins) // MATRIX_CHUNK_SIZE))
+    chunks = np.array_split(origins, num_chunks)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, num_chunks)
+
+    if workers <= 1:
+        results = [_settle(matrix, chunk, targets, max_distance, predecessors) for chunk in chunks]
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(matrix,)) as executor:
+            results = list(executor.map(_run_chunk, chunks, [targets] * num_chunks,
+                                        [max_distance] * num_chunks, [predecessors] * num_chunks))
+
+    distances = np.vstack([chunk_distances for chunk_distances, _ in results])
+    tree = np.vstack([chunk_tree for _, chunk_tree in results]) if predecessors else None
+    return DistanceMatrix(origins, targets, distances, tree)
+
+
+def road_distance_matrix(origins: list[int], targets: list[int], max_distance: float = None,
+                         predecessors: bool = False, workers: int = None) -> DistanceMatrix:
+    """
+    Distance matrix between OSM node ids on the road network. Nodes that are not
+    on the road network get inf distances. The origins and targets of the result
+    are road graph node ids, translate paths back with `road.node_ids`.
+    """
+    if GlobalState.road is None and GlobalState.road_tiles is not None:
+        # Not opened at startup when the road tiles are used
+        GlobalState.road = load_road_network()
+    road = GlobalState.road
+    if road is None:
+        raise ValueError("The distance matrix needs the road network cache")
+
+    graph = road.to_compiled()
+    origin_ids = [road.index_of(node) for node in origins]
+    target_ids = [road.index_of(node) for node in targets]
+    known_origins = [i for i, node in enumerate(origin_ids) if node is not None]
+    known_targets = [j for j, node in enumerate(target_ids) if node is not None]
+
+    distances = np.full((len(origins), len(targets)), np.inf)
+    tree = np.full((len(origins), graph.num_nodes), -1, dtype=np.int32) if predecessors else None
+    if known_origins and known_targets:
+        known = distance_matrix(graph, [origin_ids[i] for i in known_origins], [target_ids[j] for j in known_targets],
+                                max_distance, predecessors, workers)
+        distances[np.ix_(known_origins, known_targets)] = known.distances
+        if predecessors:
+            tree[known_origins] = known.predecessors
+
+    # Unknown nodes keep -1 as id, their rows and columns are all inf
+    origin_ids = np.array([-1 if node is None else node for node in origin_ids], dtype=np.int64)
+    target_ids = np.array([-1 if node is None else node for node in target_ids], dtype=np.int64)
+    return DistanceMatrix(origin_ids, target_ids, distances, tree)
@@ -0,0 +1,130 @@
+"""
+Helper functions for the measurements of a search.
+
+Every search engine fills the same SearchMetrics object, so the numbers of the
+algorithms can be compared: a node is expanded when it is taken from the
+frontier and its neighbors are looked at, generated when it is pushed on the
+frontier and a duplicate push is a push of a node that was pushed before.
+"""
+
+from contextlib import contextmanager
+import csv
+from dataclasses import asdict, dataclass, field
+import json
+from pathlib import Path
+import time
+import tracemalloc
+
+CSV_FIELDS = [
+    "algorithm", "goal", "expanded", "generated", "duplicates", "peak_frontier",
+    "wall_time", "cpu_time", "peak_memory", "cached",
+]
+COUNTER_FIELDS = ("expanded", "generated", "duplicates", "peak_frontier")
+
+
+@dataclass
+class SearchMetrics:
+    algorithm: str = None
+    goal: str = None
+    expanded: int = 0
+    generated: int = 0
+    duplicates: int = 0
+    peak_frontier: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_memory: int = None  # bytes, only when memory is traced
+    cached: bool = False
+    goals: list["SearchMetrics"] = field(default_factory=list)  # Per goal of a multi-goal search
+    iterations: list[dict] = field(default_factory=list)  # Per depth limit of iterative deepening
+
+    def record(self, expanded: int, generated: int, duplicates: int, peak_frontier: int) -> None:
+        """Add the counters of one search run."""
+        self.expanded += expanded
+        self.generated += generated
+        self.duplicates += duplicates
+        self.peak_frontier = max(self.peak_frontier, peak_frontier)
+
+    def add_goal(self, metrics: "SearchMetrics") -> None:
+        """Add the metrics of one leg of a multi-goal search to the totals."""
+        self.goals.append(metrics)
+        self.expanded += metrics.expanded
+        self.generated += metrics.generated
+        self.duplicates += metrics.duplicates
+        self.peak_frontier = max(self.peak_frontier, metrics.peak_frontier)
+        if metrics.peak_memory is not None:
+            self.peak_memory = max(self.peak_memory or 0, metrics.peak_memory)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def counters(self) -> dict:
+        """The counters of the totals and of every goal, without the timings."""
+        return {
+            **{name: getattr(self, name) for name in COUNTER_FIELDS},
+            "goals": [{"goal": goal.goal, **{name: getattr(goal, name) for name in COUNTER_FIELDS}} for goal in self.goals],
+        }
+
+    def restore(self, counters: dict) -> None:
+        """Take over the counters of a search whose result is reused from a cache."""
+        for name in COUNTER_FIELDS:
+            setattr(self, name, counters[name])
+        self.goals = [SearchMetrics(self.algorithm, cached=True, **goal) for goal in counters["goals"]]
+        self.cached = True
+
+    def to_rows(self) -> list[dict]:
+        """CSV rows: one per goal followed by the total."""
+        rows = [{name: getattr(metrics, name) for name in CSV_FIELDS} for metrics in self.goals]
+        rows.append({name: getattr(self, name) for name in CSV_FIELDS})
+        return rows
+
+    def save_json(self, filepath: Path) -> None:
+        with open(filepath, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def save_csv(self, filepath: Path) -> None:
+        with open(filepath, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.to_rows())
+
+
+@contextmanager
+def measure(metrics: SearchMetrics, trace_memory: bool = False):
+    """
+    Add the wall clock and CPU time of the block to `metrics`, and the peak
+    traced memory when `trace_memory` is set (tracemalloc slows the block down).
+    Memory is traced per block, blocks that trace memory should not be nested.
+    """
+    tracing = trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    elif trace_memory:
+        tracemalloc.reset_peak()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield metrics
+    finally:
+        metrics.wall_time += time.perf_counter() - wall_start
+        metrics.cpu_time += time.process_time() - cpu_start
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            metrics.peak_memory = max(metrics.peak_memory or 0, peak)
+        if tracing:
+            tracemalloc.stop()
+
+
+@contextmanager
+def measure_goal(metrics: SearchMetrics | None, goal: str):
+    """
+    Measure one leg of a multi-goal search and add it to `metrics`. Yields the
+    metrics of the leg, or None when no metrics are collected.
+    """
+    if metrics is None:
+        yield None
+        return
+
+    leg = SearchMetrics(metrics.algorithm, goal)
+    with measure(leg):
+        yield leg
+    metrics.add_goal(leg)
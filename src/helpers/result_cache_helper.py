@@ -0,0 +1,139 @@
+"""
+Helper functions for the search result cache.
+
+The same (algorithm, start, destinations, depth limit) query on the same location
+graph always gives the same result, so results are kept in a size-bounded LRU
+cache keyed by the query and a fingerprint of malang_graph, with the counters of
+the search that found them. The cache can be persisted to disk so it survives
+restarts, it is saved every RESULT_CACHE_SAVE_INTERVAL new results and on exit,
+entries of another graph are dropped. The file is replaced as a whole, so
+processes saving the same cache never leave it half written. UCS answers from
+the all-pairs table are no search, they are not cached.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+from rich.console import Console
+
+from config.config import DATA_DIR
+from helpers.metrics_helper import SearchMetrics
+from helpers.system_helper import write_json_atomic
+
+console = Console()
+
+RESULT_CACHE_FILE = Path(DATA_DIR) / "result_cache.json"
+RESULT_CACHE_VERSION = 3
+RESULT_CACHE_SIZE = 1000
+RESULT_CACHE_SAVE_INTERVAL = 20  # New results between two saves of a persisted cache
+
+
+def graph_fingerprint(malang_graph: list[dict]) -> str:
+    """Digest of the location graph, any change of a node or distance changes it."""
+    payload = json.dumps(malang_graph, sort_keys=True).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of search results: (algorithm, start, destinations, depth limit,
+    graph fingerprint) -> (result, search counters). Destinations are a string for single-goal
+    queries and a tuple for multi-goal ones, since their results differ in shape.
+    """
+
+    def __init__(self, graph_version: str, max_entries: int = RESULT_CACHE_SIZE, filepath: Path = None):
+        self.graph_version = graph_version
+        self.max_entries = max_entries
+        self.filepath = filepath
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.unsaved = 0  # New results since the last save
+
+    def key(self, algorithm: str, start: str, destinations: str | list[str], depth_limit: int = None) -> tuple:
+        if not isinstance(destinations, str):
+            destinations = tuple(destinations)
+        return algorithm, start, destinations, depth_limit, self.graph_version
+
+    def fetch(self, algorithm: str, start: str, destinations: str | list[str], depth_limit: int, compute: Callable,
+              metrics: SearchMetrics = None):
+        """
+        Cached result of the query, `compute` runs the search on a miss. `metrics`,
+        if given, is what `compute` fills. Its counters are kept with the result
+        and restored on a hit, a result cached without counters is searched again then.
+        """
+        key = self.key(algorithm, start, destinations, depth_limit)
+        if key in self.entries and (metrics is None or self.entries[key][1] is not None):
+            self.hits += 1
+            self.entries.move_to_end(key)
+            result, counters = self.entries[key]
+            if metrics is not None:
+                metrics.restore(counters)
+            return result
+
+        self.misses += 1
+        result = compute()
+        self.entries[key] = (result, metrics.counters() if metrics is not None else None)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.unsaved += 1
+        if self.unsaved >= RESULT_CACHE_SAVE_INTERVAL:
+            self.save()
+        return result
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, graph_version: str, filepath: Path = RESULT_CACHE_FILE, max_entries: int = RESULT_CACHE_SIZE) -> "ResultCache":
+        """
+        Load the persisted cache, results of another graph or format version are dropped.
+        """
+        cache = cls(graph_version, max_entries, filepath)
+        try:
+            with open(filepath, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+
+        if data.get("version") != RESULT_CACHE_VERSION or data.get("graph_version") != graph_version:
+            return cache
+
+        # Entries are stored from least to most recently used
+        for algorithm, start, destinations, depth_limit, result, counters in data.get("results", [])[-max_entries:]:
+            if isinstance(destinations, list):
+                destinations = tuple(destinations)
+                result = [tuple(leg) for leg in result] if result is not None else None
+            else:
+                result = tuple(result) if result is not None else None
+            cache.entries[(algorithm, start, destinations, depth_limit, graph_version)] = (result, counters)
+        return cache
+
+    def save(self) -> None:
+        if self.filepath is None or not self.unsaved:
+            return
+        try:
+            if not os.path.exists(Path(self.filepath).parent):
+                os.makedirs(Path(self.filepath).parent)
+            write_json_atomic({
+                "version": RESULT_CACHE_VERSION,
+                "graph_version": self.graph_version,
+                "results": [list(key[:4]) + [result, counters] for key, (result, counters) in self.entries.items()],
+            }, self.filepath)
+            self.unsaved = 0
+        except OSError as e:
+            console.print(f"[yellow]Gagal menyimpan cache hasil pencarian: {str(e)}[/yellow]")
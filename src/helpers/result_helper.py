@@ -1,13 +1,16 @@
 import datetime
 import folium
-import networkx as nx
 import os
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
+from typing import Callable
 import webbrowser
 
-from config.config import MAPS_DIR, JINJA_ENV
+from config.config import MAPS_DIR, JINJA_ENV, MAP_SIMPLIFY_ZOOM, TRACE_SEARCH_MEMORY
+from helpers.map_helper import simplify, zoom_tolerance
+from helpers.metrics_helper import SearchMetrics, measure
+from helpers.segment_cache_helper import get_segment
 from store.states import GlobalState
 
 console = Console()
@@ -17,7 +20,9 @@ def visualize_route(route: list) -> None:
     Visualizes the route on a map using folium and saves it to a file with a unique name.
     """
     try:
-        if GlobalState.G is None or GlobalState.location_nodes is None:
+        # Tiles of the route area only, when the road network is tiled
+        road = GlobalState.road_tiles or GlobalState.road
+        if road is None or GlobalState.location_nodes is None:
             console.print("[red]Tidak dapat memvisualisasikan rute: data OSM tidak tersedia[/red]")
             return
         
@@ -44,14 +49,19 @@ def visualize_route(route: list) -> None:
         for i in range(len(route_nodes)-1):
             pairs.append((route_nodes[i], route_nodes[i+1]))
             
-        map_center = [GlobalState.G.nodes[route_nodes[0]]['y'], GlobalState.G.nodes[route_nodes[0]]['x']]
+        map_center = list(road.coordinates(route_nodes[0]))
         route_map = folium.Map(location=map_center, zoom_start=13)
         
         for u, v in pairs:
             try:
-                path = nx.shortest_path(GlobalState.G, u, v, weight='length')
+                # Cached road segment, only computed the first time it is drawn
+                segment = get_segment(road, GlobalState.segment_cache, u, v)
+                if segment is None:
+                    console.print(f"[yellow]Tidak ada jalur jalan dari node {u} ke {v}[/yellow]")
+                    continue
                 
-                path_coords = [(GlobalState.G.nodes[node]['y'], GlobalState.G.nodes[node]['x']) for node in path]
+                _, path_coords = segment
+                path_coords = simplify(path_coords, zoom_tolerance(MAP_SIMPLIFY_ZOOM, map_center[0]))
                 
                 folium.PolyLine(
                     path_coords, 
@@ -74,8 +84,7 @@ def visualize_route(route: list) -> None:
                     lat = node_to_location[node]["latitude"]
                     lon = node_to_location[node]["longitude"]
                 else:
-                    lat = GlobalState.G.nodes[node]['y']
-                    lon = GlobalState.G.nodes[node]['x']
+                    lat, lon = road.coordinates(node)
                 
                 if i == 0:  # Start
                     icon = folium.Icon(color='green', icon='play')
@@ -96,6 +105,8 @@ def visualize_route(route: list) -> None:
             except Exception as e:
                 console.print(f"[yellow]Error adding marker for {route[i]}: {str(e)}[/yellow]")
         
+        GlobalState.segment_cache.save()
+        
         if not os.path.exists(MAPS_DIR):
             os.makedirs(MAPS_DIR)
         
@@ -113,10 +124,37 @@ def visualize_route(route: list) -> None:
     except Exception as e:
         console.print(f"[red]Error saat membuat visualisasi: {str(e)}[/red]")
 
-def show_result(method: str, result: tuple[list[str], float, int] | list[tuple[list[str], float, int]], time_computation: float) -> None:
+def cached_search(metrics: SearchMetrics, compute: Callable, depth_limit: int = None):
+    """
+    Run the search of the current query through the result cache and measure it
+    into `metrics`. The search illustration needs the real search, so it always
+    runs when that is enabled. Cached results are unpruned, a pruned search always runs.
+    UCS answers from the all-pairs table are no search and not cached either.
+    """
+    cache = GlobalState.result_cache
+    all_pairs = GlobalState.all_pairs
+    table_lookup = metrics.algorithm == "UCS" and all_pairs is not None and all_pairs.covers(GlobalState.compiled_graph)
+    if cache is None or GlobalState.show_process or GlobalState.cost_budget is not None or table_lookup:
+        with measure(metrics, TRACE_SEARCH_MEMORY):
+            return compute()
+
+    hits = cache.hits
+    with measure(metrics, TRACE_SEARCH_MEMORY):
+        result = cache.fetch(metrics.algorithm, GlobalState.start_location, GlobalState.destination_location, depth_limit,
+                             compute, metrics)
+    if cache.hits > hits:
+        console.print(f"[dim]Hasil diambil dari cache ({cache.hits} hit, {cache.misses} miss)[/dim]")
+    return result
+
+def show_result(method: str, result: tuple[list[str], float, int] | list[tuple[list[str], float, int]], time_computation: float,
+                metrics: SearchMetrics = None) -> None:
     """
-    Show the result of the search in a table format.
+    Show the result of the search in a table format, with the search metrics when given.
     """
+    if not result and GlobalState.cost_budget is not None:
+        console.print(Panel(f"[bold red]INFEASIBLE: tidak ada rute yang bisa ditempuh dalam batas waktu operasional "
+                            f"{GlobalState.max_operating_time} menit ({GlobalState.cost_budget:.0f} meter).[/bold red]"))
+        return
     if not result:
         if GlobalState.is_multi:
             console.print(Panel(f"[bold red]Tidak ada rute yang ditemukan dari {GlobalState.start_location} ke salah satu tujuan.[/bold red]"))
@@ -155,4 +193,73 @@ def show_result(method: str, result: tuple[list[str], float, int] | list[tuple[l
     
     table.add_row("Time computation", f"{time_computation:.4f} seconds")
     
+    if metrics is not None:
+        if metrics.cached:
+            table.add_row("Search metrics", "Result from cache, counters of the search that found it")
+        else:
+            table.add_row("CPU time", f"{metrics.cpu_time:.4f} seconds")
+        table.add_row("Expanded / generated nodes", f"{metrics.expanded} / {metrics.generated}")
+        table.add_row("Duplicate pushes", str(metrics.duplicates))
+        table.add_row("Peak frontier", str(metrics.peak_frontier))
+        if metrics.peak_memory is not None:
+            table.add_row("Peak memory", f"{metrics.peak_memory / 1024:.1f} KiB")
+        for i, goal in enumerate(metrics.goals):
+            timing = "from cache" if goal.cached else f"{goal.wall_time:.4f} seconds"
+            table.add_row(f"Metrics route-{i+1}", f"{goal.expanded} expanded, {goal.generated} generated, "
+                                                  f"peak frontier {goal.peak_frontier}, {timing}")
+    
+    console.print(table)
+
+def show_comparison(results: list[dict], time_computation: float) -> None:
+    """
+    Show the results of several algorithms on the same query in one table, the
+    cheapest route is highlighted.
+    """
+    distances = [r["distance"] for r in results if r.get("distance") is not None]
+    best_distance = min(distances) if distances else None
+    
+    destinations = GlobalState.destination_location if GlobalState.is_multi else [GlobalState.destination_location]
+    table = Table(title=f"Comparison from {GlobalState.start_location} to {len(destinations)} destination(s)")
+    table.add_column("Algorithm", style="cyan")
+    table.add_column("Status")
+    table.add_column("Distance", justify="right")
+    table.add_column("ETA", justify="right")
+    table.add_column("Expanded", justify="right")
+    table.add_column("Generated", justify="right")
+    table.add_column("Time computation", justify="right")
+    table.add_column("CPU time", justify="right")
+    table.add_column("Peak memory", justify="right")
+    
+    for r in results:
+        if r["status"] in ("timeout", "error"):
+            table.add_row(r["algorithm"], f"[red]{r['status']}[/red]", "-", "-", "-", "-", "-", "-", "-")
+            continue
+        
+        metrics = r["metrics"]
+        memory = f"{metrics['peak_memory'] / 1024:.1f} KiB" if metrics["peak_memory"] is not None else "-"
+        if r["distance"] is None:
+            table.add_row(r["algorithm"], f"[yellow]{r['status']}[/yellow]", "-", "-", str(metrics["expanded"]),
+                          str(metrics["generated"]), f"{metrics['wall_time']:.4f} s", f"{metrics['cpu_time']:.4f} s", memory)
+            continue
+        
+        estimated_time = r["distance"] / GlobalState.avg_speed if GlobalState.avg_speed else None
+        eta = f"{estimated_time:.2f} min" if estimated_time is not None else "-"
+        if estimated_time is not None and estimated_time > GlobalState.max_operating_time:
+            eta = f"[red]{eta}[/red]"
+        
+        optimal = r["distance"] == best_distance
+        table.add_row(
+            f"{r['algorithm']} ★" if optimal else r["algorithm"],
+            "[green]found[/green]",
+            f"{r['distance']:.2f} m",
+            eta,
+            str(metrics["expanded"]),
+            str(metrics["generated"]),
+            f"{metrics['wall_time']:.4f} s",
+            f"{metrics['cpu_time']:.4f} s",
+            memory,
+            style="bold green" if optimal else None,
+        )
+    
     console.print(table)
+    console.print(f"[dim]★ cheapest route, all algorithms ran in parallel in {time_computation:.4f} seconds[/dim]")
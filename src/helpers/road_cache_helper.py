@@ -0,0 +1,180 @@
+"""
+Helper functions for the compact on-disk road network cache.
+
+Only the parts of the OSM graph that are used are stored, as flat NumPy arrays:
+node ids (sorted), node coordinates and the directed edges in CSR form with
+their lengths. The arrays are opened memory-mapped, so loading is near-instant
+and several processes share the same pages instead of holding a private copy.
+The graph of the search engines (to_compiled) reads these arrays directly, see
+MappedGraph.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+from rich.console import Console
+
+from config.config import DATA_DIR
+from helpers.graph_helper import MappedGraph, csr_from_edges
+
+console = Console()
+
+ROAD_CACHE_DIR = Path(DATA_DIR) / "road_cache"
+ROAD_CACHE_VERSION = 1
+ROAD_CACHE_ARRAYS = ("node_ids", "node_x", "node_y", "offsets", "targets", "lengths")
+
+
+class RoadNetwork:
+    """
+    Read-only road network backed by (memory-mapped) NumPy arrays.
+
+    Nodes are sorted by OSM id so an OSM id is turned into an array index with a
+    binary search, the outgoing edges of index `i` are
+    `targets[offsets[i]:offsets[i + 1]]` with the matching `lengths`.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray], digest: str):
+        self.node_ids = arrays["node_ids"]
+        self.node_x = arrays["node_x"]
+        self.node_y = arrays["node_y"]
+        self.offsets = arrays["offsets"]
+        self.targets = arrays["targets"]
+        self.lengths = arrays["lengths"]
+        self.digest = digest
+        self._compiled = {}
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def index_of(self, node_id: int) -> int | None:
+        """Array index of an OSM node id, None if the node is not in the network."""
+        i = int(np.searchsorted(self.node_ids, node_id))
+        if i < len(self.node_ids) and self.node_ids[i] == node_id:
+            return i
+        return None
+
+    def coordinates_at(self, index: int) -> tuple[float, float]:
+        """(latitude, longitude) of a node index."""
+        return float(self.node_y[index]), float(self.node_x[index])
+
+    def coordinates(self, node_id: int) -> tuple[float, float]:
+        """(latitude, longitude) of an OSM node id."""
+        return self.coordinates_at(self.index_of(node_id))
+
+    def edge_sources(self) -> np.ndarray:
+        """Source index of every edge, expanded from the CSR offsets."""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.offsets))
+
+    def to_compiled(self, undirected: bool = False) -> MappedGraph:
+        """
+        Compiled graph for the search engines, the names are the OSM node ids.
+        The directed graph reads the cache arrays, the undirected one merges both
+        directions into new arrays once and reuses them afterwards.
+        """
+        if undirected not in self._compiled:
+            self._compiled[undirected] = self._compile(undirected)
+        return self._compiled[undirected]
+
+    def _compile(self, undirected: bool) -> MappedGraph:
+        if not undirected:
+            return MappedGraph(self.node_ids, self.offsets, self.targets, self.lengths)
+
+        sources = self.edge_sources()
+        targets = self.targets.astype(np.int64)
+        return MappedGraph(self.node_ids, *csr_from_edges(
+            self.num_nodes,
+            np.concatenate((sources, targets)),
+            np.concatenate((targets, sources)),
+            np.concatenate((self.lengths, self.lengths)),
+        ))
+
+
+def save_road_network(G: nx.MultiDiGraph, directory: Path = ROAD_CACHE_DIR) -> RoadNetwork | None:
+    """
+    Convert an OSM MultiDiGraph into the road network cache and open it.
+    """
+    try:
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        node_ids = np.array(sorted(G.nodes), dtype=np.int64)
+        edges = list(G.edges(data="length"))
+        sources = np.searchsorted(node_ids, np.fromiter((u for u, _, _ in edges), dtype=np.int64, count=len(edges)))
+        targets = np.searchsorted(node_ids, np.fromiter((v for _, v, _ in edges), dtype=np.int64, count=len(edges)))
+        lengths = np.fromiter((length for _, _, length in edges), dtype=np.float64, count=len(edges))
+        offsets, targets, lengths = csr_from_edges(len(node_ids), sources, targets, lengths)
+
+        arrays = {
+            "node_ids": node_ids,
+            "node_x": np.array([G.nodes[n]["x"] for n in node_ids.tolist()], dtype=np.float64),
+            "node_y": np.array([G.nodes[n]["y"] for n in node_ids.tolist()], dtype=np.float64),
+            "offsets": offsets,
+            "targets": targets,
+            "lengths": lengths,
+        }
+
+        digest = hashlib.blake2b(digest_size=16)
+        for name in ROAD_CACHE_ARRAYS:
+            np.save(Path(directory) / f"{name}.npy", arrays[name])
+            digest.update(arrays[name].tobytes())
+
+        # The metadata is written last, a cache without it is incomplete
+        with open(Path(directory) / "meta.json", "w") as f:
+            json.dump({
+                "version": ROAD_CACHE_VERSION,
+                "num_nodes": len(node_ids),
+                "num_edges": len(targets),
+                "digest": digest.hexdigest(),
+            }, f, indent=4)
+
+        console.print(f"[green]Road network cache saved to [bold]{directory}[/bold][/green]")
+        return load_road_network(directory)
+    except Exception as e:
+        console.print(f"[red]Error while saving the road network cache: {str(e)}[/red]")
+        return None
+
+
+def road_network_digest(directory: Path = ROAD_CACHE_DIR) -> str | None:
+    """
+    Digest of the road network cache read from its metadata only, the arrays are
+    not opened. None if there is no cache of the current format version.
+    """
+    try:
+        with open(Path(directory) / "meta.json", "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta.get("digest") if meta.get("version") == ROAD_CACHE_VERSION else None
+
+
+def load_road_network(directory: Path = ROAD_CACHE_DIR) -> RoadNetwork | None:
+    """
+    Open the road network cache memory-mapped. Returns None if there is no
+    cache or it was written by another format version.
+    """
+    try:
+        with open(Path(directory) / "meta.json", "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("version") != ROAD_CACHE_VERSION:
+        console.print(f"[yellow]Road network cache version {meta.get('version')} is not supported, rebuilding...[/yellow]")
+        return None
+
+    try:
+        arrays = {name: np.load(Path(directory) / f"{name}.npy", mmap_mode="r") for name in ROAD_CACHE_ARRAYS}
+    except OSError as e:
+        console.print(f"[yellow]Road network cache is incomplete: {str(e)}[/yellow]")
+        return None
+
+    return RoadNetwork(arrays, meta["digest"])
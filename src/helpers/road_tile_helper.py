@@ -0,0 +1,284 @@
+"""
+Helper functions for the tiled road network cache.
+
+The road network is split into a grid of square tiles (ROAD_TILE_SIZE degrees).
+Every tile file holds its nodes with their coordinates, their outgoing and
+incoming edges and which of them are boundary nodes (with an edge to another
+tile). Only the node index (sorted OSM ids and the tile of every node) is opened
+at startup, memory-mapped. A tile is loaded the first time a search or a map
+touches one of its nodes and the least recently used tiles are dropped when the
+loaded tiles exceed the memory cap.
+
+Node ids are the array indexes of the full road network cache, so routes and
+segments are the same with and without tiles.
+"""
+
+from collections import OrderedDict
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from rich.console import Console
+
+from config.config import DATA_DIR, ROAD_TILE_MEMORY_CAP, ROAD_TILE_SIZE
+from helpers.road_cache_helper import RoadNetwork
+
+console = Console()
+
+ROAD_TILE_DIR = Path(DATA_DIR) / "road_tiles"
+ROAD_TILE_VERSION = 1
+TILE_ARRAYS = ("nodes", "node_x", "node_y", "boundary",
+               "out_offsets", "out_targets", "out_lengths", "in_offsets", "in_sources", "in_lengths")
+
+
+def _group(keys: np.ndarray, num_groups: int) -> tuple[np.ndarray, np.ndarray]:
+    """Stable order of the items by key and the start of every key group in it."""
+    order = np.argsort(keys, kind="stable")
+    starts = np.searchsorted(keys[order], np.arange(num_groups + 1))
+    return order, starts
+
+
+def _local_csr(nodes: np.ndarray, ends: np.ndarray, others: np.ndarray, lengths: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSR arrays over the sorted `nodes` of a tile from its edges (`ends` in the tile, sorted)."""
+    offsets = np.searchsorted(ends, np.append(nodes, np.iinfo(np.int64).max)).astype(np.int64)
+    offsets[-1] = len(ends)
+    return offsets, others.astype(np.int64), lengths.astype(np.float64)
+
+
+def save_road_tiles(road: RoadNetwork, directory: Path = ROAD_TILE_DIR, tile_size: float = ROAD_TILE_SIZE) -> None:
+    """
+    Split the road network cache into tiles.
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    rows = np.floor(np.asarray(road.node_y) / tile_size).astype(np.int64)
+    columns = np.floor(np.asarray(road.node_x) / tile_size).astype(np.int64)
+    keys, node_tiles = np.unique(np.column_stack((rows, columns)), axis=0, return_inverse=True)
+    node_tiles = node_tiles.reshape(-1).astype(np.int32)
+    num_tiles = len(keys)
+
+    sources = road.edge_sources()
+    targets = np.asarray(road.targets, dtype=np.int64)
+    lengths = np.asarray(road.lengths, dtype=np.float64)
+    crossing = node_tiles[sources] != node_tiles[targets]
+    boundary = np.zeros(road.num_nodes, dtype=bool)
+    boundary[sources[crossing]] = True
+    boundary[targets[crossing]] = True
+
+    # Edges are sorted by source, the stable grouping keeps that order within a tile
+    node_order, node_starts = _group(node_tiles, num_tiles)
+    out_order, out_starts = _group(node_tiles[sources], num_tiles)
+    in_sort = np.argsort(targets, kind="stable")
+    in_order, in_starts = _group(node_tiles[targets[in_sort]], num_tiles)
+    in_order = in_sort[in_order]
+
+    tiles = []
+    for tile in range(num_tiles):
+        nodes = node_order[node_starts[tile]:node_starts[tile + 1]].astype(np.int64)
+        out_edges = out_order[out_starts[tile]:out_starts[tile + 1]]
+        in_edges = in_order[in_starts[tile]:in_starts[tile + 1]]
+        out_offsets, out_targets, out_lengths = _local_csr(nodes, sources[out_edges], targets[out_edges], lengths[out_edges])
+        in_offsets, in_sources, in_lengths = _local_csr(nodes, targets[in_edges], sources[in_edges], lengths[in_edges])
+
+        np.savez(Path(directory) / f"tile_{tile}.npz", nodes=nodes,
+                 node_x=np.asarray(road.node_x)[nodes], node_y=np.asarray(road.node_y)[nodes], boundary=boundary[nodes],
+                 out_offsets=out_offsets, out_targets=out_targets, out_lengths=out_lengths,
+                 in_offsets=in_offsets, in_sources=in_sources, in_lengths=in_lengths)
+        tiles.append({
+            "key": keys[tile].tolist(),
+            "num_nodes": len(nodes),
+            "num_edges": len(out_edges),
+            "num_boundary": int(boundary[nodes].sum()),
+        })
+
+    np.save(Path(directory) / "node_ids.npy", np.asarray(road.node_ids))
+    np.save(Path(directory) / "node_tiles.npy", node_tiles)
+
+    # The metadata is written last, tiles without it are incomplete
+    with open(Path(directory) / "meta.json", "w") as f:
+        json.dump({
+            "version": ROAD_TILE_VERSION,
+            "digest": road.digest,
+            "tile_size": tile_size,
+            "num_nodes": road.num_nodes,
+            "num_edges": road.num_edges,
+            "tiles": tiles,
+        }, f)
+    console.print(f"[green]Road network split into {num_tiles} tiles in [bold]{directory}[/bold][/green]")
+
+
+class TiledRoadNetwork:
+    """
+    Road network that loads its tiles on demand, with the same node ids (array
+    indexes) and lookups as RoadNetwork. Loaded tiles are kept in LRU order and
+    dropped once they take more than `memory_cap` bytes, the tile in use stays.
+    """
+
+    def __init__(self, directory: Path, meta: dict, memory_cap: int = ROAD_TILE_MEMORY_CAP):
+        self.directory = Path(directory)
+        self.digest = meta["digest"]
+        self.tile_size = meta["tile_size"]
+        self.tiles_meta = meta["tiles"]
+        self.num_nodes = meta["num_nodes"]
+        self.num_edges = meta["num_edges"]
+        self.node_ids = np.load(self.directory / "node_ids.npy", mmap_mode="r")
+        self.node_tiles = np.load(self.directory / "node_tiles.npy", mmap_mode="r")
+        self.memory_cap = memory_cap
+        self.tiles = OrderedDict()
+        self.memory = 0
+        self.loads = 0
+        self.evictions = 0
+        self._compiled = {}
+
+    @property
+    def num_tiles(self) -> int:
+        return len(self.tiles_meta)
+
+    def tile(self, tile: int) -> dict[str, np.ndarray]:
+        """Arrays of a tile, loaded on first use."""
+        if tile in self.tiles:
+            self.tiles.move_to_end(tile)
+            return self.tiles[tile]
+
+        with np.load(self.directory / f"tile_{tile}.npz") as data:
+            arrays = {name: data[name] for name in TILE_ARRAYS}
+        self.tiles[tile] = arrays
+        self.memory += sum(array.nbytes for array in arrays.values())
+        self.loads += 1
+
+        while self.memory > self.memory_cap and len(self.tiles) > 1:
+            _, evicted = self.tiles.popitem(last=False)
+            self.memory -= sum(array.nbytes for array in evicted.values())
+            self.evictions += 1
+        return arrays
+
+    def _locate(self, index: int) -> tuple[dict[str, np.ndarray], int]:
+        """Tile arrays of a node index and the position of the node in the tile."""
+        arrays = self.tile(int(self.node_tiles[index]))
+        return arrays, int(np.searchsorted(arrays["nodes"], index))
+
+    def index_of(self, node_id: int) -> int | None:
+        """Array index of an OSM node id, None if the node is not in the network."""
+        i = int(np.searchsorted(self.node_ids, node_id))
+        if i < len(self.node_ids) and self.node_ids[i] == node_id:
+            return i
+        return None
+
+    def coordinates_at(self, index: int) -> tuple[float, float]:
+        """(latitude, longitude) of a node index."""
+        arrays, position = self._locate(index)
+        return float(arrays["node_y"][position]), float(arrays["node_x"][position])
+
+    def coordinates(self, node_id: int) -> tuple[float, float]:
+        """(latitude, longitude) of an OSM node id."""
+        return self.coordinates_at(self.index_of(node_id))
+
+    def is_boundary(self, index: int) -> bool:
+        """Whether the node has an edge to another tile."""
+        arrays, position = self._locate(index)
+        return bool(arrays["boundary"][position])
+
+    def neighbors(self, index: int, outgoing: bool = True, incoming: bool = False) -> zip:
+        """(neighbor index, length) pairs over the outgoing and/or incoming edges of a node."""
+        arrays, position = self._locate(index)
+        targets, lengths = [], []
+        if outgoing:
+            begin, end = int(arrays["out_offsets"][position]), int(arrays["out_offsets"][position + 1])
+            targets += arrays["out_targets"][begin:end].tolist()
+            lengths += arrays["out_lengths"][begin:end].tolist()
+        if incoming:
+            begin, end = int(arrays["in_offsets"][position]), int(arrays["in_offsets"][position + 1])
+            targets += arrays["in_sources"][begin:end].tolist()
+            lengths += arrays["in_lengths"][begin:end].tolist()
+        if outgoing and incoming:
+            # Merged like csr_from_edges: the shortest edge per neighbor, sorted by id
+            shortest = {}
+            for target, length in zip(targets, lengths):
+                if length < shortest.get(target, float("inf")):
+                    shortest[target] = length
+            targets = sorted(shortest)
+            lengths = [shortest[target] for target in targets]
+        return zip(targets, lengths)
+
+    def to_compiled(self, undirected: bool = False) -> "TiledGraph":
+        """Graph view for the search engines, the names are the OSM node ids."""
+        if undirected not in self._compiled:
+            self._compiled[undirected] = TiledGraph(self, True, undirected)
+        return self._compiled[undirected]
+
+    def stats(self) -> dict:
+        return {
+            "tiles": self.num_tiles,
+            "loaded": len(self.tiles),
+            "memory": self.memory,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+
+class TiledGraph:
+    """
+    Search engine view of a TiledRoadNetwork with the lookups of CompiledGraph,
+    the edges are read from the tiles as the search reaches them. `outgoing` and
+    `incoming` select the edge directions a node's neighbors are taken from.
+    """
+
+    def __init__(self, tiles: TiledRoadNetwork, outgoing: bool = True, incoming: bool = False):
+        self.tiles = tiles
+        self.outgoing = outgoing
+        self.incoming = incoming
+        self._reverse = None
+
+    @property
+    def num_nodes(self) -> int:
+        return self.tiles.num_nodes
+
+    @property
+    def names(self) -> list[int]:
+        """OSM id of every node, reads the whole node index."""
+        return self.tiles.node_ids.tolist()
+
+    def id_of(self, name: int) -> int | None:
+        return self.tiles.index_of(name)
+
+    def name_of(self, node: int) -> int:
+        return int(self.tiles.node_ids[node])
+
+    def to_names(self, nodes: list[int]) -> list[int]:
+        return self.tiles.node_ids[nodes].tolist()
+
+    def neighbors(self, node: int) -> zip:
+        return self.tiles.neighbors(node, self.outgoing, self.incoming)
+
+    def degree(self, node: int) -> int:
+        return sum(1 for _ in self.neighbors(node))
+
+    def reverse(self) -> "TiledGraph":
+        """Same graph with every edge reversed, the tiles are shared."""
+        if self._reverse is None:
+            self._reverse = TiledGraph(self.tiles, self.incoming, self.outgoing)
+        return self._reverse
+
+
+def load_road_tiles(directory: Path = ROAD_TILE_DIR, digest: str = None,
+                    memory_cap: int = ROAD_TILE_MEMORY_CAP) -> TiledRoadNetwork | None:
+    """
+    Open the tiled road network. Returns None if there are no tiles, they were
+    written by another format version or, when `digest` is given, of other road data.
+    """
+    try:
+        with open(Path(directory) / "meta.json", "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("version") != ROAD_TILE_VERSION or (digest is not None and meta.get("digest") != digest):
+        return None
+
+    try:
+        return TiledRoadNetwork(directory, meta, memory_cap)
+    except OSError as e:
+        console.print(f"[yellow]Road tiles are incomplete: {str(e)}[/yellow]")
+        return None
@@ -0,0 +1,147 @@
+"""
+Helper functions for the road segment polyline cache.
+
+The road-level route between two consecutive stops of a route is the same every
+time it is drawn, so its node sequence and coordinates are kept in a persistent,
+size-bounded LRU cache keyed by (u, v, graph_version).
+"""
+
+from collections import OrderedDict
+import json
+import os
+from pathlib import Path
+
+from rich.console import Console
+
+from config.config import DATA_DIR, USE_CONTRACTION_HIERARCHY
+from helpers.contraction_helper import load_contraction_hierarchy
+from helpers.distance_helper import dijkstra_to_targets
+from helpers.graph_helper import build_path
+from helpers.road_cache_helper import RoadNetwork
+from helpers.road_tile_helper import TiledRoadNetwork
+from helpers.system_helper import write_json_atomic
+
+console = Console()
+
+SEGMENT_CACHE_FILE = Path(DATA_DIR) / "segment_cache.json"
+SEGMENT_CACHE_SIZE = 5000
+
+
+class SegmentCache:
+    """
+    LRU cache of road segments: (u, v, graph_version) -> (road node ids, [(lat, lon)]).
+    """
+
+    def __init__(self, graph_version: str, max_entries: int = SEGMENT_CACHE_SIZE):
+        self.graph_version = graph_version
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.modified = False
+
+    def get(self, u: int, v: int) -> tuple[list[int], list[tuple[float, float]]] | None:
+        key = (u, v, self.graph_version)
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, u: int, v: int, nodes: list[int], coordinates: list[tuple[float, float]]) -> None:
+        key = (u, v, self.graph_version)
+        self.entries[key] = (nodes, coordinates)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.modified = True
+
+    def __contains__(self, pair: tuple[int, int]) -> bool:
+        return (pair[0], pair[1], self.graph_version) in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, graph_version: str, filepath: Path = SEGMENT_CACHE_FILE, max_entries: int = SEGMENT_CACHE_SIZE) -> "SegmentCache":
+        """
+        Load the persisted cache, segments of another graph version are dropped.
+        """
+        cache = cls(graph_version, max_entries)
+        try:
+            with open(filepath, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+
+        if data.get("graph_version") != graph_version:
+            return cache
+
+        # Entries are stored from least to most recently used
+        for u, v, nodes, coordinates in data.get("segments", [])[-max_entries:]:
+            cache.entries[(u, v, graph_version)] = (nodes, [tuple(c) for c in coordinates])
+        return cache
+
+    def save(self, filepath: Path = SEGMENT_CACHE_FILE) -> None:
+        if not self.modified:
+            return
+        try:
+            if not os.path.exists(Path(filepath).parent):
+                os.makedirs(Path(filepath).parent)
+            write_json_atomic({
+                "graph_version": self.graph_version,
+                "segments": [[u, v, nodes, coordinates] for (u, v, _), (nodes, coordinates) in self.entries.items()],
+            }, filepath)
+            self.modified = False
+        except OSError as e:
+            console.print(f"[yellow]Gagal menyimpan cache segmen jalan: {str(e)}[/yellow]")
+
+
+def compute_segments(road: RoadNetwork | TiledRoadNetwork, cache: SegmentCache, source: int, targets: set[int]) -> None:
+    """
+    Compute the road segments from one OSM node to several others with a single
+    Dijkstra over the directed road graph, or contraction hierarchy queries, and
+    store them in the cache.
+    """
+    graph = road.to_compiled()
+    source_index = graph.id_of(source)
+    if source_index is None:
+        return
+
+    target_indexes = {graph.id_of(t): t for t in targets if graph.id_of(t) is not None}
+    paths = {}
+    if USE_CONTRACTION_HIERARCHY:
+        hierarchy = load_contraction_hierarchy(road)
+        for target_index in target_indexes:
+            found = hierarchy.query(source_index, target_index)
+            if found is not None:
+                paths[target_index] = found[1]
+    else:
+        parents = {}
+        for target_index in dijkstra_to_targets(graph, source_index, set(target_indexes), parents):
+            paths[target_index] = build_path(parents, target_index)
+
+    for target_index, indexes in paths.items():
+        nodes = graph.to_names(indexes)
+        coordinates = [road.coordinates_at(i) for i in indexes]
+        cache.put(source, target_indexes[target_index], nodes, coordinates)
+
+
+def get_segment(road: RoadNetwork | TiledRoadNetwork, cache: SegmentCache, u: int, v: int) -> tuple[list[int], list[tuple[float, float]]] | None:
+    """
+    Road node ids and coordinates of the shortest road route from u to v,
+    None if there is no route.
+    """
+    segment = cache.get(u, v)
+    if segment is None:
+        compute_segments(road, cache, u, {v})
+        segment = cache.get(u, v)
+    return segment
+
+
+def warm_segment_cache(road: RoadNetwork | TiledRoadNetwork, cache: SegmentCache, pairs: dict[int, set[int]]) -> None:
+    """
+    Fill the cache for every (u, v) pair that is not cached yet, one Dijkstra per source.
+    """
+    for source, targets in pairs.items():
+        missing = {target for target in targets if (source, target) not in cache}
+        if missing:
+            compute_segments(road, cache, source, missing)
+    cache.save()
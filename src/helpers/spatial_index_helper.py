@@ -0,0 +1,108 @@
+"""
+Helper functions for snapping coordinates to the nearest road node.
+
+The road nodes are put in a KD-tree once, as points on the unit sphere, so the
+nearest node by straight-line (chord) distance is also the nearest by
+great-circle distance. Whole arrays of points are snapped in one vectorized
+query. The tree is saved next to the road network cache and only rebuilt when
+the road network changes.
+"""
+
+from pathlib import Path
+import pickle
+
+import numpy as np
+from rich.console import Console
+from scipy.spatial import cKDTree
+
+from helpers.road_cache_helper import ROAD_CACHE_DIR, RoadNetwork
+
+console = Console()
+
+EARTH_RADIUS = 6_371_008.8  # meters
+SPATIAL_INDEX_FILE = "spatial_index.pkl"
+NO_NODE = -1  # Node id of points without a road node within the snap radius
+
+
+def to_unit_sphere(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Cartesian (x, y, z) points on the unit sphere of latitudes and longitudes in degrees."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_meters(chord: np.ndarray) -> np.ndarray:
+    """Great-circle distance in meters of a chord length on the unit sphere."""
+    return 2 * EARTH_RADIUS * np.arcsin(np.minimum(chord, 2.0) / 2)
+
+
+def meters_to_chord(meters: float) -> float:
+    """Chord length on the unit sphere of a great-circle distance in meters."""
+    return 2 * np.sin(min(meters / EARTH_RADIUS, np.pi) / 2)
+
+
+class SpatialIndex:
+    """
+    KD-tree over the coordinates of the road nodes.
+    """
+
+    def __init__(self, node_ids: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray, digest: str = None):
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.tree = cKDTree(to_unit_sphere(latitudes, longitudes))
+        self.digest = digest
+
+    @classmethod
+    def from_road(cls, road: RoadNetwork) -> "SpatialIndex":
+        return cls(road.node_ids, road.node_y, road.node_x, road.digest)
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def snap(self, latitudes, longitudes, max_distance: float = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest road node of every point. Returns the OSM node ids and the snap
+        distances in meters. Points farther than `max_distance` meters from every
+        node get node id NO_NODE and distance inf.
+        """
+        points = to_unit_sphere(np.atleast_1d(latitudes), np.atleast_1d(longitudes))
+        upper_bound = meters_to_chord(max_distance) if max_distance is not None else np.inf
+        chords, indices = self.tree.query(points, k=1, distance_upper_bound=upper_bound, workers=-1)
+
+        found = indices < len(self.node_ids)
+        node_ids = np.full(len(points), NO_NODE, dtype=np.int64)
+        node_ids[found] = self.node_ids[indices[found]]
+        distances = np.full(len(points), np.inf)
+        distances[found] = chord_to_meters(chords[found])
+        return node_ids, distances
+
+    def nearest_node(self, latitude: float, longitude: float, max_distance: float = None) -> int | None:
+        """OSM node id nearest to one point, None if there is none within `max_distance` meters."""
+        node_ids, _ = self.snap(latitude, longitude, max_distance)
+        return int(node_ids[0]) if node_ids[0] != NO_NODE else None
+
+
+def save_spatial_index(index: SpatialIndex, directory: Path = ROAD_CACHE_DIR) -> None:
+    try:
+        with open(Path(directory) / SPATIAL_INDEX_FILE, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        console.print(f"[yellow]Gagal menyimpan indeks spasial: {str(e)}[/yellow]")
+
+
+def load_spatial_index(road: RoadNetwork, directory: Path = ROAD_CACHE_DIR) -> SpatialIndex:
+    """
+    Load the saved spatial index of the road network, it is built and saved
+    when there is none or it belongs to other road data.
+    """
+    try:
+        with open(Path(directory) / SPATIAL_INDEX_FILE, "rb") as f:
+            index = pickle.load(f)
+        if isinstance(index, SpatialIndex) and index.digest == road.digest:
+            return index
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+
+    index = SpatialIndex.from_road(road)
+    save_spatial_index(index, directory)
+    return index
@@ -0,0 +1,109 @@
+"""
+Helper functions to generate synthetic location graphs for benchmarking.
+
+Every generator returns a graph in the same shape as malang_graph.json:
+[{"node": name, "branch": [{"node": name, "distance": meters}]}]
+"""
+
+import math
+import random
+
+
+def node_name(i: int) -> str:
+    return f"node-{i}"
+
+
+def _to_location_graph(n: int, edges: dict[int, dict[int, float]]) -> list[dict]:
+    return [
+        {
+            "node": node_name(u),
+            "branch": [{"node": node_name(v), "distance": distance} for v, distance in edges[u].items()]
+        }
+        for u in range(n)
+    ]
+
+
+def _add_edge(edges: dict[int, dict[int, float]], u: int, v: int, distance: float) -> None:
+    edges[u][v] = distance
+    edges[v][u] = distance
+
+
+def grid_city(n: int, seed: int = 0, spacing: float = 100.0) -> list[dict]:
+    """
+    Square street grid with about n intersections. Block lengths vary between
+    0.8x and 1.5x the spacing and about 5% of the streets are missing.
+    """
+    rng = random.Random(seed)
+    side = max(2, math.isqrt(n))
+    n = side * side
+    edges = {u: {} for u in range(n)}
+
+    for row in range(side):
+        for col in range(side):
+            u = row * side + col
+            if col + 1 < side and rng.random() > 0.05:
+                _add_edge(edges, u, u + 1, spacing * rng.uniform(0.8, 1.5))
+            if row + 1 < side and rng.random() > 0.05:
+                _add_edge(edges, u, u + side, spacing * rng.uniform(0.8, 1.5))
+
+    return _to_location_graph(n, edges)
+
+
+def random_geometric(n: int, seed: int = 0, avg_degree: float = 6.0, spacing: float = 100.0) -> list[dict]:
+    """
+    Random geometric graph: n points spread uniformly over a square, every pair
+    closer than the connection radius is joined with its euclidean distance.
+    """
+    rng = random.Random(seed)
+    size = math.sqrt(n) * spacing
+    radius = size * math.sqrt(avg_degree / (math.pi * n))
+    points = [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(n)]
+    edges = {u: {} for u in range(n)}
+
+    # Bucket the points into cells of the connection radius so only the
+    # neighboring cells have to be compared
+    cells = {}
+    for u, (x, y) in enumerate(points):
+        cells.setdefault((int(x // radius), int(y // radius)), []).append(u)
+
+    for (cx, cy), members in cells.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for v in cells.get((cx + dx, cy + dy), []):
+                    for u in members:
+                        if u < v:
+                            distance = math.dist(points[u], points[v])
+                            if distance <= radius:
+                                _add_edge(edges, u, v, distance)
+
+    return _to_location_graph(n, edges)
+
+
+def scale_free(n: int, seed: int = 0, m: int = 2, min_distance: float = 100.0, max_distance: float = 2000.0) -> list[dict]:
+    """
+    Barabasi-Albert preferential attachment graph, every new node connects to
+    m existing nodes with a probability proportional to their degree.
+    """
+    rng = random.Random(seed)
+    m = max(1, min(m, n - 1))
+    edges = {u: {} for u in range(n)}
+
+    # Every node appears in this list once per edge end, so sampling from it
+    # is sampling proportional to the degree
+    repeated_nodes = list(range(m))
+    for u in range(m, n):
+        targets = set()
+        while len(targets) < m:
+            targets.add(rng.choice(repeated_nodes))
+        for v in targets:
+            _add_edge(edges, u, v, rng.uniform(min_distance, max_distance))
+            repeated_nodes.extend((u, v))
+
+    return _to_location_graph(n, edges)
+
+
+GENERATORS = {
+    "grid": grid_city,
+    "geometric": random_geometric,
+    "scale_free": scale_free,
+}
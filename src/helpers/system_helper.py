@@ -2,7 +2,9 @@
 Helper functions for all related to system operations.
 """
 
+import json
 import os
+from pathlib import Path
 import platform
 import subprocess
 
@@ -18,4 +20,22 @@ def open_image(image_path: str) -> None:
         else:  # Linux and others
             subprocess.run(['xdg-open', image_path])
     except Exception as e:
-        print(f"Failed to open image: {e}")
\ No newline at end of file
+        print(f"Failed to open image: {e}")
+
+
+def write_json_atomic(data, filepath: Path) -> None:
+    """
+    Write `data` as JSON to a temporary file next to `filepath` and move it in
+    place, so readers and other processes writing the same file never see a
+    partly written file.
+    """
+    filepath = Path(filepath)
+    temporary = filepath.with_name(f"{filepath.name}.{os.getpid()}.tmp")
+    try:
+        with open(temporary, "w") as f:
+            json.dump(data, f)
+        os.replace(temporary, filepath)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
@@ -0,0 +1,182 @@
+"""
+Helper functions for recording and replaying the steps of a search.
+
+The search engines only append compact step events to a SearchTrace, the Rich
+illustration of the search process is a replay of those events after the search
+is done. The search time is measured without any printing or sleeping, and a
+trace can be saved to disk and replayed later without running the search again.
+
+Events are tuples of node ids, a saved trace keeps the names of the nodes in its events:
+    ("begin", start, goal)                      a new search (one per leg of a multi-goal route)
+    ("limit", depth_limit)                      a new iteration of iterative deepening
+    ("expand", node, parent, cost)              a node is taken from the frontier
+    ("push", node, step_cost, new_cost)         a neighbor of the last expanded node is pushed
+    ("goal", node, cost)                        the goal is reached
+    ("fail",)                                   the frontier is exhausted without reaching the goal
+"""
+
+from collections import deque
+import json
+from pathlib import Path
+import time
+from typing import Callable
+
+from rich.console import Console
+from rich.panel import Panel
+
+console = Console()
+
+TRACE_MAX_EVENTS = 100_000
+# Positions of the node ids in the events of every kind
+EVENT_NODES = {"begin": (1, 2), "expand": (1, 2), "push": (1,), "goal": (1,)}
+REPLAY_STEP_DELAY = 0.3  # seconds per step at speed 1
+ALGORITHM_TITLES = {
+    "BFS": "BREADTH FIRST SEARCH",
+    "DFS": "DEPTH-FIRST SEARCH",
+    "UCS": "UNIFORM COST SEARCH",
+    "DLS": "DEPTH-LIMITED SEARCH",
+    "IDDFS": "ITERATIVE DEEPENING DFS",
+}
+
+
+class SearchTrace:
+    """
+    Ring buffer of search events, the oldest events are dropped once it holds
+    `max_events`. `callback`, if given, is called with every event as it happens.
+    `name_of` gives the name of a node id (like CompiledGraph.name_of), it is only
+    asked for the nodes of the events.
+    """
+
+    def __init__(self, name_of: Callable[[int], str], algorithm: str = "", max_events: int = TRACE_MAX_EVENTS,
+                 callback: Callable = None):
+        self.name_of = name_of
+        self.algorithm = algorithm
+        self.events = deque(maxlen=max_events)
+        self.total_events = 0
+        self.callback = callback
+
+    def emit(self, *event) -> None:
+        self.events.append(event)
+        self.total_events += 1
+        if self.callback is not None:
+            self.callback(event)
+
+    @property
+    def dropped(self) -> int:
+        return self.total_events - len(self.events)
+
+    def names(self) -> dict[int, str]:
+        """Name of every node in the events."""
+        nodes = {event[i] for event in self.events for i in EVENT_NODES.get(event[0], ())}
+        nodes.discard(None)
+        return {node: self.name_of(node) for node in sorted(nodes)}
+
+    def save(self, filepath: Path) -> None:
+        with open(filepath, "w") as f:
+            json.dump({
+                "algorithm": self.algorithm,
+                "names": self.names(),
+                "dropped": self.dropped,
+                "events": list(self.events),
+            }, f)
+
+    @classmethod
+    def load(cls, filepath: Path) -> "SearchTrace":
+        with open(filepath, "r") as f:
+            data = json.load(f)
+        names = data["names"]
+        # Older traces hold the names of all nodes as a list
+        names = dict(enumerate(names)) if isinstance(names, list) else {int(node): name for node, name in names.items()}
+        trace = cls(names.__getitem__, data.get("algorithm", ""), max_events=None)
+        trace.events.extend(tuple(event) for event in data["events"])
+        trace.total_events = len(trace.events) + data.get("dropped", 0)
+        return trace
+
+
+def route_so_far(parents: dict[int, int | None], node: int) -> list[int]:
+    """Route to `node` from the recorded parents, stops if the parents run in a circle."""
+    route = [node]
+    seen = {node}
+    node = parents.get(node)
+    while node is not None and node not in seen:
+        route.append(node)
+        seen.add(node)
+        node = parents.get(node)
+    route.reverse()
+    return route
+
+
+def replay(trace: SearchTrace, speed: float = 1.0) -> None:
+    """
+    Print the recorded search step by step. `speed` scales the pause between the
+    steps, 0 prints everything without pausing.
+    """
+    delay = REPLAY_STEP_DELAY / speed if speed > 0 else 0
+    names = trace.names()
+    title = ALGORITHM_TITLES.get(trace.algorithm, trace.algorithm)
+    sort_by_cost = trace.algorithm == "UCS"
+    multi_leg = sum(1 for event in trace.events if event[0] == "begin") > 1
+    parents = {}
+    pushed = []
+    current = None  # Last expanded node whose pushed neighbors are not shown yet
+    step = 1
+    leg = 0
+
+    def show_pushed():
+        if not pushed:
+            console.print(f"  [red]Tidak ada tetangga yang belum dikunjungi dari lokasi {names[current]}.[/red]")
+            return
+        console.print("  Memeriksa tetangga:")
+        neighbors = sorted(pushed, key=lambda x: x[2]) if sort_by_cost else pushed
+        for neighbor, step_cost, new_cost in neighbors:
+            console.print(f"     - [blue]{names[neighbor]}[/blue]: Jarak = [yellow]{step_cost}[/yellow] meter, Total biaya = [yellow]{new_cost}[/yellow] meter")
+        if sort_by_cost:
+            console.print(f"  Tetangga dengan biaya terendah: [bold cyan]{names[neighbors[0][0]]}[/bold cyan] ([yellow]{neighbors[0][2]}[/yellow] meter)")
+
+    if trace.dropped:
+        console.print(f"[yellow]{trace.dropped} langkah pertama tidak tersimpan di trace.[/yellow]")
+
+    for event in trace.events:
+        kind = event[0]
+
+        if kind == "push":
+            _, neighbor, step_cost, new_cost = event
+            pushed.append((neighbor, step_cost, new_cost))
+            continue
+
+        # The goal is reported instead of the neighbors of the goal node
+        if current is not None and kind != "goal":
+            show_pushed()
+        current = None
+        pushed.clear()
+
+        if kind == "begin":
+            _, start, goal = event
+            leg += 1
+            parents = {}
+            step = 1
+            if multi_leg:
+                console.print(f"\n[bold cyan]Searching for destination number-{leg}: {names[goal]}[/bold cyan]")
+                console.print(f"From: [green]{names[start]}[/green]")
+            console.print(Panel(f"[bold cyan]ILUSTRASI PROSES PENCARIAN {title}[/bold cyan]"))
+            console.print(f"Mencari rute dari [green]{names[start]}[/green] ke [green]{names[goal]}[/green]...")
+        elif kind == "limit":
+            parents = {}
+            console.print(f"\n[bold magenta]Batas kedalaman: {event[1]}[/bold magenta]")
+        elif kind == "expand":
+            _, current, parent, cost = event
+            parents[current] = parent
+            console.print(f"\n[bold]Langkah {step}:[/bold]")
+            console.print(f"  Mengunjungi lokasi: [cyan]{names[current]}[/cyan]")
+            console.print(f"  Biaya sejauh ini: [yellow]{cost} (meter)[/yellow]")
+            console.print(f"  Rute sejauh ini: [green]{' -> '.join(names[n] for n in route_so_far(parents, current))}[/green]")
+            step += 1
+            if delay:
+                time.sleep(delay)
+        elif kind == "goal":
+            console.print(Panel("[bold green]TUJUAN TERCAPAI![/bold green] Lokasi tujuan telah ditemukan."))
+        elif kind == "fail":
+            console.print(Panel("[bold red]TIDAK ADA RUTE![/bold red] Tidak dapat menemukan rute ke tujuan."))
+
+    if current is not None:
+        show_pushed()
@@ -1,9 +1,12 @@
 from rich.console import Console
 import questionary
 
+from config.config import PRECOMPUTE_ALL_PAIRS
+from helpers.all_pairs_helper import load_all_pairs
 from helpers.dataset_helper import load_malang_osm_data
 from helpers.output_helper import show_banner
 from menu import find_route_destination, visualize_graph_networkx
+from store.states import GlobalState
 
 
 console = Console()
@@ -14,6 +17,9 @@ def main():
     
     load_malang_osm_data()
     
+    if PRECOMPUTE_ALL_PAIRS and GlobalState.compiled_graph is not None:
+        GlobalState.all_pairs = load_all_pairs(GlobalState.compiled_graph)
+    
     while True:
         choice = questionary.select(
             "Select menu:",
@@ -7,9 +7,11 @@ from rich.console import Console
 import questionary
 
 from algorithms.bfs import run_bfs
+from algorithms.compare import run_compare
 from algorithms.dfs import run_dfs
 from algorithms.ucs import run_ucs
-from algorithms.dls import run_dls
+from algorithms.dls import run_dls, run_iddfs
+from algorithms.tour_planner import plan_visit_order
 from config.config import IMG_DIR, DATA_DIR
 from helpers.system_helper import open_image
 from store.states import GlobalState
@@ -50,6 +52,13 @@ def find_route_destination() -> None:
             destination_location.append(next_destination)
         
         console.print(f"[green]Destinations to visit: \n{''.join(f" - {d}\n" for d in destination_location)}[/green]")
+        
+        if len(destination_location) > 1 and questionary.confirm("Do you want to optimize the visiting order (shortest total distance)?").ask():
+            destination_location, total_distance = plan_visit_order(GlobalState.start_location, destination_location)
+            if total_distance == float("inf"):
+                console.print("[yellow]Some destinations can not reach each other, keeping the input order.[/yellow]")
+            else:
+                console.print(f"[green]Optimized visiting order ({total_distance:.2f} meter): \n{''.join(f" - {d}\n" for d in destination_location)}[/green]")
     else:
         destination_location = questionary.select(
             "Select destination:",
@@ -76,18 +85,40 @@ def find_route_destination() -> None:
     
     GlobalState.avg_speed = float(avg_speed) * 1000 / 60
     
+    # The distance the vehicle can drive within the operating time
+    if questionary.confirm("Do you want to prune routes that exceed the operating time during the search?", default=False).ask():
+        GlobalState.cost_budget = GlobalState.max_operating_time * GlobalState.avg_speed
+    else:
+        GlobalState.cost_budget = None
+    
     algorithm_choice = questionary.select(
         "Select searching algorithm:",
         choices=[
             "1. Breadth-First Search (BFS)",
             "2. Depth-First Search (DFS)",
             "3. Uniform Cost Search (UCS)",
-            "4. Depth-Limited Search (DLS)"
+            "4. Depth-Limited Search (DLS)",
+            "5. Bidirectional Breadth-First Search (BiBFS)",
+            "6. Bidirectional Uniform Cost Search (BiUCS)",
+            "7. Iterative Deepening DFS (IDDFS)",
+            "8. Compare all (BFS, DFS, UCS, DLS)"
         ]
     ).ask()
     
+    if algorithm_choice == "8. Compare all (BFS, DFS, UCS, DLS)":
+        run_compare()
+        return
+    
     GlobalState.show_process = questionary.confirm("Do you want to see the illustration of the search process?").ask()
     
+    if GlobalState.show_process:
+        replay_speed = questionary.select(
+            "Select illustration speed:",
+            choices=["0.5x", "1x", "2x", "4x", "Instant"],
+            default="1x"
+        ).ask()
+        GlobalState.replay_speed = 0 if replay_speed == "Instant" else float(replay_speed.rstrip("x"))
+    
     if algorithm_choice == "1. Breadth-First Search (BFS)":
         run_bfs()
     elif algorithm_choice == "2. Depth-First Search (DFS)":
@@ -96,6 +127,12 @@ def find_route_destination() -> None:
         run_ucs()
     elif algorithm_choice == "4. Depth-Limited Search (DLS)":
         run_dls()
+    elif algorithm_choice == "5. Bidirectional Breadth-First Search (BiBFS)":
+        run_bfs(bidirectional=True)
+    elif algorithm_choice == "6. Bidirectional Uniform Cost Search (BiUCS)":
+        run_ucs(bidirectional=True)
+    elif algorithm_choice == "7. Iterative Deepening DFS (IDDFS)":
+        run_iddfs()
 
 def visualize_graph_networkx() -> None:
     """
@@ -0,0 +1,41 @@
+"""
+Render the routes of a batch result file into one lightweight map.
+
+The results are written by the batch runner, the map can be GeoJSON, encoded
+polylines (one JSON line per route) or one HTML map with a layer per route.
+
+Usage:
+    python src/render_map.py results.jsonl -o routes.html --zoom 15
+"""
+
+import argparse
+import contextlib
+import json
+from pathlib import Path
+import sys
+
+from batch import map_format_of
+from config.config import MAP_SIMPLIFY_ZOOM
+from helpers.dataset_helper import load_malang_osm_data
+from helpers.map_helper import MAP_FORMATS, write_routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the routes of a batch result file into one map.")
+    parser.add_argument("results", type=Path, help="JSONL result file written by batch.py")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Map file (.geojson, .html or encoded polylines)")
+    parser.add_argument("--format", choices=MAP_FORMATS, help="Map format (default: by file extension)")
+    parser.add_argument("--zoom", type=float, default=MAP_SIMPLIFY_ZOOM, help="Zoom level the route lines are simplified for")
+    args = parser.parse_args()
+
+    with open(args.results, "r") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    with contextlib.redirect_stdout(sys.stderr):
+        load_malang_osm_data()
+        written = write_routes(records, args.output, map_format_of(args.output, args.format), args.zoom)
+    print(f"{written} routes written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Replay a saved search trace as the step by step illustration of the search.
+
+Traces are written by the batch runner with --trace-dir.
+
+Usage:
+    python src/replay.py traces/job_1.json --speed 2
+"""
+
+import argparse
+from pathlib import Path
+
+from helpers.trace_helper import SearchTrace, replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a saved search trace.")
+    parser.add_argument("trace", type=Path, help="Trace file written by batch.py --trace-dir")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed, 0 prints everything at once")
+    args = parser.parse_args()
+
+    replay(SearchTrace.load(args.trace), args.speed)
+
+
+if __name__ == "__main__":
+    main()
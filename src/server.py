@@ -0,0 +1,384 @@
+"""
+Local HTTP/JSON routing service.
+
+Loads the graph once and answers routing queries over HTTP, so other programs
+can use the search algorithms without the interactive menu. The searches run in
+a pool of worker processes that are forked after the graph is loaded and share
+it copy-on-write. Queries that arrive together are sent to a worker as one batch.
+
+Endpoints:
+    GET  /health      service status
+    GET  /locations   names of the locations
+    GET  /stats       request counts and latency histograms
+    POST /route       one job, same fields as a line of the batch runner
+    POST /batch       {"jobs": [...]}, answered with {"results": [...]} in the same order
+
+Usage:
+    python src/server.py --port 8080 --workers 4
+    curl -X POST localhost:8080/route -d '{"start": "...", "destinations": ["..."], "algorithm": "UCS"}'
+"""
+
+import argparse
+import asyncio
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from algorithms.runner import road_graph
+from batch import parse_job, run_job
+from helpers.dataset_helper import load_malang_osm_data
+from store.states import GlobalState
+
+MAX_BATCH_SIZE = 64  # Queries sent to a worker at once
+MAX_QUEUED_QUERIES = 10_000  # Queries waiting for a worker, more are answered with 503
+MAX_BODY_SIZE = 1024 * 1024
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]  # milliseconds
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class BodyTooLarge(ValueError):
+    """Request body longer than MAX_BODY_SIZE, answered with 413."""
+
+
+def run_jobs(jobs: list[dict]) -> list[dict]:
+    """
+    Run a batch of raw jobs, a job that fails gets an error record instead of
+    failing the batch. Runs in the worker processes.
+    """
+    records = []
+    for raw_job in jobs:
+        try:
+            records.append(run_job(parse_job(raw_job)))
+        except Exception as e:
+            records.append({"found": False, "error": str(e)})
+    return records
+
+
+class LatencyHistogram:
+    """
+    Counts of request latencies in fixed buckets (upper bounds in milliseconds).
+    """
+
+    def __init__(self, buckets: list[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one counts everything slower
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, milliseconds: float) -> None:
+        self.counts[bisect_left(self.buckets, milliseconds)] += 1
+        self.total += 1
+        self.sum += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def percentile(self, p: float) -> float | None:
+        """Upper bound of the bucket holding the p-th percentile."""
+        if not self.total:
+            return None
+        rank = p / 100 * self.total
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.total,
+            "mean_ms": self.sum / self.total if self.total else None,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": {f"<={bound}": count for bound, count in zip(self.buckets, self.counts)}
+                       | {f">{self.buckets[-1]}": self.counts[-1]},
+        }
+
+
+class RouteDispatcher:
+    """
+    Queue of routing jobs. Jobs that are waiting when a worker becomes free are
+    sent to it together, at most `max_batch` at once and at most `workers`
+    batches at the same time. Without a pool the jobs run in the event loop.
+    """
+
+    def __init__(self, pool: ProcessPoolExecutor | None, workers: int, max_batch: int = MAX_BATCH_SIZE,
+                 max_queued: int = MAX_QUEUED_QUERIES):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue(max_queued)
+        self.slots = asyncio.Semaphore(max(workers, 1))
+        self.batches = 0
+        self.tasks = []
+
+    def start(self) -> None:
+        self.tasks.append(asyncio.create_task(self._dispatch()))
+
+    async def submit(self, jobs: list[dict]) -> list[dict]:
+        """
+        Queue the jobs and wait for their records. Raises asyncio.QueueFull when
+        the queue has no room for them.
+        """
+        if self.queue.maxsize - self.queue.qsize() < len(jobs):
+            raise asyncio.QueueFull
+        loop = asyncio.get_running_loop()
+        futures = []
+        for job in jobs:
+            future = loop.create_future()
+            self.queue.put_nowait((job, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _dispatch(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            await self.slots.acquire()
+            # Take everything that queued up meanwhile, without waiting for more
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            self.batches += 1
+            self.tasks.append(asyncio.create_task(self._run_batch(batch)))
+            self.tasks = [task for task in self.tasks if not task.done()]
+
+    async def _run_batch(self, batch: list) -> None:
+        jobs = [job for job, _ in batch]
+        try:
+            if self.pool is None:
+                records = run_jobs(jobs)
+            else:
+                records = await asyncio.get_running_loop().run_in_executor(self.pool, run_jobs, jobs)
+        except Exception as e:
+            records = [{"found": False, "error": f"Worker failed: {e}"}] * len(jobs)
+        finally:
+            self.slots.release()
+        for (_, future), record in zip(batch, records):
+            if not future.done():
+                future.set_result(record)
+
+
+class RoutingService:
+    """
+    Minimal HTTP/1.1 server with keep-alive, answers every request with JSON.
+    """
+
+    def __init__(self, dispatcher: RouteDispatcher, max_connections: int):
+        self.dispatcher = dispatcher
+        self.connections = asyncio.Semaphore(max_connections)
+        self.latency = {}
+        self.status_counts = {}
+        self.started = time.time()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async with self.connections:
+            try:
+                while True:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    start_time = time.perf_counter()
+                    status, payload = await self._route(method, path, body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    await self._write_response(writer, status, payload, keep_alive)
+
+                    endpoint = path if status != 404 else "other"
+                    self.latency.setdefault(endpoint, LatencyHistogram()).add((time.perf_counter() - start_time) * 1000)
+                    self.status_counts[status] = self.status_counts.get(status, 0) + 1
+                    if not keep_alive:
+                        break
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            except ValueError as e:
+                # The body of a request that is too large is not read, the connection is closed
+                status = 413 if isinstance(e, BodyTooLarge) else 400
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+                with contextlib.suppress(ConnectionError):
+                    await self._write_response(writer, status, {"error": str(e)}, False)
+            finally:
+                writer.close()
+                with contextlib.suppress(ConnectionError):
+                    await writer.wait_closed()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[str, str, dict, bytes] | None:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise ValueError("Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_SIZE:
+            raise BodyTooLarge(f"Request body larger than {MAX_BODY_SIZE} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool) -> None:
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        if path in ("/health", "/locations", "/stats"):
+            if method != "GET":
+                return 405, {"error": f"{path} only accepts GET"}
+            if path == "/health":
+                return 200, {"status": "ok", "locations": GlobalState.compiled_graph.num_nodes}
+            if path == "/locations":
+                return 200, {"locations": GlobalState.compiled_graph.names}
+            return 200, self.stats()
+
+        if path not in ("/route", "/batch"):
+            return 404, {"error": f"Unknown endpoint: {path}"}
+        if method != "POST":
+            return 405, {"error": f"{path} only accepts POST"}
+
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "Request body is not valid JSON"}
+
+        if path == "/route":
+            jobs = [data]
+        else:
+            jobs = data.get("jobs") if isinstance(data, dict) else data
+            if not isinstance(jobs, list):
+                return 400, {"error": "Expected {\"jobs\": [...]}"}
+
+        # Catch malformed jobs here so they do not take a worker
+        for job in jobs:
+            if not isinstance(job, dict):
+                return 400, {"error": "Every job must be a JSON object"}
+            if "destinations" not in job and "destination" in job:
+                job["destinations"] = [job["destination"]]
+            try:
+                parse_job(job)
+            except (KeyError, ValueError, TypeError) as e:
+                return 400, {"error": f"Invalid job: {e}"}
+
+        try:
+            records = await self.dispatcher.submit(jobs)
+        except asyncio.QueueFull:
+            return 503, {"error": "Too many queued queries, try again later"}
+
+        if path == "/route":
+            return 200, records[0]
+        return 200, {"results": records}
+
+    def stats(self) -> dict:
+        return {
+            "uptime": time.time() - self.started,
+            "status_counts": self.status_counts,
+            "queued": self.dispatcher.queue.qsize(),
+            "batches": self.dispatcher.batches,
+            "latency": {endpoint: histogram.to_dict() for endpoint, histogram in self.latency.items()},
+        }
+
+
+def warm_up() -> None:
+    """
+    Compile the road network for the searches, once in the server before the
+    workers are forked so they share it instead of every worker compiling it.
+    """
+    try:
+        road_graph()
+    except ValueError:
+        pass  # No road network cache, road queries are answered with an error
+
+
+def init_worker() -> None:
+    """
+    Initializer of every worker. The workers keep their search results in memory
+    only, they must not all save them to the same result cache file.
+    """
+    if GlobalState.result_cache is not None:
+        GlobalState.result_cache.filepath = None
+
+
+def load_worker() -> None:
+    """Initializer of the workers where fork is not available."""
+    with contextlib.redirect_stdout(sys.stderr):
+        load_malang_osm_data()
+    warm_up()
+    init_worker()
+
+
+def create_pool(workers: int) -> ProcessPoolExecutor | None:
+    """
+    Fork the worker processes after the graph is loaded so they share it. Where
+    fork is not available every worker loads the graph by itself. Called before
+    the event loop runs, forking a process with the threads of the loop running
+    is not safe. Every worker is started here so the first queries do not pay
+    for it.
+    """
+    if workers <= 0:
+        return None
+    if "fork" in multiprocessing.get_all_start_methods():
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"), initializer=init_worker)
+    else:
+        pool = ProcessPoolExecutor(workers, initializer=load_worker)
+    for future in [pool.submit(run_jobs, []) for _ in range(workers)]:
+        future.result()
+    return pool
+
+
+async def serve(host: str, port: int, pool: ProcessPoolExecutor | None, workers: int, max_connections: int) -> None:
+    dispatcher = RouteDispatcher(pool, workers)
+    dispatcher.start()
+    service = RoutingService(dispatcher, max_connections)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Routing service listening on http://{host}:{port} ({workers} workers)", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer routing queries over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for the searches, 0 searches in the server process (default: CPU count)")
+    parser.add_argument("--max-connections", type=int, default=256, help="Connections served at the same time")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(sys.stderr):
+        load_malang_osm_data()
+
+    if GlobalState.compiled_graph is None:
+        sys.exit("Location graph could not be loaded")
+
+    warm_up()
+    pool = create_pool(args.workers)
+    try:
+        asyncio.run(serve(args.host, args.port, pool, args.workers, args.max_connections))
+    except KeyboardInterrupt:
+        print("Routing service stopped", file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,31 @@
 from dataclasses import dataclass
 import networkx as nx
 
+from helpers.all_pairs_helper import AllPairs
+from helpers.graph_helper import CompiledGraph
+from helpers.result_cache_helper import ResultCache
+from helpers.road_cache_helper import RoadNetwork
+from helpers.road_tile_helper import TiledRoadNetwork
+from helpers.segment_cache_helper import SegmentCache
+from helpers.spatial_index_helper import SpatialIndex
+
 @dataclass
 class GlobalState:
     G: nx.MultiDiGraph = None
+    road: RoadNetwork = None  # Opened on first use when the road tiles are used
+    road_tiles: TiledRoadNetwork = None  # Set with USE_ROAD_TILES, searches and maps read the road network from it
+    spatial_index: SpatialIndex = None
+    segment_cache: SegmentCache = None
     malang_graph: list[dict] = None
+    compiled_graph: CompiledGraph = None
+    all_pairs: AllPairs = None
+    result_cache: ResultCache = None
     location_nodes: list[dict] = None
     start_location: str = None
     destination_location: str|list[str] = None
     max_operating_time: int = 0
     is_multi: bool = False
     show_process: bool = False
+    replay_speed: float = 1.0
     avg_speed: float = 0
+    cost_budget: float = None  # Distance budget (meters) the searches prune against, None to not prune
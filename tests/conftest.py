@@ -0,0 +1,118 @@
+import heapq
+import random
+import sys
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# The application modules are imported the way main.py sees them, from src/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+@pytest.fixture(autouse=True)
+def no_default_geocode_cache(monkeypatch):
+    """Geocoders built without a cache of their own would write into data/geocode_cache.sqlite."""
+    from helpers import geocode_helper
+
+    class TestGeocodeCache(geocode_helper.GeocodeCache):
+        def __init__(self, filepath=None):
+            if filepath is None or Path(filepath).resolve() == Path(geocode_helper.GEOCODE_CACHE_FILE).resolve():
+                raise AssertionError("Tests must give the Geocoder a GeocodeCache under tmp_path")
+            super().__init__(filepath)
+
+    monkeypatch.setattr(geocode_helper, "GeocodeCache", TestGeocodeCache)
+
+
+def _shortest_distances(graph, source):
+    """Plain Dijkstra from `source`, the reference the engines are checked against."""
+    distances = {}
+    heap = [(0.0, source)]
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if node in distances:
+            continue
+        distances[node] = cost
+        for neighbor, length in graph.neighbors(node):
+            if neighbor not in distances:
+                heapq.heappush(heap, (cost + length, neighbor))
+    return distances
+
+
+def _distances_to(graph, goal):
+    return _shortest_distances(graph.reverse(), goal)
+
+
+@pytest.fixture
+def route_cost():
+    """Cost of a route of node ids, over the shortest edge between every two consecutive nodes."""
+    def cost(graph, path):
+        return sum(
+            min(length for neighbor, length in graph.neighbors(node) if neighbor == next_node)
+            for node, next_node in zip(path, path[1:])
+        )
+    return cost
+
+
+@pytest.fixture
+def distances_to():
+    """Shortest distance from every node that reaches `goal` to it."""
+    return _distances_to
+
+
+@pytest.fixture
+def expected_distances():
+    """Matrix of the shortest distances from `origins` to `targets` (all nodes by default), inf without a route."""
+    def distances(graph, origins=None, targets=None):
+        origins = range(graph.num_nodes) if origins is None else origins
+        targets = range(graph.num_nodes) if targets is None else targets
+        matrix = np.full((len(origins), len(targets)), np.inf)
+        for j, target in enumerate(targets):
+            to_target = _distances_to(graph, target)
+            for i, origin in enumerate(origins):
+                matrix[i, j] = to_target.get(origin, np.inf)
+        return matrix
+    return distances
+
+
+@pytest.fixture
+def fewest_hops():
+    """Fewest edges from `start` to `goal`, None if there is no route."""
+    def hops(graph, start, goal):
+        seen = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if node == goal:
+                return seen[node]
+            for neighbor, _ in graph.neighbors(node):
+                if neighbor not in seen:
+                    seen[neighbor] = seen[node] + 1
+                    queue.append(neighbor)
+        return None
+    return hops
+
+
+@pytest.fixture
+def one_way_city():
+    """Random directed graph of `n` nodes with parallel edges and loops, some nodes can not reach each other."""
+    from helpers.graph_helper import compile_graph
+
+    def city(n, seed):
+        rng = random.Random(seed)
+        branches = {i: [] for i in range(n)}
+        for _ in range(3 * n):
+            u, v = rng.randrange(n), rng.randrange(n)
+            branches[u].append({"node": f"node-{v}", "distance": rng.uniform(10, 500)})
+        return compile_graph([{"node": f"node-{i}", "branch": branch} for i, branch in branches.items()])
+    return city
+
+
+@pytest.fixture
+def sample_pairs():
+    """`count` random (start, goal) location name pairs of a graph."""
+    def pairs(graph, count=30, seed=0):
+        rng = random.Random(seed)
+        return [tuple(rng.sample(graph.names, 2)) for _ in range(count)]
+    return pairs
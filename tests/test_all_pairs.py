@@ -0,0 +1,51 @@
+"""
+All-pairs table: Floyd-Warshall and repeated Dijkstra must agree with a single
+Dijkstra per goal, and every looked up path must have the tabled distance.
+"""
+
+import numpy as np
+import pytest
+
+from helpers import all_pairs_helper
+from helpers.all_pairs_helper import AllPairs, floyd_warshall, load_all_pairs, repeated_dijkstra
+
+
+@pytest.fixture
+def graph(one_way_city):
+    return one_way_city(60, seed=2)
+
+
+@pytest.mark.parametrize("build", [floyd_warshall, repeated_dijkstra])
+def test_table_matches_dijkstra(graph, build, expected_distances, route_cost):
+    distances, next_hop = build(graph)
+    assert np.allclose(distances, expected_distances(graph))
+
+    table = AllPairs(graph, distances, next_hop)
+    for start in range(graph.num_nodes):
+        for goal in range(graph.num_nodes):
+            result = table.lookup(start, goal)
+            if not np.isfinite(distances[start, goal]):
+                assert result is None
+                continue
+            path, distance = result
+            assert (path[0], path[-1]) == (start, goal)
+            assert route_cost(graph, path) == pytest.approx(distance)
+
+
+def test_saved_table_is_reused(graph, tmp_path, monkeypatch):
+    filepath = tmp_path / "all_pairs.npz"
+    built = load_all_pairs(graph, filepath)
+
+    def build_again(graph):
+        raise AssertionError("the saved table was not reused")
+
+    monkeypatch.setattr(all_pairs_helper, "build_all_pairs", build_again)
+    loaded = load_all_pairs(graph, filepath)
+    assert np.array_equal(loaded.distances, built.distances)
+    assert np.array_equal(loaded.next_hop, built.next_hop)
+
+
+def test_table_of_other_locations_is_rebuilt(graph, tmp_path, one_way_city, expected_distances):
+    filepath = tmp_path / "all_pairs.npz"
+    load_all_pairs(one_way_city(40, seed=3), filepath)
+    assert np.allclose(load_all_pairs(graph, filepath).distances, expected_distances(graph))
@@ -0,0 +1,53 @@
+"""
+Batch runner: CSV and JSONL jobs are read into the same typed fields and every
+job gets a record with its routes or the reason it has none.
+"""
+
+import pytest
+
+from batch import parse_job, read_jobs, run_job
+from helpers.graph_helper import compile_graph
+from store.states import GlobalState
+
+
+@pytest.fixture(autouse=True)
+def locations(monkeypatch):
+    graph = [
+        {"node": "A", "branch": [{"node": "B", "distance": 500}]},
+        {"node": "B", "branch": [{"node": "C", "distance": 1500}]},
+        {"node": "C", "branch": []},
+    ]
+    monkeypatch.setattr(GlobalState, "compiled_graph", compile_graph(graph))
+    monkeypatch.setattr(GlobalState, "all_pairs", None)
+    monkeypatch.setattr(GlobalState, "result_cache", None)
+
+
+def test_csv_and_jsonl_jobs_are_parsed_alike(tmp_path):
+    (tmp_path / "jobs.csv").write_text("start,destinations,algorithm,depth_limit,road\nA,B|C,dls,4,yes\n")
+    (tmp_path / "jobs.jsonl").write_text('{"start": "A", "destinations": ["B", "C"], "algorithm": "DLS", "depth_limit": 4, "road": true}\n\n')
+    csv_job, = [parse_job(job) for job in read_jobs(tmp_path / "jobs.csv")]
+    jsonl_job, = [parse_job(job) for job in read_jobs(tmp_path / "jobs.jsonl")]
+    assert csv_job == jsonl_job
+    assert csv_job["destinations"] == ["B", "C"] and csv_job["depth_limit"] == 4 and csv_job["road"]
+    assert not csv_job["prune"] and csv_job["avg_speed"] == 40
+
+
+def test_unknown_algorithm_is_refused():
+    with pytest.raises(ValueError):
+        parse_job({"start": "A", "destinations": ["B"], "algorithm": "A*"})
+
+
+def test_records_of_found_and_missing_routes():
+    record = run_job(parse_job({"start": "A", "destinations": ["B", "C"], "avg_speed": 60}))
+    assert record["found"] and record["routes"] == [["A", "B"], ["B", "C"]]
+    assert record["distance"] == 2000
+    assert record["estimated_time"] == pytest.approx(2.0)  # minutes at 1000 m/minute
+
+    assert run_job(parse_job({"start": "C", "destinations": ["A"]}))["found"] is False
+
+
+def test_route_beyond_the_operating_time_is_infeasible_with_pruning():
+    job = {"start": "A", "destinations": ["C"], "avg_speed": 60, "max_operating_time": 1, "prune": "yes"}
+    record = run_job(parse_job(job))
+    assert record["found"] is False and record["infeasible"]
+    assert run_job(parse_job({**job, "prune": "no"}))["exceeds_operating_time"]
@@ -0,0 +1,39 @@
+"""
+Benchmark: the synthetic graphs are seeded and two-way, every algorithm answers
+the same queries and UCS never reports a longer route than the others.
+"""
+
+import pytest
+
+from benchmark import run_benchmark
+from helpers.synthetic_graph_helper import GENERATORS
+from store.states import GlobalState
+
+
+@pytest.mark.parametrize("family", sorted(GENERATORS))
+def test_generators_are_seeded_and_two_way(family):
+    graph = GENERATORS[family](100, seed=4)
+    assert graph == GENERATORS[family](100, seed=4)
+    assert graph != GENERATORS[family](100, seed=5)
+    distances = {(node["node"], branch["node"]): branch["distance"] for node in graph for branch in node["branch"]}
+    assert all(distances.get((v, u)) == distance for (u, v), distance in distances.items())
+
+
+def test_every_algorithm_answers_the_same_queries(monkeypatch):
+    # run_benchmark searches the generated graphs through the global state
+    monkeypatch.setattr(GlobalState, "compiled_graph", None)
+    monkeypatch.setattr(GlobalState, "all_pairs", None)
+    rows = run_benchmark(["grid"], [64], num_queries=5, seed=1, depth_limit=None, with_memory=True)
+
+    queries = {}
+    for row in rows:
+        queries.setdefault(row["query"], {})[row["algorithm"]] = row
+    assert len(queries) == 5
+    for answers in queries.values():
+        assert {(row["start"], row["goal"]) for row in answers.values()} == {(answers["UCS"]["start"], answers["UCS"]["goal"])}
+        found = [row for row in answers.values() if row["found"]]
+        assert all(answers["UCS"]["cost"] <= row["cost"] + 1e-9 for row in found)
+        if "DLS" in answers:
+            assert answers["DLS"]["depth_limit"] == answers["BFS"]["hops"] + 1
+            assert answers["DLS"]["found"]
+        assert all(row["peak_memory"] is not None for row in answers.values())
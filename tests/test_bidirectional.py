@@ -0,0 +1,75 @@
+"""
+Bidirectional BFS and UCS must find routes as good as their one-sided searches.
+"""
+
+import pytest
+
+from algorithms.bfs import BreadthFirstSearch
+from algorithms.ucs import UniformCostSearch
+from helpers.graph_helper import compile_graph
+from helpers.synthetic_graph_helper import grid_city, random_geometric, scale_free
+
+
+@pytest.fixture
+def one_way_graph():
+    # One way streets: the backward frontiers have to follow the reversed edges
+    return compile_graph([
+        {"node": "A", "branch": [{"node": "B", "distance": 1}, {"node": "C", "distance": 5}]},
+        {"node": "B", "branch": [{"node": "C", "distance": 1}]},
+        {"node": "C", "branch": [{"node": "D", "distance": 1}]},
+        {"node": "D", "branch": []},
+        {"node": "E", "branch": [{"node": "A", "distance": 1}]},
+    ])
+
+
+@pytest.mark.parametrize("generator", [grid_city, random_geometric, scale_free])
+def test_bidirectional_ucs_matches_ucs(generator, route_cost, sample_pairs):
+    graph = compile_graph(generator(200, seed=3))
+    for start, goal in sample_pairs(graph):
+        expected = UniformCostSearch(graph).search(start, goal)
+        result = UniformCostSearch(graph).search_bidirectional(start, goal)
+        if not expected or not expected[0]:
+            assert result is None
+            continue
+        path, cost, _ = result
+        assert (path[0], path[-1]) == (start, goal)
+        assert cost == pytest.approx(expected[1])
+        assert route_cost(graph, [graph.id_of(name) for name in path]) == pytest.approx(cost)
+
+
+@pytest.mark.parametrize("generator", [grid_city, random_geometric, scale_free])
+def test_bidirectional_bfs_has_fewest_hops(generator, route_cost, sample_pairs):
+    graph = compile_graph(generator(200, seed=4))
+    bfs = BreadthFirstSearch(graph)
+    for start, goal in sample_pairs(graph):
+        expected, _, _ = bfs.search(start, goal)
+        path, cost, _ = bfs.search_bidirectional(start, goal)
+        assert len(path) == len(expected)
+        if path:
+            assert (path[0], path[-1]) == (start, goal)
+            assert route_cost(graph, [graph.id_of(name) for name in path]) == pytest.approx(cost)
+
+
+def test_one_way_streets(one_way_graph):
+    assert BreadthFirstSearch(one_way_graph).search_bidirectional("A", "D")[:2] == (["A", "C", "D"], 6)
+    assert UniformCostSearch(one_way_graph).search_bidirectional("A", "D")[:2] == (["A", "B", "C", "D"], 3)
+    assert BreadthFirstSearch(one_way_graph).search_bidirectional("D", "A")[0] == []
+    assert UniformCostSearch(one_way_graph).search_bidirectional("D", "A") is None
+
+
+def test_start_is_goal(one_way_graph):
+    assert BreadthFirstSearch(one_way_graph).search_bidirectional("A", "A")[:2] == (["A"], 0)
+    assert UniformCostSearch(one_way_graph).search_bidirectional("A", "A")[:2] == (["A"], 0)
+
+
+@pytest.mark.parametrize("generator", [grid_city, random_geometric])
+def test_bidirectional_ucs_budget(generator, sample_pairs):
+    graph = compile_graph(generator(200, seed=5))
+    ucs = UniformCostSearch(graph)
+    for start, goal in sample_pairs(graph, 15):
+        expected = ucs.search(start, goal)
+        if not expected or not expected[0]:
+            continue
+        # A budget of exactly the shortest distance still fits
+        assert ucs.search_bidirectional(start, goal, max_cost=expected[1]) is not None
+        assert ucs.search_bidirectional(start, goal, max_cost=expected[1] * 0.99) is None
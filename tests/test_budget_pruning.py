@@ -0,0 +1,125 @@
+"""
+Budget pruning (max_cost): a returned route always fits the budget, nothing is
+returned when no route fits it and UCS finds a route whenever one fits. BFS, DFS
+and DLS keep the first route to every node, they stay the same searches with a
+budget and may miss a cheaper route with more hops.
+"""
+
+import random
+
+import pytest
+
+from algorithms import dfs, dls
+from algorithms.bfs import BreadthFirstSearch
+from algorithms.ucs import UniformCostSearch
+from helpers.graph_helper import compile_graph
+from helpers.synthetic_graph_helper import grid_city, random_geometric
+
+
+def engines(graph):
+    return {
+        "BFS": lambda start, goal, budget: BreadthFirstSearch(graph).search(start, goal, max_cost=budget),
+        "BIBFS": lambda start, goal, budget: BreadthFirstSearch(graph).search_bidirectional(start, goal, max_cost=budget),
+        "DFS": lambda start, goal, budget: dfs.search(start, goal, graph=graph, max_cost=budget),
+        "IDDFS": lambda start, goal, budget: dls.search_iterative(start, goal, graph=graph, max_cost=budget),
+        "DLS": lambda start, goal, budget: dls.search(start, goal, graph.num_nodes, graph=graph, max_cost=budget),
+        "UCS": lambda start, goal, budget: UniformCostSearch(graph).search(start, goal, max_cost=budget) or ([], 0, 0),
+    }
+
+
+def hop_limited_cost(graph, start, goal, limit):
+    """Cheapest cost of a route with at most `limit` nodes (Bellman-Ford by hops)."""
+    costs = {graph.id_of(start): 0}
+    for _ in range(limit - 1):
+        relaxed = dict(costs)
+        for node, cost in costs.items():
+            for neighbor, distance in graph.neighbors(node):
+                if cost + distance < relaxed.get(neighbor, float("inf")):
+                    relaxed[neighbor] = cost + distance
+        costs = relaxed
+    return costs.get(graph.id_of(goal), float("inf"))
+
+
+@pytest.fixture
+def detour_graph():
+    # A is reached first over the direct road (cost 3), only the detour through X (cost 2) fits 7
+    return compile_graph([
+        {"node": "S", "branch": [{"node": "A", "distance": 3}, {"node": "X", "distance": 1}]},
+        {"node": "X", "branch": [{"node": "A", "distance": 1}]},
+        {"node": "A", "branch": [{"node": "G", "distance": 5}]},
+        {"node": "G", "branch": []},
+    ])
+
+
+def test_ucs_finds_cheaper_detour(detour_graph):
+    path, cost, _ = engines(detour_graph)["UCS"]("S", "G", 7)
+    assert path == ["S", "X", "A", "G"]
+    assert cost == 7
+
+
+def test_bfs_keeps_the_fewest_hops_route(detour_graph):
+    # The budget only prunes, BFS stays BFS: A keeps its first route with the
+    # fewest hops and the cheaper detour with more hops is missed
+    bfs = BreadthFirstSearch(detour_graph)
+    assert bfs.search("S", "G", max_cost=7)[0] == []
+    assert bfs.search("S", "G", max_cost=8)[0] == ["S", "A", "G"]
+
+
+@pytest.mark.parametrize("algorithm", ["BFS", "BIBFS", "DFS", "IDDFS", "DLS", "UCS"])
+def test_no_route_fits_budget(detour_graph, algorithm):
+    path, _, _ = engines(detour_graph)[algorithm]("S", "G", 6.9)
+    assert path == []
+
+
+@pytest.mark.parametrize("generator", [grid_city, random_geometric])
+def test_routes_fit_budget(generator, route_cost):
+    graph = compile_graph(generator(100, seed=1))
+    rng = random.Random(0)
+    for _ in range(20):
+        start, goal = rng.sample(graph.names, 2)
+        shortest = UniformCostSearch(graph).search(start, goal)
+        if not shortest or not shortest[0]:
+            continue
+        for factor in (1.0, 1.05, 1.5):
+            budget = shortest[1] * factor
+            for algorithm, search in engines(graph).items():
+                path, cost, _ = search(start, goal, budget)
+                if algorithm == "UCS":
+                    assert path, f"UCS missed a route within {factor}x the shortest distance"
+                if path:
+                    assert (path[0], path[-1]) == (start, goal)
+                    assert cost <= budget + 1e-6
+                    assert cost == pytest.approx(route_cost(graph, [graph.id_of(name) for name in path]))
+        # Just below the shortest distance nothing fits
+        for algorithm, search in engines(graph).items():
+            assert search(start, goal, shortest[1] * 0.99)[0] == [], algorithm
+
+
+@pytest.mark.parametrize("algorithm", ["BFS", "DFS", "IDDFS"])
+def test_budget_that_fits_the_unpruned_route_changes_nothing(algorithm):
+    graph = compile_graph(random_geometric(100, seed=3))
+    rng = random.Random(2)
+    for _ in range(20):
+        start, goal = rng.sample(graph.names, 2)
+        path, cost, _ = engines(graph)[algorithm](start, goal, None)
+        if path:
+            assert engines(graph)[algorithm](start, goal, cost)[0] == path
+
+
+def test_depth_limited_routes_fit_limit_and_budget():
+    graph = compile_graph(random_geometric(100, seed=2))
+    rng = random.Random(1)
+    for _ in range(20):
+        start, goal = rng.sample(graph.names, 2)
+        shortest = UniformCostSearch(graph).search(start, goal)
+        if not shortest or not shortest[0]:
+            continue
+        for factor in (1.0, 1.2):
+            budget = shortest[1] * factor
+            for limit in (5, 10, 20):
+                path, cost, _ = dls.search(start, goal, limit, graph=graph, max_cost=budget)
+                if hop_limited_cost(graph, start, goal, limit) > budget + 1e-9:
+                    assert path == []
+                if path:
+                    assert len(path) <= limit
+                    assert cost <= budget + 1e-6
@@ -0,0 +1,33 @@
+"""
+Predecessor maps: every engine returns a connected route that starts at the
+start, ends at the goal and costs what the engine reports.
+"""
+
+import pytest
+
+from algorithms import dfs, dls
+from algorithms.bfs import BreadthFirstSearch
+from algorithms.ucs import UniformCostSearch
+from helpers.graph_helper import build_path, compile_graph
+from helpers.synthetic_graph_helper import scale_free
+
+
+def test_build_path_follows_the_predecessors():
+    assert build_path({3: None, 5: 3, 1: 5, 4: 5}, 1) == [3, 5, 1]
+    assert build_path({3: None}, 3) == [3]
+
+
+@pytest.mark.parametrize("search", [
+    lambda graph, start, goal: BreadthFirstSearch(graph).search(start, goal),
+    lambda graph, start, goal: dfs.search(start, goal, graph=graph),
+    lambda graph, start, goal: dls.search(start, goal, graph.num_nodes, graph=graph),
+    lambda graph, start, goal: UniformCostSearch(graph).search(start, goal) or ([], 0, 0),
+], ids=["BFS", "DFS", "DLS", "UCS"])
+def test_routes_are_connected(search, sample_pairs, route_cost):
+    graph = compile_graph(scale_free(80, seed=9))
+    for start, goal in sample_pairs(graph):
+        path, cost, _ = search(graph, start, goal)
+        if path:
+            assert (path[0], path[-1]) == (start, goal)
+            assert len(set(path)) == len(path)
+            assert route_cost(graph, [graph.id_of(name) for name in path]) == pytest.approx(cost)
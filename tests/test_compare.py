@@ -0,0 +1,67 @@
+"""
+Comparison mode: every algorithm answers the same query in its own process, a
+search that does not finish within the timeout is stopped and reported.
+"""
+
+import multiprocessing
+import time
+
+import pytest
+
+from algorithms import compare
+from algorithms.compare import compare_algorithms
+from helpers.graph_helper import compile_graph
+from store.states import GlobalState
+
+forked = pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+
+
+@pytest.fixture(autouse=True)
+def locations(monkeypatch):
+    graph = [
+        {"node": "A", "branch": [{"node": "B", "distance": 2}, {"node": "C", "distance": 9}]},
+        {"node": "B", "branch": [{"node": "C", "distance": 3}]},
+        {"node": "C", "branch": [{"node": "D", "distance": 1}]},
+        {"node": "D", "branch": []},
+    ]
+    monkeypatch.setattr(GlobalState, "compiled_graph", compile_graph(graph))
+    monkeypatch.setattr(GlobalState, "all_pairs", None)
+    monkeypatch.setattr(GlobalState, "result_cache", None)
+
+
+def test_every_algorithm_answers_with_its_metrics():
+    results = compare_algorithms("A", ["D"], timeout=30)
+    assert [result["algorithm"] for result in results] == list(compare.COMPARED_ALGORITHMS)
+    assert all(result["status"] == "found" for result in results)
+    ucs = results[compare.COMPARED_ALGORITHMS.index("UCS")]
+    assert ucs["routes"] == [["A", "B", "C", "D"]] and ucs["distance"] == 6
+    for result in results:
+        assert result["metrics"]["expanded"] > 0
+        assert result["metrics"]["peak_memory"] is not None
+
+
+def test_multi_destination_legs_get_their_peak_memory():
+    result = compare.compare_one("UCS", "A", ["B", "D"])
+    assert result["routes"] == [["A", "B"], ["B", "C", "D"]]
+    assert all(goal["peak_memory"] is not None for goal in result["metrics"]["goals"])
+
+
+@forked
+def test_slow_search_is_stopped_at_the_timeout(monkeypatch):
+    search_one = compare.compare_one
+
+    def slow_or_broken(algorithm, *args):
+        if algorithm == "DFS":
+            time.sleep(60)
+        if algorithm == "DLS":
+            raise ValueError("broken search")
+        return search_one(algorithm, *args)
+
+    # The search processes are forked, they see the patched function
+    monkeypatch.setattr(compare, "compare_one", slow_or_broken)
+    started = time.perf_counter()
+    results = {result["algorithm"]: result for result in compare_algorithms("A", ["D"], timeout=1)}
+    assert time.perf_counter() - started < 10
+    assert results["DFS"]["status"] == "timeout"
+    assert results["DLS"] == {"algorithm": "DLS", "status": "error", "error": "broken search"}
+    assert results["BFS"]["status"] == results["UCS"]["status"] == "found"
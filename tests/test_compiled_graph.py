@@ -0,0 +1,28 @@
+"""
+Compiled location graph: ids follow the sorted names and the branches keep
+their order, so the searches break ties like they did on the names.
+"""
+
+from algorithms.ucs import UniformCostSearch
+from helpers.graph_helper import compile_graph
+
+
+def test_ids_follow_the_sorted_names():
+    graph = compile_graph([
+        {"node": "Kota", "branch": [{"node": "Pasar", "distance": 2}, {"node": "Alun", "distance": 1}]},
+        {"node": "Alun", "branch": []},
+    ])
+    assert graph.names == ["Alun", "Kota", "Pasar"]
+    assert graph.to_names([neighbor for neighbor, _ in graph.neighbors(graph.id_of("Kota"))]) == ["Pasar", "Alun"]
+    assert list(graph.neighbors(graph.id_of("Pasar"))) == []
+
+
+def test_ucs_breaks_cost_ties_by_name():
+    # Both routes cost 2, the one over the alphabetically first location is expanded first
+    graph = compile_graph([
+        {"node": "S", "branch": [{"node": "Z", "distance": 1}, {"node": "B", "distance": 1}]},
+        {"node": "Z", "branch": [{"node": "G", "distance": 1}]},
+        {"node": "B", "branch": [{"node": "G", "distance": 1}]},
+        {"node": "G", "branch": []},
+    ])
+    assert UniformCostSearch(graph).search("S", "G") == (["S", "B", "G"], 2, 4)
@@ -0,0 +1,68 @@
+"""
+Contraction hierarchy: queries must give the Dijkstra distance and a road path
+of that length, also after the hierarchy was saved and loaded again.
+"""
+
+import random
+
+import networkx as nx
+import pytest
+
+from helpers.contraction_helper import ContractionHierarchy, load_contraction_hierarchy
+from helpers.graph_helper import compile_graph
+from helpers.road_cache_helper import save_road_network
+from helpers.synthetic_graph_helper import grid_city, random_geometric, scale_free
+
+
+def check_queries(hierarchy, graph, distances_to, route_cost, seed=0):
+    rng = random.Random(seed)
+    for _ in range(10):
+        goal = rng.randrange(graph.num_nodes)
+        to_goal = distances_to(graph, goal)
+        for start in rng.sample(range(graph.num_nodes), 10):
+            result = hierarchy.query(start, goal)
+            if start not in to_goal:
+                assert result is None
+                continue
+            distance, path = result
+            assert distance == pytest.approx(to_goal[start])
+            assert (path[0], path[-1]) == (start, goal)
+            assert route_cost(graph, path) == pytest.approx(distance)
+
+
+@pytest.mark.parametrize("generator", [grid_city, random_geometric, scale_free])
+def test_queries_match_dijkstra(generator, distances_to, route_cost):
+    graph = compile_graph(generator(300, seed=10))
+    check_queries(ContractionHierarchy.build(graph), graph, distances_to, route_cost)
+
+
+def test_queries_follow_one_way_edges(one_way_city, distances_to, route_cost):
+    graph = one_way_city(200, seed=11)
+    hierarchy = ContractionHierarchy.build(graph)
+    assert hierarchy.num_shortcuts > 0
+    check_queries(hierarchy, graph, distances_to, route_cost)
+
+
+def test_saved_hierarchy_answers_the_same(tmp_path, one_way_city, distances_to, route_cost):
+    graph = one_way_city(150, seed=12)
+    hierarchy = ContractionHierarchy.build(graph, "digest")
+    hierarchy.save(tmp_path / "hierarchy.npz")
+
+    loaded = ContractionHierarchy.load(tmp_path / "hierarchy.npz")
+    assert loaded.digest == "digest"
+    assert loaded.middles == hierarchy.middles
+    check_queries(loaded, graph, distances_to, route_cost)
+
+
+def test_hierarchy_of_other_road_data_is_rebuilt(tmp_path):
+    G = nx.MultiDiGraph()
+    for node in range(5):
+        G.add_node(node, x=112.6 + node / 1000, y=-7.98)
+    for node in range(4):
+        G.add_edge(node, node + 1, length=100.0)
+    road = save_road_network(G, tmp_path / "road")
+    ContractionHierarchy.build(road.to_compiled(), "other road data").save(tmp_path / "road" / "contraction_hierarchy.npz")
+
+    hierarchy = load_contraction_hierarchy(road, directory=tmp_path / "road")
+    assert hierarchy.digest == road.digest
+    assert hierarchy.query(0, 4) == (400.0, [0, 1, 2, 3, 4])
@@ -0,0 +1,34 @@
+"""
+Branch distances: the bounded Dijkstra per source gives the shortest distance
+of every reachable target, also when the sources are spread over processes.
+"""
+
+import numpy as np
+import pytest
+
+from helpers.distance_helper import compute_branch_distances, dijkstra_to_targets
+from helpers.graph_helper import build_path
+
+
+def test_unreachable_targets_are_left_out(one_way_city, expected_distances, route_cost):
+    graph = one_way_city(80, seed=5)
+    expected = expected_distances(graph, [0], list(range(graph.num_nodes)))[0]
+    parents = {}
+    distances = dijkstra_to_targets(graph, 0, set(range(graph.num_nodes)), parents)
+    assert set(distances) == {target for target in range(graph.num_nodes) if np.isfinite(expected[target])}
+    for target, distance in distances.items():
+        assert distance == pytest.approx(expected[target])
+        assert route_cost(graph, build_path(parents, target)) == pytest.approx(distance)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_branch_distances_match_dijkstra(one_way_city, expected_distances, workers):
+    graph = one_way_city(120, seed=6)
+    jobs = {source: set(range(source % 7, graph.num_nodes, 11)) for source in range(0, graph.num_nodes, 9)}
+    results = compute_branch_distances(graph, jobs, workers)
+    assert set(results) == set(jobs)
+    for source, targets in jobs.items():
+        expected = expected_distances(graph, [source], sorted(targets))[0]
+        assert results[source] == pytest.approx({
+            target: distance for target, distance in zip(sorted(targets), expected) if np.isfinite(distance)
+        })
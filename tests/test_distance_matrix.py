@@ -0,0 +1,74 @@
+"""
+Distance matrix: every entry must be the Dijkstra distance from its origin to
+its target, also when the origins are spread over worker processes.
+"""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from helpers.graph_helper import compile_graph
+from helpers.matrix_helper import MATRIX_CHUNK_SIZE, distance_matrix, road_distance_matrix
+from helpers.road_cache_helper import save_road_network
+from helpers.synthetic_graph_helper import random_geometric, scale_free
+from store.states import GlobalState
+
+
+@pytest.fixture
+def one_way_graph():
+    return compile_graph([
+        {"node": "A", "branch": [{"node": "B", "distance": 1}, {"node": "B", "distance": 0.5}]},
+        {"node": "B", "branch": [{"node": "C", "distance": 2}]},
+        {"node": "C", "branch": []},
+    ])
+
+
+def test_matrix_follows_the_edge_directions(one_way_graph):
+    matrix = distance_matrix(one_way_graph, [0, 2], [2, 0], workers=1)
+    # A reaches C over the shorter parallel edge, C reaches no other node
+    assert matrix.distances.tolist() == [[2.5, 0.0], [0.0, np.inf]]
+    assert matrix.reachable().tolist() == [[True, True], [True, False]]
+
+
+@pytest.mark.parametrize("generator", [random_geometric, scale_free])
+def test_matrix_matches_dijkstra(generator, expected_distances, route_cost):
+    graph = compile_graph(generator(300, seed=8))
+    origins = list(range(0, 300, 2))  # More than one chunk of origins
+    targets = list(range(1, 300, 7))
+    assert len(origins) > MATRIX_CHUNK_SIZE
+
+    expected = expected_distances(graph, origins, targets)
+    matrix = distance_matrix(graph, origins, targets, predecessors=True, workers=1)
+    assert np.allclose(matrix.distances, expected)
+    assert np.array_equal(distance_matrix(graph, origins, targets, workers=2).distances, matrix.distances)
+
+    for i in range(0, len(origins), 10):
+        for j in range(len(targets)):
+            path = matrix.path(i, j)
+            if path is None:
+                assert not np.isfinite(expected[i, j])
+                continue
+            assert (path[0], path[-1]) == (origins[i], targets[j])
+            assert route_cost(graph, path) == pytest.approx(expected[i, j])
+
+
+def test_max_distance_leaves_farther_pairs_out(expected_distances):
+    graph = compile_graph(random_geometric(200, seed=9))
+    origins, targets = list(range(20)), list(range(200))
+    expected = expected_distances(graph, origins, targets)
+    matrix = distance_matrix(graph, origins, targets, max_distance=500, workers=1)
+    assert np.array_equal(matrix.distances, np.where(expected <= 500, matrix.distances, np.inf))
+    assert np.allclose(matrix.distances[expected <= 500], expected[expected <= 500])
+
+
+def test_road_matrix_of_unknown_nodes_is_inf(tmp_path, monkeypatch):
+    G = nx.MultiDiGraph()
+    for node in (10, 20, 30):
+        G.add_node(node, x=112.6 + node / 1000, y=-7.98)
+    G.add_edge(10, 20, length=100.0)
+    G.add_edge(20, 30, length=50.0)
+    monkeypatch.setattr(GlobalState, "road", save_road_network(G, tmp_path / "road"))
+
+    matrix = road_distance_matrix([10, 99, 30], [30, 99], workers=1)
+    assert matrix.distances.tolist() == [[150.0, np.inf], [np.inf, np.inf], [0.0, np.inf]]
+    assert matrix.origins.tolist() == [0, -1, 2]
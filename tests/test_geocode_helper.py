@@ -0,0 +1,67 @@
+"""
+Geocoding cache: answers, also "not found", are cached per backend.
+"""
+
+import sqlite3
+
+import pytest
+
+from helpers.geocode_helper import Geocoder, GeocodeCache, GeocoderBackend, normalize_query
+
+
+class CountingBackend(GeocoderBackend):
+    def __init__(self, name, places):
+        self.name = name
+        self.places = places
+        self.calls = 0
+
+    def geocode(self, query):
+        self.calls += 1
+        return self.places.get(normalize_query(query))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = GeocodeCache(tmp_path / "geocode_cache.sqlite")
+    yield cache
+    cache.close()
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        GeocoderBackend()
+
+
+def test_answers_are_cached(cache):
+    backend = CountingBackend("first", {"alun-alun": (-7.98, 112.63)})
+    geocoder = Geocoder(backend, cache)
+    assert geocoder.geocode_many(["Alun-Alun", "alun-alun ", "nowhere"]) == [(-7.98, 112.63), (-7.98, 112.63), None]
+    assert geocoder.geocode_many(["ALUN-ALUN", "Nowhere"]) == [(-7.98, 112.63), None]
+    assert backend.calls == 2
+    assert geocoder.stats()["hits"] == 2
+
+
+def test_not_found_is_not_shared_between_backends(cache):
+    Geocoder(CountingBackend("first", {}), cache).geocode("kampus umm")
+    second = CountingBackend("second", {"kampus umm": (-7.92, 112.59)})
+    assert Geocoder(second, cache).geocode("Kampus UMM") == (-7.92, 112.59)
+    assert second.calls == 1
+
+
+def test_old_cache_format_is_replaced(tmp_path):
+    filepath = tmp_path / "geocode_cache.sqlite"
+    connection = sqlite3.connect(filepath)
+    connection.execute("CREATE TABLE geocode (query TEXT PRIMARY KEY, latitude REAL, longitude REAL, backend TEXT, created REAL)")
+    connection.execute("INSERT INTO geocode VALUES ('kampus umm', NULL, NULL, 'first', 0)")
+    connection.commit()
+    connection.close()
+
+    cache = GeocodeCache(filepath)
+    assert len(cache) == 0
+    assert Geocoder(CountingBackend("first", {"kampus umm": (1.0, 2.0)}), cache).geocode("Kampus UMM") == (1.0, 2.0)
+    cache.close()
+
+
+def test_geocoder_without_cache_is_refused_in_tests():
+    with pytest.raises(AssertionError):
+        Geocoder(CountingBackend("first", {}))
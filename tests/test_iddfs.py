@@ -0,0 +1,65 @@
+"""
+Depth-limited search and iterative deepening: DLS finds a route exactly when
+one fits the limit, IDDFS finds a route with the fewest hops.
+"""
+
+import pytest
+
+from algorithms import dls
+from helpers.graph_helper import compile_graph
+from helpers.metrics_helper import SearchMetrics
+from helpers.synthetic_graph_helper import grid_city, random_geometric, scale_free
+
+
+@pytest.fixture
+def deep_first_graph():
+    # DFS reaches C through A and B first, at the limit, and must still find it through S
+    return compile_graph([
+        {"node": "S", "branch": [{"node": "C", "distance": 9}, {"node": "A", "distance": 1}]},
+        {"node": "A", "branch": [{"node": "B", "distance": 1}]},
+        {"node": "B", "branch": [{"node": "C", "distance": 1}]},
+        {"node": "C", "branch": [{"node": "G", "distance": 1}]},
+        {"node": "G", "branch": []},
+        {"node": "X", "branch": [{"node": "S", "distance": 1}]},
+    ])
+
+
+def test_node_reached_deep_first_is_not_lost(deep_first_graph):
+    path, cost, _ = dls.search("S", "G", limit=4, graph=deep_first_graph)
+    assert path == ["S", "C", "G"]
+    assert cost == 10
+
+
+@pytest.mark.parametrize("generator", [grid_city, random_geometric, scale_free])
+def test_dls_finds_route_within_limit(generator, fewest_hops, route_cost, sample_pairs):
+    graph = compile_graph(generator(150, seed=5))
+    for start, goal in sample_pairs(graph):
+        hops = fewest_hops(graph, graph.id_of(start), graph.id_of(goal))
+        for limit in (3, 6, 10):
+            path, cost, _ = dls.search(start, goal, limit, graph=graph)
+            if hops is None or hops + 1 > limit:
+                assert path == []
+                continue
+            assert (path[0], path[-1]) == (start, goal)
+            assert len(path) <= limit
+            assert route_cost(graph, [graph.id_of(name) for name in path]) == pytest.approx(cost)
+
+
+@pytest.mark.parametrize("generator", [grid_city, random_geometric, scale_free])
+def test_iddfs_has_fewest_hops(generator, fewest_hops, sample_pairs):
+    graph = compile_graph(generator(150, seed=6))
+    for start, goal in sample_pairs(graph):
+        path, _, _ = dls.search_iterative(start, goal, graph=graph)
+        hops = fewest_hops(graph, graph.id_of(start), graph.id_of(goal))
+        if hops is None:
+            assert path == []
+            continue
+        assert len(path) == hops + 1
+        assert (path[0], path[-1]) == (start, goal)
+
+
+def test_iddfs_stops_when_goal_is_unreachable(deep_first_graph):
+    metrics = SearchMetrics("IDDFS")
+    assert dls.search_iterative("S", "X", metrics=metrics, graph=deep_first_graph) == ([], 0, metrics.expanded)
+    # The limit grows until an iteration is no longer cut off, not up to every node
+    assert len(metrics.iterations) < deep_first_graph.num_nodes
@@ -0,0 +1,23 @@
+"""
+Location graph cache: its fingerprint changes with every input of the graph
+(road data, locations, branch topology) but not with the branch distances.
+"""
+
+from helpers.dataset_helper import location_graph_fingerprint
+
+LOCATIONS = [{"name": "A", "node_id": 1}, {"name": "B", "node_id": 2}]
+GRAPH = [{"node": "A", "branch": [{"node": "B", "distance": 10}]}, {"node": "B", "branch": []}]
+
+
+def test_fingerprint_ignores_the_distances():
+    computed = [{"node": "A", "branch": [{"node": "B", "distance": 1234.5}]}, {"node": "B", "branch": []}]
+    assert location_graph_fingerprint("road", LOCATIONS, GRAPH) == location_graph_fingerprint("road", LOCATIONS, computed)
+
+
+def test_fingerprint_follows_the_inputs():
+    fingerprint = location_graph_fingerprint("road", LOCATIONS, GRAPH)
+    moved = [LOCATIONS[0], {"name": "B", "node_id": 3}]
+    reversed_branch = [{"node": "A", "branch": []}, {"node": "B", "branch": [{"node": "A", "distance": 10}]}]
+    assert location_graph_fingerprint("other road", LOCATIONS, GRAPH) != fingerprint
+    assert location_graph_fingerprint("road", moved, GRAPH) != fingerprint
+    assert location_graph_fingerprint("road", LOCATIONS, reversed_branch) != fingerprint
@@ -0,0 +1,84 @@
+"""
+Route maps: encoded polylines must round-trip within their precision and the
+simplified lines must stay within the tolerance of the original ones.
+"""
+
+import json
+import math
+import random
+
+import pytest
+
+from helpers.map_helper import decode_polyline, encode_polyline, simplify, write_polylines
+
+# Example of the polyline algorithm documentation
+REFERENCE_POINTS = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+REFERENCE_POLYLINE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def random_walk(count, seed):
+    rng = random.Random(seed)
+    points = [(-7.98, 112.63)]
+    for _ in range(count - 1):
+        lat, lon = points[-1]
+        points.append((lat + rng.uniform(-1e-3, 1e-3), lon + rng.uniform(-1e-3, 1e-3)))
+    return points
+
+
+def deviation(point, start, end, latitude):
+    """Meters between a point and a segment, in the projection simplify uses around `latitude`."""
+    scale = 111320.0 * math.cos(math.radians(latitude))
+    (px, py), (ax, ay), (bx, by) = [(lon * scale, lat * 110540.0) for lat, lon in (point, start, end)]
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length)) if length else 0.0
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+def test_reference_polyline():
+    assert encode_polyline(REFERENCE_POINTS) == REFERENCE_POLYLINE
+    assert decode_polyline(REFERENCE_POLYLINE) == REFERENCE_POINTS
+    assert encode_polyline([]) == ""
+    assert decode_polyline("") == []
+
+
+@pytest.mark.parametrize("precision", [5, 6])
+def test_polyline_round_trip(precision):
+    points = random_walk(500, seed=precision)
+    decoded = decode_polyline(encode_polyline(points, precision), precision)
+    assert len(decoded) == len(points)
+    for (lat, lon), (decoded_lat, decoded_lon) in zip(points, decoded):
+        assert abs(lat - decoded_lat) <= 0.5 / 10 ** precision + 1e-12
+        assert abs(lon - decoded_lon) <= 0.5 / 10 ** precision + 1e-12
+
+
+@pytest.mark.parametrize("tolerance", [1.0, 10.0, 50.0])
+def test_simplify_stays_within_tolerance(tolerance):
+    points = random_walk(1000, seed=1)
+    simplified = simplify(points, tolerance)
+    assert (simplified[0], simplified[-1]) == (points[0], points[-1])
+    assert len(simplified) < len(points)
+
+    # Every dropped point lies within the tolerance of the kept segment around it
+    latitude = sum(lat for lat, _ in points) / len(points)
+    kept = [points.index(point) for point in simplified]
+    for first, last in zip(kept, kept[1:]):
+        for point in points[first + 1:last]:
+            assert deviation(point, points[first], points[last], latitude) <= tolerance + 1e-6
+
+
+def test_simplify_straight_line_and_zero_tolerance():
+    line = [(-7.98 + i * 1e-4, 112.63 + i * 1e-4) for i in range(50)]
+    assert simplify(line, 1.0) == [line[0], line[-1]]
+    assert simplify(line, 0) == line
+    assert simplify(line[:2], 1.0) == line[:2]
+
+
+def test_write_polylines(tmp_path):
+    geometries = [{"job": 1, "algorithm": "UCS", "distance": 1200.0,
+                   "coordinates": REFERENCE_POINTS, "stops": [REFERENCE_POINTS[0], REFERENCE_POINTS[-1]]}]
+    write_polylines(geometries, tmp_path / "routes.jsonl")
+    with open(tmp_path / "routes.jsonl") as f:
+        record = json.loads(f.readline())
+    assert record["polyline"] == REFERENCE_POLYLINE
+    assert decode_polyline(record["stops"]) == [REFERENCE_POINTS[0], REFERENCE_POINTS[-1]]
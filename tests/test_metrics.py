@@ -0,0 +1,77 @@
+"""
+Search metrics: the engines count expanded, generated and duplicate nodes and
+the frontier peak the same way, multi-goal totals add up their legs.
+"""
+
+import pytest
+
+from algorithms import dfs
+from algorithms.bfs import BreadthFirstSearch
+from algorithms.ucs import UniformCostSearch
+from helpers.graph_helper import compile_graph
+from helpers.metrics_helper import COUNTER_FIELDS, SearchMetrics, measure
+from store.states import GlobalState
+
+
+@pytest.fixture
+def graph():
+    # UCS reaches B and G twice, first over the expensive edge
+    return compile_graph([
+        {"node": "S", "branch": [{"node": "A", "distance": 1}, {"node": "B", "distance": 4}]},
+        {"node": "A", "branch": [{"node": "B", "distance": 1}, {"node": "G", "distance": 5}]},
+        {"node": "B", "branch": [{"node": "G", "distance": 1}]},
+        {"node": "G", "branch": []},
+    ])
+
+
+def counters(metrics):
+    return tuple(getattr(metrics, name) for name in COUNTER_FIELDS)
+
+
+def test_ucs_counts_duplicate_pushes(graph):
+    metrics = SearchMetrics("UCS")
+    assert UniformCostSearch(graph).search("S", "G", metrics)[:2] == (["S", "A", "B", "G"], 3)
+    assert counters(metrics) == (4, 5, 2, 3)
+
+
+def test_bfs_pushes_every_node_once(graph):
+    metrics = SearchMetrics("BFS")
+    assert BreadthFirstSearch(graph).search("S", "G", metrics)[:2] == (["S", "A", "G"], 6)
+    assert counters(metrics) == (4, 3, 0, 2)
+
+
+def test_multigoal_totals_add_up_the_legs(graph, monkeypatch):
+    monkeypatch.setattr(GlobalState, "compiled_graph", graph)
+    monkeypatch.setattr(GlobalState, "start_location", "S")
+    monkeypatch.setattr(GlobalState, "destination_location", ["B", "G"])
+    metrics = SearchMetrics("DFS")
+    dfs.search_multigoal(metrics)
+
+    assert [leg.goal for leg in metrics.goals] == ["B", "G"]
+    for name in ("expanded", "generated", "duplicates"):
+        assert getattr(metrics, name) == sum(getattr(leg, name) for leg in metrics.goals)
+    assert metrics.peak_frontier == max(leg.peak_frontier for leg in metrics.goals)
+    rows = metrics.to_rows()
+    assert [row["goal"] for row in rows] == ["B", "G", None]
+    assert rows[-1]["expanded"] == metrics.expanded
+
+
+def test_restored_counters_are_marked_cached(graph):
+    searched = SearchMetrics("UCS")
+    UniformCostSearch(graph).search("S", "G", searched)
+    restored = SearchMetrics("UCS")
+    restored.restore(searched.counters())
+    assert restored.cached
+    assert counters(restored) == counters(searched)
+
+
+def test_memory_is_only_traced_when_asked():
+    metrics = SearchMetrics("UCS")
+    with measure(metrics):
+        sum(range(1000))
+    assert metrics.peak_memory is None
+    assert metrics.wall_time > 0 and metrics.cpu_time >= 0
+
+    with measure(metrics, trace_memory=True):
+        [0] * 10000
+    assert metrics.peak_memory >= 10000 * 8
@@ -0,0 +1,84 @@
+"""
+Search result cache: hits reuse the counters of the search, saving is batched.
+"""
+
+import json
+
+from helpers.metrics_helper import SearchMetrics
+from helpers.result_cache_helper import RESULT_CACHE_SAVE_INTERVAL, ResultCache
+
+
+def search(metrics=None, result=(["A", "B"], 5.0, 2)):
+    if metrics is not None:
+        metrics.record(2, 3, 1, 2)
+    return result
+
+
+def test_hit_restores_counters():
+    cache = ResultCache("graph")
+    first = SearchMetrics("UCS")
+    assert cache.fetch("UCS", "A", "B", None, lambda: search(first), first) == (["A", "B"], 5.0, 2)
+    assert not first.cached
+
+    second = SearchMetrics("UCS")
+    assert cache.fetch("UCS", "A", "B", None, lambda: search(second), second) == (["A", "B"], 5.0, 2)
+    assert second.cached
+    assert (second.expanded, second.generated, second.duplicates, second.peak_frontier) == (2, 3, 1, 2)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_result_without_counters_is_searched_again_for_metrics():
+    cache = ResultCache("graph")
+    cache.fetch("UCS", "A", "B", None, search)
+    metrics = SearchMetrics("UCS")
+    cache.fetch("UCS", "A", "B", None, lambda: search(metrics), metrics)
+    assert not metrics.cached
+    assert metrics.expanded == 2
+    assert cache.fetch("UCS", "A", "B", None, search) == (["A", "B"], 5.0, 2)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_saved_every_interval(tmp_path):
+    filepath = tmp_path / "result_cache.json"
+    cache = ResultCache("graph", filepath=filepath)
+    for i in range(RESULT_CACHE_SAVE_INTERVAL - 1):
+        cache.fetch("UCS", "A", f"goal-{i}", None, search)
+    assert not filepath.exists()
+
+    cache.fetch("UCS", "A", "last", None, search)
+    assert len(ResultCache.load("graph", filepath)) == RESULT_CACHE_SAVE_INTERVAL
+
+
+def test_load_keeps_counters_and_drops_other_versions(tmp_path):
+    filepath = tmp_path / "result_cache.json"
+    cache = ResultCache("graph", filepath=filepath)
+    metrics = SearchMetrics("UCS")
+    cache.fetch("UCS", "A", ["B", "C"], None, lambda: [search(metrics)], metrics)
+    cache.save()
+
+    loaded = ResultCache.load("graph", filepath)
+    restored = SearchMetrics("UCS")
+    assert loaded.fetch("UCS", "A", ["B", "C"], None, lambda: None, restored) == [(["A", "B"], 5.0, 2)]
+    assert restored.cached and restored.expanded == 2
+    assert len(ResultCache.load("other graph", filepath)) == 0
+
+    with open(filepath, "w") as f:
+        json.dump({"graph_version": "graph", "results": [["UCS", "A", "B", None, [["A", "B"], 5.0, 2]]]}, f)
+    assert len(ResultCache.load("graph", filepath)) == 0
+
+
+def test_save_replaces_the_file_as_a_whole(tmp_path):
+    filepath = tmp_path / "result_cache.json"
+    filepath.write_text("left over of an interrupted save")
+    cache = ResultCache("graph", filepath=filepath)
+    cache.fetch("UCS", "A", "B", None, search)
+    cache.save()
+    assert [path.name for path in tmp_path.iterdir()] == ["result_cache.json"]
+    assert len(ResultCache.load("graph", filepath)) == 1
+
+
+def test_cache_without_file_is_not_saved(tmp_path):
+    cache = ResultCache("graph", filepath=None)
+    cache.fetch("UCS", "A", "B", None, search)
+    cache.save()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,50 @@
+"""
+Road network cache: the saved network is opened memory-mapped and its graph
+reads the mapped arrays, with the same edges as the graph compiled from OSM.
+"""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from helpers.graph_helper import compile_road_graph
+from helpers.road_cache_helper import load_road_network, save_road_network
+
+
+@pytest.fixture
+def G():
+    """Small OSM-like graph with a parallel edge and node ids out of order."""
+    G = nx.MultiDiGraph()
+    for node in (30, 10, 20, 40):
+        G.add_node(node, x=112.6 + node / 1000, y=-7.98)
+    G.add_edge(10, 20, length=5.0)
+    G.add_edge(10, 20, length=3.0)
+    G.add_edge(20, 30, length=4.0)
+    G.add_edge(30, 10, length=7.0)
+    G.add_edge(40, 30, length=1.0)
+    return G
+
+
+@pytest.mark.parametrize("undirected", [False, True])
+def test_graph_matches_compiled_osm_graph(G, tmp_path, undirected):
+    road = save_road_network(G, tmp_path / "road")
+    graph, expected = road.to_compiled(undirected), compile_road_graph(G, undirected)
+    assert graph.num_nodes == expected.num_nodes and graph.num_edges == expected.num_edges
+    for name in G.nodes:
+        node, expected_node = graph.id_of(name), expected.id_of(name)
+        assert graph.name_of(node) == name
+        assert sorted(graph.to_names([n for n, _ in graph.neighbors(node)])) == \
+            sorted(expected.to_names([n for n, _ in expected.neighbors(expected_node)]))
+        assert sorted(d for _, d in graph.reverse().neighbors(node)) == \
+            sorted(d for _, d in expected.reverse().neighbors(expected_node))
+    assert graph.id_of(25) is None and graph.id_of(50) is None
+
+
+def test_graph_reads_the_mapped_arrays(G, tmp_path):
+    save_road_network(G, tmp_path / "road")
+    road = load_road_network(tmp_path / "road")
+    graph = road.to_compiled()
+    assert isinstance(graph.targets, np.memmap) and isinstance(graph.node_ids, np.memmap)
+    assert list(graph.neighbors(graph.id_of(10))) == [(graph.id_of(20), 3.0)]
+    assert graph.degree(graph.id_of(40)) == 1
+    assert road.to_compiled() is graph
@@ -0,0 +1,51 @@
+"""
+Road mode: the searches run on the road network between the road nodes of the
+locations and return routes of OSM node ids.
+"""
+
+import networkx as nx
+import pytest
+
+from algorithms.runner import search_route
+from helpers.road_cache_helper import save_road_network
+from store.states import GlobalState
+
+
+@pytest.fixture(autouse=True)
+def road(tmp_path, monkeypatch):
+    # A long direct road from 1 to 4 and a shorter way over 2 and 3
+    G = nx.MultiDiGraph()
+    for node in range(1, 6):
+        G.add_node(node, x=112.6 + node / 1000, y=-7.98)
+    for u, v, length in [(1, 4, 900.0), (1, 2, 200.0), (2, 3, 200.0), (3, 4, 200.0), (4, 1, 900.0)]:
+        G.add_edge(u, v, length=length)
+    monkeypatch.setattr(GlobalState, "road", save_road_network(G, tmp_path / "road"))
+    monkeypatch.setattr(GlobalState, "road_tiles", None)
+    monkeypatch.setattr(GlobalState, "result_cache", None)
+    monkeypatch.setattr(GlobalState, "location_nodes", [
+        {"name": "Alun-Alun", "node_id": 1},
+        {"name": "Stasiun", "node_id": 4},
+        {"name": "Desa", "node_id": 5},
+        {"name": "Belum dipetakan", "node_id": None},
+    ])
+
+
+def test_ucs_finds_the_shortest_road_route():
+    assert search_route("UCS", "Alun-Alun", "Stasiun", road=True)[:2] == ([1, 2, 3, 4], 600.0)
+
+
+@pytest.mark.parametrize("algorithm, depth_limit", [("BFS", None), ("DFS", None), ("DLS", 5), ("IDDFS", None)])
+def test_every_search_returns_a_road_route(algorithm, depth_limit):
+    path, cost, _ = search_route(algorithm, "Alun-Alun", "Stasiun", depth_limit, road=True)
+    assert (path[0], path[-1]) == (1, 4)
+    assert cost in (600.0, 900.0)
+
+
+def test_bfs_takes_the_road_with_the_fewest_nodes():
+    assert search_route("BFS", "Alun-Alun", "Stasiun", road=True)[:2] == ([1, 4], 900.0)
+
+
+def test_unreachable_or_unmapped_location_has_no_route():
+    assert search_route("UCS", "Alun-Alun", "Desa", road=True)[0] == []
+    assert search_route("BFS", "Alun-Alun", "Belum dipetakan", road=True)[0] == []
+    assert search_route("UCS", "Tidak ada", "Stasiun", road=True)[0] == []
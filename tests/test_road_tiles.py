@@ -0,0 +1,70 @@
+"""
+Tiled road network: the tiles must give the same graph as the full road network
+cache, also when the memory cap forces tiles to be dropped and loaded again.
+"""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithms import dfs
+from helpers.distance_helper import dijkstra_to_targets
+from helpers.road_cache_helper import road_network_digest, save_road_network
+from helpers.road_tile_helper import load_road_tiles, save_road_tiles
+
+
+@pytest.fixture
+def road(tmp_path):
+    """Random road network of 200 nodes spread over a few tiles, with parallel edges."""
+    rng = np.random.default_rng(7)
+    G = nx.MultiDiGraph()
+    for node in range(200):
+        G.add_node(1000 + 3 * node, x=112.6 + rng.uniform(0, 0.05), y=-7.98 + rng.uniform(0, 0.05))
+    nodes = list(G.nodes)
+    for _ in range(800):
+        u, v = rng.choice(nodes, 2, replace=False)
+        G.add_edge(int(u), int(v), length=float(rng.uniform(10, 500)))
+    return save_road_network(G, tmp_path / "road")
+
+
+@pytest.mark.parametrize("undirected", [False, True])
+def test_tiles_match_road_network(road, tmp_path, undirected):
+    save_road_tiles(road, tmp_path / "tiles", tile_size=0.01)
+    tiles = load_road_tiles(tmp_path / "tiles", road.digest)
+    assert tiles.num_tiles > 1
+
+    compiled, tiled = road.to_compiled(undirected), tiles.to_compiled(undirected)
+    for node in range(road.num_nodes):
+        assert tiled.name_of(node) == compiled.name_of(node)
+        assert list(tiled.neighbors(node)) == pytest.approx(list(compiled.neighbors(node)))
+        assert list(tiled.reverse().neighbors(node)) == pytest.approx(list(compiled.reverse().neighbors(node)))
+
+
+def test_memory_cap_evicts_tiles(road, tmp_path):
+    save_road_tiles(road, tmp_path / "tiles", tile_size=0.01)
+    tiles = load_road_tiles(tmp_path / "tiles", road.digest, memory_cap=1)
+    start, goal = road.node_ids[0], road.node_ids[-1]
+
+    expected = dfs.search(start, goal, graph=road.to_compiled())
+    assert dfs.search(start, goal, graph=tiles.to_compiled()) == expected
+    assert tiles.evictions > 0
+    assert len(tiles.tiles) == 1
+
+
+def test_tiles_of_other_road_data_are_not_loaded(road, tmp_path):
+    save_road_tiles(road, tmp_path / "tiles")
+    assert load_road_tiles(tmp_path / "tiles", "another digest") is None
+    assert load_road_tiles(tmp_path / "missing") is None
+
+
+def test_distances_on_tiles_opened_from_the_digest(road, tmp_path):
+    # Startup opens the tiles with the digest of the road cache metadata only
+    save_road_tiles(road, tmp_path / "tiles", tile_size=0.01)
+    assert road_network_digest(tmp_path / "road") == road.digest
+    assert road_network_digest(tmp_path / "missing") is None
+    tiles = load_road_tiles(tmp_path / "tiles", road_network_digest(tmp_path / "road"))
+    assert len(tiles.tiles) == 0
+
+    compiled, tiled = road.to_compiled(undirected=True), tiles.to_compiled(undirected=True)
+    targets = set(range(1, road.num_nodes, 40))
+    assert dijkstra_to_targets(tiled, 0, targets) == pytest.approx(dijkstra_to_targets(compiled, 0, targets))
@@ -0,0 +1,41 @@
+"""
+Road segment cache: the least recently used segments are evicted, a saved cache
+loads back in the same order and segments of other road data are dropped.
+"""
+
+from helpers.segment_cache_helper import SegmentCache
+
+
+def segment(u):
+    return [u, u + 1], [(-7.98, 112.63 + u / 1000), (-7.98, 112.63 + (u + 1) / 1000)]
+
+
+def test_least_recently_used_segment_is_evicted():
+    cache = SegmentCache("road", max_entries=2)
+    cache.put(1, 2, *segment(1))
+    cache.put(2, 3, *segment(2))
+    assert cache.get(1, 2) == segment(1)
+    cache.put(3, 4, *segment(3))
+    assert (1, 2) in cache and (3, 4) in cache
+    assert (2, 3) not in cache
+    assert len(cache) == 2
+
+
+def test_saved_cache_is_loaded_in_use_order(tmp_path):
+    filepath = tmp_path / "segment_cache.json"
+    cache = SegmentCache("road")
+    for u in range(3):
+        cache.put(u, u + 1, *segment(u))
+    cache.get(0, 1)
+    cache.save(filepath)
+    assert [path.name for path in tmp_path.iterdir()] == ["segment_cache.json"]
+
+    loaded = SegmentCache.load("road", filepath, max_entries=2)
+    assert list(loaded.entries) == [(2, 3, "road"), (0, 1, "road")]
+    assert loaded.get(0, 1) == segment(0)
+    assert len(SegmentCache.load("other road", filepath)) == 0
+
+
+def test_unmodified_cache_is_not_saved(tmp_path):
+    SegmentCache("road").save(tmp_path / "segment_cache.json")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,95 @@
+"""
+Routing service: every endpoint answers with JSON and the right status code,
+malformed requests are refused before they reach a worker.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import server
+from helpers.graph_helper import compile_graph
+from server import RouteDispatcher, RoutingService
+from store.states import GlobalState
+
+
+@pytest.fixture(autouse=True)
+def locations(monkeypatch):
+    graph = [
+        {"node": "A", "branch": [{"node": "B", "distance": 2}]},
+        {"node": "B", "branch": [{"node": "C", "distance": 3}]},
+        {"node": "C", "branch": []},
+    ]
+    monkeypatch.setattr(GlobalState, "malang_graph", graph)
+    monkeypatch.setattr(GlobalState, "compiled_graph", compile_graph(graph))
+    monkeypatch.setattr(GlobalState, "all_pairs", None)
+    monkeypatch.setattr(GlobalState, "result_cache", None)
+    monkeypatch.setattr(GlobalState, "cost_budget", None)
+
+
+def exchange(*requests):
+    """
+    Send raw HTTP requests to a service without worker pool, each over its own
+    connection. Returns (status, JSON payload) of every response.
+    """
+    async def run():
+        dispatcher = RouteDispatcher(None, 1)
+        service = RoutingService(dispatcher, max_connections=4)
+        listener = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        dispatcher.start()
+        port = listener.sockets[0].getsockname()[1]
+        responses = []
+        for request in requests:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            head, _, body = response.partition(b"\r\n\r\n")
+            responses.append((int(head.split()[1]), json.loads(body)))
+        listener.close()
+        for task in dispatcher.tasks:
+            task.cancel()
+        return responses
+    return asyncio.run(run())
+
+
+def request(method, path, payload=None):
+    body = b"" if payload is None else json.dumps(payload).encode()
+    return (f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+
+def test_get_endpoints():
+    health, locations = exchange(request("GET", "/health"), request("GET", "/locations"))
+    assert health == (200, {"status": "ok", "locations": 3})
+    assert locations == (200, {"locations": ["A", "B", "C"]})
+
+
+def test_route_and_batch():
+    job = {"start": "A", "destination": "C", "algorithm": "BFS"}
+    (status, record), (batch_status, batch) = exchange(
+        request("POST", "/route", job),
+        request("POST", "/batch", {"jobs": [{"start": "A", "destinations": ["C"]}, {"start": "C", "destinations": ["A"]}]}),
+    )
+    assert status == 200 and record["found"] and record["algorithm"] == "BFS"
+    assert batch_status == 200
+    assert [result["found"] for result in batch["results"]] == [True, False]
+
+
+@pytest.mark.parametrize("raw, status", [
+    (request("GET", "/route"), 405),
+    (request("POST", "/health"), 405),
+    (request("GET", "/unknown"), 404),
+    (b"POST /route HTTP/1.1\r\nContent-Length: 5\r\nConnection: close\r\n\r\n{nope", 400),
+    (request("POST", "/route", {"start": "A"}), 400),
+    (request("POST", "/route", {"start": "A", "destinations": ["C"], "algorithm": "A*"}), 400),
+    (request("POST", "/batch", {"jobs": "A"}), 400),
+    (request("POST", "/batch", {"jobs": ["A"]}), 400),
+    (b"garbage\r\n\r\n", 400),
+    (f"POST /batch HTTP/1.1\r\nContent-Length: {server.MAX_BODY_SIZE + 1}\r\n\r\n".encode(), 413),
+])
+def test_bad_requests_are_refused(raw, status):
+    (answered, payload), = exchange(raw)
+    assert answered == status
+    assert "error" in payload
@@ -0,0 +1,69 @@
+"""
+Spatial index: every point snaps to the road node with the smallest
+great-circle distance, points beyond the snap radius get no node.
+"""
+
+import math
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from helpers import spatial_index_helper
+from helpers.road_cache_helper import save_road_network
+from helpers.spatial_index_helper import EARTH_RADIUS, NO_NODE, SpatialIndex, load_spatial_index
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+@pytest.fixture
+def nodes():
+    rng = np.random.default_rng(4)
+    return np.arange(100, 600, dtype=np.int64), rng.uniform(-8.0, -7.8, 500), rng.uniform(112.5, 112.7, 500)
+
+
+def test_snap_matches_brute_force(nodes):
+    node_ids, latitudes, longitudes = nodes
+    index = SpatialIndex(node_ids, latitudes, longitudes)
+    rng = np.random.default_rng(5)
+    points_lat, points_lon = rng.uniform(-8.0, -7.8, 200), rng.uniform(112.5, 112.7, 200)
+
+    snapped, distances = index.snap(points_lat, points_lon)
+    for lat, lon, node, distance in zip(points_lat, points_lon, snapped, distances):
+        expected = [haversine(lat, lon, node_lat, node_lon) for node_lat, node_lon in zip(latitudes, longitudes)]
+        assert node == node_ids[int(np.argmin(expected))]
+        assert distance == pytest.approx(min(expected), rel=1e-6)
+
+
+def test_points_beyond_the_radius_get_no_node():
+    index = SpatialIndex([7, 8], [-7.98, -7.97], [112.63, 112.63])
+    node_ids, distances = index.snap([-7.98, -7.90], [112.6305, 112.63], max_distance=100)
+    assert node_ids.tolist() == [7, NO_NODE]
+    assert distances[0] == pytest.approx(haversine(-7.98, 112.63, -7.98, 112.6305), rel=1e-6)
+    assert np.isinf(distances[1])
+    assert index.nearest_node(-7.90, 112.63, max_distance=100) is None
+    assert index.nearest_node(-7.90, 112.63) == 8
+
+
+def test_saved_index_is_reused_until_the_road_changes(tmp_path, monkeypatch):
+    G = nx.MultiDiGraph()
+    G.add_node(1, x=112.63, y=-7.98)
+    G.add_node(2, x=112.64, y=-7.97)
+    G.add_edge(1, 2, length=1500.0)
+    road = save_road_network(G, tmp_path / "road")
+    load_spatial_index(road, tmp_path / "road")
+
+    def build_again(road):
+        raise AssertionError("the saved index was not reused")
+
+    monkeypatch.setattr(spatial_index_helper.SpatialIndex, "from_road", build_again)
+    assert load_spatial_index(road, tmp_path / "road").nearest_node(-7.97, 112.64) == 2
+
+    G.add_node(3, x=112.65, y=-7.96)
+    other = save_road_network(G, tmp_path / "other")
+    with pytest.raises(AssertionError):
+        load_spatial_index(other, tmp_path / "road")
@@ -0,0 +1,67 @@
+"""
+Visiting order of multi-goal routes: Held-Karp against brute force and the
+fallback when destinations can not reach each other.
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from algorithms.tour_planner import held_karp, nearest_neighbor, or_opt, path_cost, plan_visit_order, two_opt
+from helpers.graph_helper import compile_graph
+
+
+def brute_force(distances):
+    return min(path_cost(list(order), distances) for order in itertools.permutations(range(1, len(distances))))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_held_karp_is_optimal(seed):
+    rng = np.random.default_rng(seed)
+    distances = rng.uniform(1, 100, (8, 8))  # Directed, not symmetric
+    np.fill_diagonal(distances, 0)
+    order = held_karp(distances)
+    assert sorted(order) == list(range(1, 8))
+    assert path_cost(order, distances) == pytest.approx(brute_force(distances))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_heuristic_visits_every_destination(seed):
+    rng = np.random.default_rng(seed)
+    distances = rng.uniform(1, 100, (20, 20))
+    np.fill_diagonal(distances, 0)
+    start = nearest_neighbor(distances)
+    order = or_opt(two_opt(start, distances), distances)
+    assert sorted(order) == list(range(1, 20))
+    assert path_cost(order, distances) <= path_cost(start, distances)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_held_karp_with_unreachable_pairs(seed):
+    rng = np.random.default_rng(seed)
+    distances = rng.uniform(1, 100, (7, 7))
+    distances[rng.random((7, 7)) < 0.5] = np.inf
+    np.fill_diagonal(distances, 0)
+    order = held_karp(distances)
+    assert sorted(order) == list(range(1, 7))
+    if np.isfinite(brute_force(distances)):
+        assert path_cost(order, distances) == pytest.approx(brute_force(distances))
+
+
+def test_destinations_not_connected_keep_input_order():
+    graph = compile_graph([
+        {"node": "S", "branch": [{"node": "A", "distance": 1}, {"node": "B", "distance": 1}]},
+        {"node": "A", "branch": []},
+        {"node": "B", "branch": []},
+    ])
+    assert plan_visit_order("S", ["A", "B"], graph) == (["A", "B"], float("inf"))
+
+
+def test_plan_visit_order():
+    graph = compile_graph([
+        {"node": "S", "branch": [{"node": "A", "distance": 5}, {"node": "B", "distance": 1}]},
+        {"node": "A", "branch": [{"node": "B", "distance": 4}]},
+        {"node": "B", "branch": [{"node": "A", "distance": 1}]},
+    ])
+    assert plan_visit_order("S", ["A", "B"], graph) == (["B", "A"], 2.0)
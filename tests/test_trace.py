@@ -0,0 +1,80 @@
+"""
+Saved search traces: only the names of the nodes in the events are looked up
+and written, and traces written with the full list of names still load.
+"""
+
+import json
+
+import pytest
+
+from algorithms import dfs
+from algorithms.bfs import BreadthFirstSearch
+from algorithms.ucs import UniformCostSearch
+from helpers.graph_helper import compile_graph
+from helpers.metrics_helper import SearchMetrics
+from helpers.synthetic_graph_helper import grid_city
+from helpers.trace_helper import SearchTrace, replay
+
+
+def record(name_of):
+    trace = SearchTrace(name_of, "BFS")
+    trace.emit("begin", 0, 5)
+    trace.emit("expand", 0, None, 0)
+    trace.emit("push", 3, 2.5, 2.5)
+    trace.emit("expand", 3, 0, 2.5)
+    trace.emit("push", 5, 1.0, 3.5)
+    trace.emit("goal", 5, 3.5)
+    return trace
+
+
+def test_only_event_nodes_are_named(tmp_path):
+    asked = []
+    trace = record(lambda node: asked.append(node) or f"node {node}")
+    trace.save(tmp_path / "trace.json")
+
+    assert sorted(asked) == [0, 3, 5]
+    loaded = SearchTrace.load(tmp_path / "trace.json")
+    assert loaded.algorithm == "BFS"
+    assert list(loaded.events) == list(trace.events)
+    assert loaded.names() == {0: "node 0", 3: "node 3", 5: "node 5"}
+
+
+def test_old_trace_with_all_names_loads(tmp_path):
+    events = list(record(str).events)
+    with open(tmp_path / "trace.json", "w") as f:
+        json.dump({"algorithm": "BFS", "names": [f"place {i}" for i in range(6)], "events": events}, f)
+
+    loaded = SearchTrace.load(tmp_path / "trace.json")
+    assert loaded.names() == {0: "place 0", 3: "place 3", 5: "place 5"}
+
+
+@pytest.mark.parametrize("search", [
+    lambda graph, metrics, trace: BreadthFirstSearch(graph).search("node-0", "node-35", metrics, trace),
+    lambda graph, metrics, trace: dfs.search("node-0", "node-35", metrics, trace, graph),
+    lambda graph, metrics, trace: UniformCostSearch(graph).search("node-0", "node-35", metrics, trace),
+], ids=["BFS", "DFS", "UCS"])
+def test_trace_follows_the_search(search):
+    graph = compile_graph(grid_city(36, seed=2))
+    metrics, trace = SearchMetrics(), SearchTrace(graph.name_of)
+    path, cost, _ = search(graph, metrics, trace)
+    untraced = SearchMetrics()
+    assert search(graph, untraced, None)[:2] == (path, cost)
+
+    kinds = [event[0] for event in trace.events]
+    assert kinds[0] == "begin" and kinds[-1] == "goal"
+    assert kinds.count("expand") == metrics.expanded == untraced.expanded
+    assert kinds.count("push") == metrics.generated
+    assert trace.events[-1] == ("goal", graph.id_of(path[-1]), cost)
+
+
+def test_ring_buffer_keeps_the_newest_events():
+    trace = SearchTrace(str, max_events=2)
+    for node in range(5):
+        trace.emit("push", node, 1.0, float(node))
+    assert [event[1] for event in trace.events] == [3, 4]
+    assert trace.dropped == 3
+
+
+def test_replay_of_a_recorded_trace(monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    replay(record(lambda node: f"node {node}"), speed=100)